@@ -0,0 +1,389 @@
+"""
+Scaling benchmarks for population generation, model construction, stepping and
+data collection.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.suite --sizes demo small medium --save benchmarks/baselines/local.json
+    python -m benchmarks.suite --sizes demo small medium --compare benchmarks/baselines/local.json
+
+benchmarks/baselines/reference.json is the committed reference baseline (see
+REFERENCE_BASELINE). Regenerate it with
+
+    python -m benchmarks.suite --sizes demo small --comparisons state_store checkpoint population_cache shards \
+        --save benchmarks/baselines/reference.json
+
+and commit it with any change that moves performance on purpose. Timings only
+compare on similar hardware (its 'meta' records where it was made), so to
+check a change on another machine, save a baseline from the parent commit
+there and compare against that.
+
+Each size is timed in one pass and, unless --no-memory is given, memory-profiled
+with tracemalloc in a second pass (tracing slows allocation-heavy code, so the
+passes are kept apart). Baselines are JSON files; --compare exits with status 1
+when any phase is slower, or peaks higher, than the baseline by more than the
+tolerance.
+
+--comparisons additionally measures variants of one phase side by side at each
+size (see COMPARISONS), e.g. `--comparisons state_store` for the memory held by
+plain versus column-backed agents or `--comparisons checkpoint` for restoring a
+checkpoint versus building the model afresh, `--comparisons population_cache`
+for building from a cached population, or `--comparisons shards` for the step
+time of a sharded simulation with one worker versus several.
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.simulation.checkpoint import Checkpoint
+from src.simulation.model import MigrationModel, generate_population
+from src.simulation.population_cache import PopulationCache
+from src.simulation.sharding import ShardedSimulation
+from src.utils.rng import RandomStreams
+
+# Benchmark sizes, from the run.py demo up to the full specification
+SIZES = {
+    'demo': dict(n_individuals=50, n_firms=10, n_regions=5, n_governments=2),
+    'small': dict(n_individuals=5_000, n_firms=500, n_regions=50, n_governments=2),
+    'medium': dict(n_individuals=50_000, n_firms=5_000, n_regions=200, n_governments=2),
+    'large': dict(n_individuals=200_000, n_firms=20_000, n_regions=384, n_governments=2),
+    'full': dict(n_individuals=500_000, n_firms=50_000, n_regions=384, n_governments=2),
+}
+
+# The committed reference baseline
+REFERENCE_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'reference.json')
+
+# Phases measured at every size; 'step' excludes data collection
+PHASES = ('generate', 'construct', 'step', 'collect')
+
+
+def _time_phases(params, steps, engine, seed):
+    """Seconds of each phase; step and collect are means per step."""
+    start = perf_counter()
+    generate_population(RandomStreams(seed).generator('generation'), params['n_individuals'],
+                        params['n_firms'], params['n_regions'])
+    generate = perf_counter() - start
+
+    start = perf_counter()
+    model = MigrationModel(**params, seed=seed, engine=engine, profile=True)
+    construct = perf_counter() - start
+
+    for _ in range(steps):
+        model.step()
+    totals = model.profiler.dataframe().groupby(level='Phase')['Seconds'].sum()
+    collect = totals['collect'] / steps
+    step = totals['MigrationModel.step'] / steps - collect
+    return {'generate': generate, 'construct': construct, 'step': step, 'collect': collect}
+
+
+def _peak_memory(params, steps, engine, seed):
+    """Peak traced memory (bytes) allocated during each phase."""
+    peaks = {}
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        generate_population(RandomStreams(seed).generator('generation'), params['n_individuals'],
+                            params['n_firms'], params['n_regions'])
+        peaks['generate'] = tracemalloc.get_traced_memory()[1]
+
+        tracemalloc.reset_peak()
+        model = MigrationModel(**params, seed=seed, engine=engine)
+        peaks['construct'] = tracemalloc.get_traced_memory()[1]
+
+        step_peak = collect_peak = 0
+        collect = model.datacollector.collect
+        for _ in range(steps):
+            model.datacollector.collect = lambda model: None  # measured separately below
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            model.step()
+            step_peak = max(step_peak, tracemalloc.get_traced_memory()[1] - baseline)
+            model.datacollector.collect = collect
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            collect(model)
+            collect_peak = max(collect_peak, tracemalloc.get_traced_memory()[1] - baseline)
+        peaks['step'] = step_peak
+        peaks['collect'] = collect_peak
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def _traced(func):
+    """Run `func()`, returning its result, seconds, and the traced memory (bytes) it retained and peaked at."""
+    tracemalloc.start()
+    try:
+        start = perf_counter()
+        result = func()
+        seconds = perf_counter() - start
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, retained, peak
+
+
+def _variant(seconds, retained=None, peak=None):
+    mb = lambda value: value / 2 ** 20 if value is not None else None
+    return {'seconds': seconds, 'retained_mb': mb(retained), 'peak_mb': mb(peak)}
+
+
+def compare_state_store(params, seed):
+    """Model construction with plain agents versus agents backed by the state store."""
+    results = {}
+    for name, state_store in (('plain', False), ('state_store', True)):
+        _, seconds, retained, peak = _traced(lambda: MigrationModel(**params, seed=seed, state_store=state_store))
+        results[name] = _variant(seconds, retained, peak)
+    return results
+
+
+def compare_shards(params, seed, steps=5, shard_counts=(1, 4)):
+    """
+    Seconds per step of a ShardedSimulation with one shard versus several, each
+    in its own worker process: the fastest of `steps` steps, as the exchange
+    with the workers makes single steps noisy. Memory is held by the workers,
+    so only time is measured.
+    """
+    results = {}
+    for n_shards in shard_counts:
+        with ShardedSimulation(**params, n_shards=n_shards, seed=seed) as simulation:
+            seconds = []
+            for _ in range(steps):
+                start = perf_counter()
+                simulation.step()
+                seconds.append(perf_counter() - start)
+            results[f"shards_{n_shards}"] = _variant(min(seconds))
+    return results
+
+
+def compare_population_cache(params, seed):
+    """
+    Model construction from a freshly generated population versus a cached one,
+    with plain and with column-backed agents.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PopulationCache(directory)
+        MigrationModel(**params, seed=seed, population_cache=cache)  # fill the cache
+        for state_store in (False, True):
+            for cached in (False, True):
+                build = lambda: MigrationModel(**params, seed=seed, state_store=state_store,
+                                               population_cache=cache if cached else None)
+                _, seconds, retained, peak = _traced(build)
+                name = ('state_store' if state_store else 'plain') + ('_cached' if cached else '')
+                results[name] = _variant(seconds, retained, peak)
+    return results
+
+
+def compare_checkpoint(params, seed):
+    """Building a model afresh versus capturing it to and restoring it from a checkpoint."""
+    model, seconds, retained, peak = _traced(lambda: MigrationModel(**params, seed=seed))
+    results = {'build': _variant(seconds, retained, peak)}
+    checkpoint, seconds, retained, peak = _traced(lambda: Checkpoint.capture(model))
+    results['capture'] = _variant(seconds, retained, peak)
+    _, seconds, retained, peak = _traced(checkpoint.restore)
+    results['restore'] = _variant(seconds, retained, peak)
+    return results
+
+
+# Side-by-side measurements run with --comparisons; each maps (params, seed) to
+# {variant: {'seconds', 'retained_mb', 'peak_mb'}}
+COMPARISONS = {
+    'state_store': compare_state_store,
+    'checkpoint': compare_checkpoint,
+    'population_cache': compare_population_cache,
+    'shards': compare_shards,
+}
+
+
+def measure(size, steps=5, engine='mesa', seed=0, memory=True):
+    """
+    Benchmark one size.
+
+    Args:
+        size: A key of SIZES.
+        steps: Steps run after construction.
+        engine: Model engine, 'mesa' or 'array'.
+        seed: Model seed.
+        memory: Also measure tracemalloc peaks (in a separate pass).
+
+    Returns:
+        A dict mapping each phase to {'seconds': ..., 'peak_mb': ...}; peak_mb is
+        None without `memory`.
+    """
+    params = SIZES[size]
+    seconds = _time_phases(params, steps, engine, seed)
+    peaks = _peak_memory(params, steps, engine, seed) if memory else {}
+    return {phase: {'seconds': seconds[phase],
+                    'peak_mb': peaks[phase] / 2 ** 20 if phase in peaks else None}
+            for phase in PHASES}
+
+
+def run_suite(sizes=('demo', 'small'), steps=5, engine='mesa', seed=0, memory=True, log=None,
+              comparisons=()):
+    """
+    Benchmark several sizes.
+
+    Returns:
+        A JSON-serialisable dict with the run's settings and environment ('meta'),
+        the measure() result of each size ('results') and, for each name in
+        `comparisons`, the COMPARISONS result of each size ('comparisons').
+    """
+    results = {}
+    for size in sizes:
+        if log is not None:
+            log(f"Benchmarking {size} ({SIZES[size]['n_individuals']} individuals)...")
+        results[size] = measure(size, steps, engine, seed, memory)
+    compared = {}
+    for name in comparisons:
+        compared[name] = {}
+        for size in sizes:
+            if log is not None:
+                log(f"Comparing {name} at {size}...")
+            compared[name][size] = COMPARISONS[name](SIZES[size], seed)
+    return {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'steps': steps,
+            'engine': engine,
+            'seed': seed,
+        },
+        'results': results,
+        'comparisons': compared,
+    }
+
+
+def comparison_table(suite):
+    """The suite's comparisons as a DataFrame indexed by (comparison, size, variant)."""
+    rows = [{'comparison': name, 'size': size, 'variant': variant, **values}
+            for name, by_size in suite.get('comparisons', {}).items()
+            for size, variants in by_size.items()
+            for variant, values in variants.items()]
+    columns = ['comparison', 'size', 'variant', 'seconds', 'retained_mb', 'peak_mb']
+    return pd.DataFrame(rows, columns=columns).set_index(columns[:3])
+
+
+def scaling(suite):
+    """
+    How each phase scales with population size.
+
+    Returns:
+        A DataFrame indexed by (size, phase) with seconds, peak_mb, microseconds
+        per individual, and the scaling exponent relative to the previous size
+        (1 means linear in the number of individuals).
+    """
+    rows = []
+    previous = None
+    for size, phases in suite['results'].items():
+        n = SIZES[size]['n_individuals']
+        for phase, values in phases.items():
+            exponent = None
+            if previous is not None and previous[1][phase]['seconds'] > 0 and values['seconds'] > 0:
+                exponent = (math.log(values['seconds'] / previous[1][phase]['seconds'])
+                            / math.log(n / previous[0]))
+            rows.append({'size': size, 'phase': phase, 'seconds': values['seconds'],
+                         'peak_mb': values['peak_mb'], 'us_per_individual': values['seconds'] / n * 1e6,
+                         'exponent': exponent})
+        previous = (n, phases)
+    return pd.DataFrame(rows).set_index(['size', 'phase'])
+
+
+def save_baseline(suite, path):
+    """Write a suite result as a JSON baseline."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(suite, f, indent=2)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, tolerance=0.25, min_seconds=1e-3):
+    """
+    Phases that regressed against a baseline.
+
+    Args:
+        baseline: Suite result to compare against.
+        current: Suite result of this version.
+        tolerance: Allowed relative increase, e.g. 0.25 for 25%.
+        min_seconds: Phases faster than this in the baseline are ignored, as
+            their timings are dominated by noise.
+
+    Returns:
+        A list of (size, phase, metric, baseline value, current value) tuples,
+        one per metric that grew by more than `tolerance`. Comparison variants
+        are checked too, with 'comparison/variant' as the phase. Sizes missing
+        from either result are skipped.
+    """
+    pairs = [(current['results'], baseline['results'], '')]
+    for name, by_size in current.get('comparisons', {}).items():
+        pairs.append((by_size, baseline.get('comparisons', {}).get(name, {}), f"{name}/"))
+    regressions = []
+    for results, references, prefix in pairs:
+        for size, phases in results.items():
+            reference = references.get(size)
+            if reference is None:
+                continue
+            for phase, values in phases.items():
+                for metric in ('seconds', 'retained_mb', 'peak_mb'):
+                    old = reference.get(phase, {}).get(metric)
+                    new = values.get(metric)
+                    if old is None or new is None or (metric == 'seconds' and old < min_seconds):
+                        continue
+                    if new > old * (1 + tolerance):
+                        regressions.append((size, prefix + phase, metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scaling benchmark suite.")
+    parser.add_argument('--sizes', nargs='+', default=['demo', 'small'], choices=list(SIZES))
+    parser.add_argument('--steps', type=int, default=5)
+    parser.add_argument('--engine', default='mesa', choices=MigrationModel.ENGINES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass.")
+    parser.add_argument('--comparisons', nargs='*', default=[], choices=list(COMPARISONS),
+                        help="Also run these side-by-side comparisons at each size.")
+    parser.add_argument('--save', metavar='JSON', help="Write the results as a baseline.")
+    parser.add_argument('--compare', metavar='JSON', help="Compare against a saved baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    suite = run_suite(args.sizes, args.steps, args.engine, args.seed, not args.no_memory, log=print,
+                      comparisons=args.comparisons)
+    with pd.option_context('display.width', 120, 'display.max_rows', None):
+        print(scaling(suite))
+        if args.comparisons:
+            print(comparison_table(suite))
+    if args.save:
+        save_baseline(suite, args.save)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        regressions = compare(load_baseline(args.compare), suite, args.tolerance)
+        for size, phase, metric, old, new in regressions:
+            print(f"REGRESSION {size}/{phase} {metric}: {old:.4g} -> {new:.4g}")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
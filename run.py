@@ -1,3 +1,7 @@
+import argparse
+
+from src.simulation.batch import BatchRunner
+from src.simulation.live import MetricsPublisher, step_snapshot
 from src.simulation.model import MigrationModel
 
 # Model parameters
@@ -6,21 +10,36 @@ N_FIRMS = 10
 N_REGIONS = 5
 N_GOVERNMENTS = 2  # 1 federal, 1 state
 
-def run_simulation(steps=10):
+def run_simulation(steps=10, profile_path=None, serve_port=None):
     """
     Initializes and runs the migration simulation.
+
+    If `profile_path` is given, the per-step timing table is written there as CSV.
+    If `serve_port` is given, live step snapshots are served on that port (see
+    MetricsPublisher).
     """
     # Create the model
     model = MigrationModel(n_individuals=N_INDIVIDUALS, 
                            n_firms=N_FIRMS, 
                            n_regions=N_REGIONS, 
-                           n_governments=N_GOVERNMENTS)
+                           n_governments=N_GOVERNMENTS,
+                           profile=profile_path is not None)
+
+    publisher = MetricsPublisher(port=serve_port) if serve_port is not None else None
+    if publisher is not None:
+        print(f"Serving live metrics at {publisher.url}/events")
 
     # Run the simulation for a specified number of steps
     print(f"Running simulation for {steps} steps...")
-    for i in range(steps):
-        model.step()
-        print(f"Step {i+1} completed.")
+    try:
+        for i in range(steps):
+            model.step()
+            if publisher is not None:
+                publisher.publish(step_snapshot(model))
+            print(f"Step {i+1} completed.")
+    finally:
+        if publisher is not None:
+            publisher.close()
 
     print("Simulation finished.")
 
@@ -33,9 +52,9 @@ def run_simulation(steps=10):
     print(model_data)
 
     print("\nAgent-level data (last step):")
-    # Filter for the last step and drop agents with no data (e.g., government)
+    # Agent-level data is only recorded for individuals
     last_step_data = agent_data.loc[agent_data.index.get_level_values('Step').max()]
-    print(last_step_data.dropna(how='all').head())
+    print(last_step_data.head())
 
     # Example analysis: count unemployed agents at the end
     # Example analysis: calculate unemployment rate from model data
@@ -45,5 +64,40 @@ def run_simulation(steps=10):
         unemployment_rate = (1 - (final_employed_count / total_individuals)) * 100
         print(f"\nFinal unemployment rate: {unemployment_rate:.2f}%")
 
+    if profile_path is not None:
+        model.profiler.to_csv(profile_path)
+        print(f"\n--- Step profile (written to {profile_path}) ---")
+        print(model.profiler.summary())
+
+def run_batch(replicates, steps=10, seed=0):
+    """
+    Runs seeded replicates in parallel and prints the aggregated model-level series.
+    """
+    runner = BatchRunner(dict(n_individuals=N_INDIVIDUALS,
+                              n_firms=N_FIRMS,
+                              n_regions=N_REGIONS,
+                              n_governments=N_GOVERNMENTS),
+                         steps=steps, n_replicates=replicates, seed=seed)
+    print(f"Running {replicates} replicates for {steps} steps on {runner.max_workers} workers...")
+    result = runner.run(callback=lambda index, series: print(f"Replicate {index} completed."))
+    if result.failures:
+        print(f"{len(result.failures)} replicates failed: {result.failures}")
+
+    print("\n--- Monte Carlo Results ---")
+    print(result.summary()['UnemploymentRate'])
+
 if __name__ == "__main__":
-    run_simulation()
+    parser = argparse.ArgumentParser(description="Run the migration simulation.")
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--replicates', type=int, default=1,
+                        help="Run this many seeded replicates in parallel and aggregate them.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', metavar='CSV',
+                        help="Time each phase of every step and write the timing table to this file.")
+    parser.add_argument('--serve', metavar='PORT', type=int,
+                        help="Serve live step metrics over HTTP (server-sent events) on this port.")
+    args = parser.parse_args()
+    if args.replicates > 1:
+        run_batch(args.replicates, args.steps, args.seed)
+    else:
+        run_simulation(args.steps, args.profile, args.serve)
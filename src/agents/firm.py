@@ -1,5 +1,7 @@
 import mesa
 from ..simulation.job_market import JobVacancy
+from ..simulation.profiling import profiled
+from ..utils.indexed_set import IndexedSet
 
 class FirmAgent(mesa.Agent):
     """
@@ -25,6 +27,18 @@ class FirmAgent(mesa.Agent):
         hiring_projections: The firm's hiring projections.
         wage_structure: The firm's wage structure.
     """
+    # Default per-step probability of laying off one employee, by AI adoption
+    # stage; a model's `layoff_probabilities` apply to its firms
+    LAYOFF_PROBABILITIES = {
+        'none': 0.001,  # 0.1% chance
+        'early': 0.01,   # 1% chance
+        'mature': 0.05    # 5% chance
+    }
+    # Default per-step probability of opening a new position (`model.vacancy_rate`)
+    VACANCY_RATE = 0.05
+    # Inclusive range of the numeric part of posted "15-XXXX" SOC codes
+    VACANCY_SOC_RANGE = (1000, 2000)
+
     def __init__(self, unique_id, model, industry, size_category, age, 
                  remote_work_policy, ai_adoption_stage, revenue_growth, 
                  labor_intensity, geographic_footprint, automation_investment, 
@@ -49,8 +63,8 @@ class FirmAgent(mesa.Agent):
         self.wage_structure = wage_structure
         # Location
         self.msa = msa
-        # Employment tracking
-        self.employees = []
+        # Employment tracking: ids of current employees, with O(1) add/remove/choice
+        self.employees = IndexedSet()
 
     def step(self):
         """
@@ -59,49 +73,73 @@ class FirmAgent(mesa.Agent):
         self.layoff_logic()
         self.post_job_vacancy()
 
+    @profiled
     def layoff_logic(self):
         """
         Determines whether to lay off an employee based on AI adoption.
         """
-        layoff_probabilities = {
-            'none': 0.001,  # 0.1% chance
-            'early': 0.01,   # 1% chance
-            'mature': 0.05    # 5% chance
-        }
+        prob = self.model.layoff_probabilities.get(self.ai_adoption_stage, 0)
+
+        rng = self._random('layoff')
+        if rng.random() < prob:
+            self.lay_off_employee(rng)
 
-        prob = layoff_probabilities.get(self.ai_adoption_stage, 0)
+    def lay_off_employee(self, rng=None):
+        """
+        Lay off one random employee, if the firm has any.
 
-        if self.model.random.random() < prob and self.employees:
-            # Choose a random employee to lay off
-            employee_id = self.model.random.choice(self.employees)
-            
-            # Find the agent in the model's schedule
-            # Note: This is not the most efficient way for large models.
-            # A dictionary mapping unique_id to agent would be faster.
-            for agent in self.model.schedule.agents:
-                if agent.unique_id == employee_id:
-                    employee = agent
-                    break
-            else:
-                return # Agent not found
+        Args:
+            rng: Source of randomness; defaults to the firm's 'layoff' stream.
+        """
+        if not self.employees:
+            return
+        if rng is None:
+            rng = self._random('layoff')
+        # Choose a random employee to lay off
+        employee_id = self.employees.choice(rng)
+        employee = self.model.agent_id_map.get(employee_id)
+        if employee is None:
+            # Not an agent of this model (e.g. resident in another shard)
+            if self.model.record_remote_layoff(employee_id, self):
+                self.employees.remove(employee_id)
+                self.total_workers -= 1
+            return
 
-            # Update employee status
-            employee.is_employed = False
-            employee.employer_id = None
+        # Update employee status
+        employee.is_employed = False
+        employee.employer_id = None
+        self.model.record_layoff(employee, self)
 
-            # Remove employee from firm's list
-            self.employees.remove(employee_id)
-            self.total_workers -= 1
+        # Remove employee from firm's list
+        self.employees.remove(employee_id)
+        self.total_workers -= 1
 
+    @profiled
     def post_job_vacancy(self):
         """
-        Post a job vacancy to the model's central job board with some probability.
+        Post a job vacancy to the model's central job market with some probability.
         Currently, the vacancy's soc_code is chosen at random.
         """
         # 5% chance each step to open a new position
-        if self.model.random.random() < 0.05:
-            # Choose a random SOC code similar to workforce needs; simplified
-            soc_code = f"15-{self.model.random.randint(1000, 2000)}"
-            vacancy = JobVacancy(firm_id=self.unique_id, soc_code=soc_code, msa=self.msa)
-            self.model.job_board.append(vacancy)
+        rng = self._random('vacancy')
+        if rng.random() < self.model.vacancy_rate:
+            self.open_vacancy(rng)
+
+    def open_vacancy(self, rng=None):
+        """
+        Post one vacancy to the job market.
+
+        Args:
+            rng: Source of randomness; defaults to the firm's 'vacancy' stream.
+        """
+        if rng is None:
+            rng = self._random('vacancy')
+        # Choose a random SOC code similar to workforce needs; simplified
+        soc_code = f"15-{rng.randint(*self.VACANCY_SOC_RANGE)}"
+        vacancy = JobVacancy(firm_id=self.unique_id, soc_code=soc_code, msa=self.msa)
+        self.model.job_market.post(vacancy)
+        self.model.record_vacancy(vacancy)
 
+    def _random(self, purpose):
+        """This firm's source of randomness for one decision; see RandomStreams.agent_random."""
+        return self.model.streams.agent_random('firms', purpose, self.unique_id, self.model.schedule.steps)
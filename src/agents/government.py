@@ -8,23 +8,33 @@ class GovernmentAgent(mesa.Agent):
         unique_id: Agent's unique identifier.
         model: The model instance the agent belongs to.
         level: The level of government (e.g., 'federal', 'state', 'local').
+        jurisdiction: MSA ids the government's policies cover; None for all.
         # Policy Levers
         relocation_incentives: Policies to incentivize relocation.
         retraining_programs: Programs to support workforce transition.
+        benefit_programs: Income support for displaced workers.
         regional_development_strategies: Strategies for regional economic development.
     """
-    def __init__(self, unique_id, model, level, relocation_incentives=None, 
-                 retraining_programs=None, regional_development_strategies=None):
+    def __init__(self, unique_id, model, level, relocation_incentives=None,
+                 retraining_programs=None, regional_development_strategies=None,
+                 benefit_programs=None, jurisdiction=None):
         super().__init__(unique_id, model)
         self.level = level
+        self.jurisdiction = frozenset(jurisdiction) if jurisdiction is not None else None
         self.relocation_incentives = relocation_incentives or {}
         self.retraining_programs = retraining_programs or {}
+        self.benefit_programs = benefit_programs or {}
         self.regional_development_strategies = regional_development_strategies or {}
 
+    def policies(self):
+        """The Policy objects of the relocation, retraining and benefit programs, in that order."""
+        for programs in (self.relocation_incentives, self.retraining_programs, self.benefit_programs):
+            yield from programs.values()
+
     def step(self):
         """
         The agent's step function, called once per step of the simulation.
+        Applies each policy through the model's PolicyEngine.
         """
-        # In future steps, this will include logic for implementing and
-        # adjusting policies based on the state of the simulation.
-        pass
+        for policy in self.policies():
+            self.model.policy_engine.run(self, policy)
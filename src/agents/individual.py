@@ -1,5 +1,7 @@
 import mesa
 
+from ..simulation.profiling import profiled
+
 class IndividualAgent(mesa.Agent):
     """
     An individual agent in the simulation.
@@ -35,6 +37,11 @@ class IndividualAgent(mesa.Agent):
         urban_rural_preference: The agent's preference for urban vs. rural living.
         family_proximity_weight: The weight given to family proximity in decisions.
     """
+    # Default per-step probability of evaluating a migration decision (`model.migration_rate`)
+    MIGRATION_RATE = 0.02
+    # Number of alternative regions sampled when evaluating migration
+    MIGRATION_CANDIDATES = 5
+
     def __init__(self, unique_id, model, age, education, race_ethnicity, marital_status,
                  household_size, homeownership, soc_code, industry_naics,
                  ai_exposure_index, wage_percentile, tenure, current_msa,
@@ -83,54 +90,56 @@ class IndividualAgent(mesa.Agent):
         if not self.is_employed:
             self.search_for_job()
         # 2. Occasional migration decision
-        if self.model.random.random() < 0.02:  # 2% chance to evaluate migration each step
+        if self._random('migration').random() < self.model.migration_rate:
             self.decide_migration()
 
+    @profiled
     def decide_migration(self):
         """Simple migration logic: consider moving to region with lower unemployment and cheaper housing."""
-        # Get current region stats
-        current_region = self.model.agent_id_map.get(self.current_msa)
-        if not current_region:
-            return
-        # Gather alternative regions (exclude current)
-        all_regions = [agent for agent in self.model.schedule.agents if isinstance(agent, type(current_region)) and agent.unique_id != self.current_msa]
-        if not all_regions:
+        # Compare regions through the model's per-step score table
+        table = self.model.region_scores()
+        origin_index = table.index.get(self.current_msa)
+        if origin_index is None or len(table) < 2:
             return
-        sample_size = min(5, len(all_regions))
-        candidate_regions = self.model.random.sample(all_regions, k=sample_size)
-
-        best_region = current_region
-        best_score = current_region.unemployment_rate + (current_region.median_price / 1e6)
-        for region in candidate_regions:
-            score = region.unemployment_rate + (region.median_price / 1e6)
-            if score < best_score:
-                best_score = score
-                best_region = region
-        if best_region.unique_id != self.current_msa:
+        # Sample alternative regions, drawing one extra so the current region can
+        # be dropped if it is picked
+        sample_size = min(self.MIGRATION_CANDIDATES, len(table) - 1)
+        sampled = self._random('destination').sample(range(len(table)), k=sample_size + 1)
+        candidates = [i for i in sampled if i != origin_index][:sample_size]
+        movers = table.mover_columns(self) if table.utility is not None else None
+        destination = int(table.choose([origin_index], [candidates], movers)[0])
+        if destination != origin_index:
             # Migrate
-            self.current_msa = best_region.unique_id
+            origin = self.current_msa
+            self.current_msa = table.ids[destination]
+            self.model.record_move(self, origin, self.current_msa)
             # Simple update: adjust housing_costs proportionally
-            self.housing_costs = best_region.median_price / 12  # approx monthly
+            self.housing_costs = float(table.columns['median_price'][destination]) / 12  # approx monthly
 
+    @profiled
     def search_for_job(self):
         """
         An unemployed agent looks for a job by checking firms that are hiring.
         """
-        # Search the model's job board for vacancies matching the agent's SOC code
-        matching_vacancies = [v for v in self.model.job_board if v.soc_code == self.soc_code and v.msa == self.current_msa]
-        if not matching_vacancies:
-            # Broaden search to any MSA if none found in current location
-            matching_vacancies = [v for v in self.model.job_board if v.soc_code == self.soc_code]
+        # Draw a vacancy matching the agent's SOC code, preferring the current MSA
+        # and broadening the search to any MSA if none is found locally
+        job_market = self.model.job_market
+        vacancy_id = job_market.find(self._random('search'), self.soc_code, self.current_msa)
 
-        if matching_vacancies:
-            vacancy = self.model.random.choice(matching_vacancies)
+        if vacancy_id is not None:
+            vacancy = job_market[vacancy_id]
             employer = self.model.agent_id_map.get(vacancy.firm_id)
             if employer:
                 # Accept the job
                 self.is_employed = True
                 self.employer_id = employer.unique_id
-                employer.employees.append(self.unique_id)
+                self.model.record_hire(self, employer)
+                employer.employees.add(self.unique_id)
                 employer.total_workers += 1
 
                 # Remove vacancy from job board
-                self.model.job_board.remove(vacancy)
+                job_market.take(vacancy_id)
+
+    def _random(self, purpose):
+        """This individual's source of randomness for one decision; see RandomStreams.agent_random."""
+        return self.model.streams.agent_random('individuals', purpose, self.unique_id, self.model.schedule.steps)
@@ -69,14 +69,17 @@ class RegionalAgent(mesa.Agent):
 
     def step(self):
         """Update regional indicators based on current state of agents in this region."""
-        # Gather individuals in this MSA
-        individuals = [a for a in self.model.schedule.agents if hasattr(a, 'current_msa') and a.current_msa == self.unique_id]
-        if individuals:
-            employed = sum(1 for ind in individuals if ind.is_employed)
-            self.unemployment_rate = 1 - (employed / len(individuals))
+        # Read this MSA's labour aggregates from the model's resident index
+        residents = self.model.residents
+        unemployment_rate = residents.unemployment_rate(self.unique_id)
+        if unemployment_rate is not None:
+            self.unemployment_rate = unemployment_rate
             # Wage growth simple proxy: average wage_percentile change (placeholder)
-            avg_wage = sum(getattr(ind, 'wage_percentile', 0.5) for ind in individuals) / len(individuals)
+            avg_wage = residents.mean_wage_percentile(self.unique_id)
             # Smooth wage growth
             self.wage_growth = 0.8 * self.wage_growth + 0.2 * (avg_wage - 0.5)
+        # This step's migration rates from the model's origin-destination flows
+        self.in_migration, self.out_migration = self.model.flows.migration_rates(
+            self.unique_id, residents.resident_count.get(self.unique_id, 0))
         # Housing vacancy rate adjustment based on construction permits (placeholder)
         self.vacancy_rates = max(0.01, min(0.2, self.vacancy_rates + (self.construction_permits/10000 - 0.05)))
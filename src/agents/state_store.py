@@ -0,0 +1,306 @@
+import mesa
+import numpy as np
+import pandas as pd
+
+from ..utils.indexed_set import IndexedSet
+from .firm import FirmAgent
+from .individual import IndividualAgent
+
+# Column kinds: 'float', 'int', 'bool', 'category' (integer codes into a label
+# table) and 'optional_int' (int64 with -1 standing for None).
+INDIVIDUAL_SCHEMA = {
+    # Demographics
+    'age': 'int',
+    'education': 'category',
+    'race_ethnicity': 'category',
+    'marital_status': 'category',
+    'household_size': 'int',
+    'homeownership': 'bool',
+    # Occupation
+    'soc_code': 'category',
+    'industry_naics': 'category',
+    'ai_exposure_index': 'float',
+    'wage_percentile': 'float',
+    'tenure': 'float',
+    # Location
+    'current_msa': 'category',
+    'commute_distance': 'float',
+    'housing_costs': 'float',
+    'local_network_strength': 'float',
+    # Financial
+    'liquid_savings': 'float',
+    'debt_levels': 'float',
+    'equity_holdings': 'float',
+    'unemployment_benefits_eligible': 'bool',
+    # Preferences
+    'climate_preference': 'category',
+    'urban_rural_preference': 'category',
+    'family_proximity_weight': 'float',
+    # Employment Status
+    'is_employed': 'bool',
+    'employer_id': 'optional_int',
+}
+
+FIRM_SCHEMA = {
+    # Characteristics
+    'industry': 'category',
+    'size_category': 'category',
+    'age': 'int',
+    'remote_work_policy': 'category',
+    'ai_adoption_stage': 'category',
+    # Economics
+    'revenue_growth': 'float',
+    'labor_intensity': 'float',
+    'geographic_footprint': 'category',
+    'automation_investment': 'float',
+    # Employment
+    'total_workers': 'int',
+    'layoff_history': 'bool',
+    'hiring_projections': 'float',
+    'wage_structure': 'category',
+    # Location
+    'msa': 'category',
+}
+
+_DTYPES = {
+    'float': np.float64,
+    'int': np.int64,
+    'bool': np.bool_,
+    'category': np.int32,
+    'optional_int': np.int64,
+}
+
+
+class Categories:
+    """Bidirectional mapping between category labels and integer codes."""
+    def __init__(self, labels=()):
+        self.labels = []
+        self.codes = {}
+        for label in labels:
+            self.encode(label)
+
+    def encode(self, label):
+        code = self.codes.get(label)
+        if code is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def decode(self, codes):
+        """Decode an array of codes into an object array of labels."""
+        table = np.empty(len(self.labels), dtype=object)
+        table[:] = self.labels
+        return table[codes]
+
+
+class ColumnTable:
+    """
+    A table of typed NumPy columns with one row per agent.
+
+    Rows are appended with `allocate`; capacity doubles as needed. Column arrays
+    may be reallocated when the table grows, so bulk consumers should fetch them
+    with `column` at the point of use rather than caching them.
+
+    Attributes:
+        schema: Mapping of column name to column kind.
+        size: Number of allocated rows.
+        categories: Mapping of category column name to its Categories.
+    """
+    def __init__(self, schema, capacity=1024):
+        self.schema = dict(schema)
+        self.size = 0
+        self.categories = {name: Categories() for name, kind in self.schema.items() if kind == 'category'}
+        capacity = max(capacity, 1)
+        self._ids = np.zeros(capacity, dtype=object)
+        self._columns = {name: np.zeros(capacity, dtype=_DTYPES[kind]) for name, kind in self.schema.items()}
+
+    @property
+    def capacity(self):
+        return len(self._ids)
+
+    def allocate(self, unique_id):
+        """Append a row for the agent with `unique_id` and return its index."""
+        if self.size == self.capacity:
+            self.reserve(2 * self.capacity)
+        row = self.size
+        self._ids[row] = unique_id
+        self.size += 1
+        return row
+
+    def extend(self, unique_ids, columns):
+        """
+        Append one row per id, filling whole columns at once.
+
+        Category columns are encoded once per distinct label (in order of first
+        appearance, as `set` would) rather than once per row.
+
+        Args:
+            unique_ids: Array of the agents' unique_ids.
+            columns: Mapping of column name to an array of values aligned with
+                `unique_ids`, e.g. generated or cached population columns.
+                Columns not given are left zero.
+
+        Returns:
+            An array of the new rows' indices.
+        """
+        start, n = self.size, len(unique_ids)
+        if start + n > self.capacity:
+            self.reserve(max(start + n, 2 * self.capacity))
+        self._ids[start:start + n] = np.asarray(unique_ids).tolist()
+        self.size += n
+        for name, values in columns.items():
+            kind = self.schema[name]
+            values = np.asarray(values)
+            if kind == 'category':
+                codes, labels = pd.factorize(values)
+                lookup = np.array([self.categories[name].encode(label) for label in labels.tolist()],
+                                  dtype=_DTYPES[kind])
+                values = lookup[codes]
+            elif kind == 'optional_int' and values.dtype == object:
+                values = np.array([-1 if value is None else value for value in values.tolist()], dtype=np.int64)
+            self._columns[name][start:start + n] = values
+        return np.arange(start, start + n)
+
+    def reserve(self, capacity):
+        """Grow the columns so at least `capacity` rows fit without reallocating."""
+        if capacity <= self.capacity:
+            return
+        self._ids = self._grow(self._ids, capacity)
+        for name in self._columns:
+            self._columns[name] = self._grow(self._columns[name], capacity)
+
+    def get(self, row, name):
+        """Read one value as a Python object."""
+        kind = self.schema[name]
+        value = self._columns[name][row]
+        if kind == 'float':
+            return float(value)
+        if kind == 'int':
+            return int(value)
+        if kind == 'bool':
+            return bool(value)
+        if kind == 'category':
+            return self.categories[name].labels[value]
+        return None if value < 0 else int(value)
+
+    def set(self, row, name, value):
+        """Write one value, encoding categories and optional ids."""
+        kind = self.schema[name]
+        if kind == 'category':
+            value = self.categories[name].encode(value)
+        elif kind == 'optional_int' and value is None:
+            value = -1
+        self._columns[name][row] = value
+
+    def column(self, name):
+        """The raw column over allocated rows (category columns hold codes). Writable view."""
+        return self._columns[name][:self.size]
+
+    def values(self, name):
+        """The column over allocated rows with categories decoded to labels."""
+        if self.schema[name] == 'category':
+            return self.categories[name].decode(self.column(name))
+        return self.column(name)
+
+    def ids(self):
+        """Agent unique_ids for each allocated row."""
+        return self._ids[:self.size]
+
+    def group_sum(self, by, values=None, mask=None):
+        """
+        Sum a column (or count rows) per label of a category column.
+
+        Args:
+            by: Name of the category column to group on.
+            values: Name of a numeric column to sum; counts rows if None.
+            mask: Optional boolean array selecting the rows to include.
+
+        Returns:
+            A dict mapping each label of `by` to its total.
+        """
+        codes = self.column(by)
+        weights = None if values is None else self.column(values).astype(np.float64)
+        if mask is not None:
+            codes = codes[mask]
+            weights = None if weights is None else weights[mask]
+        labels = self.categories[by].labels
+        totals = np.bincount(codes, weights=weights, minlength=len(labels))
+        return dict(zip(labels, totals.tolist()))
+
+    @staticmethod
+    def _grow(array, capacity):
+        grown = np.zeros(capacity, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+
+class AgentStateStore:
+    """
+    Columnar state for the model's individuals and firms.
+
+    Attributes:
+        individuals: ColumnTable backing StoredIndividualAgent views.
+        firms: ColumnTable backing StoredFirmAgent views.
+    """
+    def __init__(self, n_individuals=0, n_firms=0):
+        self.individuals = ColumnTable(INDIVIDUAL_SCHEMA, capacity=n_individuals)
+        self.firms = ColumnTable(FIRM_SCHEMA, capacity=n_firms)
+
+
+def _column_property(name):
+    def fget(self):
+        return self._table.get(self._row, name)
+
+    def fset(self, value):
+        self._table.set(self._row, name, value)
+
+    return property(fget, fset, doc=f"Stored column '{name}'.")
+
+
+class StoredIndividualAgent(IndividualAgent):
+    """
+    An IndividualAgent whose attributes live in a row of `model.state.individuals`.
+    The instance __dict__ keeps only Mesa's fields and the row reference.
+    """
+
+    def __init__(self, unique_id, model, *args, **kwargs):
+        self._table = model.state.individuals
+        self._row = self._table.allocate(unique_id)
+        super().__init__(unique_id, model, *args, **kwargs)
+
+    @classmethod
+    def bind(cls, unique_id, model, row):
+        """An agent for a row already filled in `model.state.individuals` (see ColumnTable.extend)."""
+        agent = cls.__new__(cls)
+        agent._table = model.state.individuals
+        agent._row = row
+        mesa.Agent.__init__(agent, unique_id, model)
+        return agent
+
+
+class StoredFirmAgent(FirmAgent):
+    """
+    A FirmAgent whose attributes live in a row of `model.state.firms`.
+    The instance __dict__ keeps only Mesa's fields, the roster and the row reference.
+    """
+
+    def __init__(self, unique_id, model, *args, **kwargs):
+        self._table = model.state.firms
+        self._row = self._table.allocate(unique_id)
+        super().__init__(unique_id, model, *args, **kwargs)
+
+    @classmethod
+    def bind(cls, unique_id, model, row):
+        """A firm for a row already filled in `model.state.firms` (see ColumnTable.extend)."""
+        agent = cls.__new__(cls)
+        agent._table = model.state.firms
+        agent._row = row
+        mesa.Agent.__init__(agent, unique_id, model)
+        agent.employees = IndexedSet()
+        return agent
+
+
+for _name in INDIVIDUAL_SCHEMA:
+    setattr(StoredIndividualAgent, _name, _column_property(_name))
+for _name in FIRM_SCHEMA:
+    setattr(StoredFirmAgent, _name, _column_property(_name))
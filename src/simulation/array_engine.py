@@ -0,0 +1,336 @@
+from time import perf_counter
+
+import numpy as np
+
+from ..agents.firm import FirmAgent
+from ..agents.individual import IndividualAgent
+from .job_market import JobVacancy
+
+
+def _rank_within_groups(keys):
+    """Position of each element among the elements sharing its key, in input order."""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    ranks = np.empty(len(keys), dtype=np.int64)
+    ranks[order] = np.arange(len(keys)) - np.repeat(starts, sizes)
+    return ranks
+
+
+def pair_within_groups(left_keys, right_keys):
+    """
+    Pair the i-th left element of each key group with the i-th right element of
+    the same group.
+
+    Args:
+        left_keys: Integer group keys of the left elements, in priority order.
+        right_keys: Integer group keys of the right elements, in priority order.
+
+    Returns:
+        Two index arrays (into left_keys and right_keys) of the matched pairs.
+    """
+    left_keys = np.asarray(left_keys, dtype=np.int64)
+    right_keys = np.asarray(right_keys, dtype=np.int64)
+    if not len(left_keys) or not len(right_keys):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    span = max(len(left_keys), len(right_keys)) + 1
+    left_tags = left_keys * span + _rank_within_groups(left_keys)
+    right_tags = right_keys * span + _rank_within_groups(right_keys)
+    _, left_index, right_index = np.intersect1d(left_tags, right_tags, assume_unique=True,
+                                                return_indices=True)
+    return left_index, right_index
+
+
+class _PhaseTimer:
+    """Times consecutive phases into a profiler; does nothing without one."""
+    __slots__ = ('profiler', 'start')
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.start = perf_counter() if profiler is not None else None
+
+    def lap(self, phase, calls=1):
+        if self.profiler is not None:
+            now = perf_counter()
+            self.profiler.add(phase, now - self.start, calls)
+            self.start = now
+
+
+class ArrayEngine:
+    """
+    Advances a MigrationModel one step with batched NumPy kernels instead of one
+    Python call per agent.
+
+    The engine operates directly on the model's state store columns and runs the
+    phases in a fixed order: firm layoffs, vacancy posting, job matching for the
+    unemployed, migration evaluation, then regional and government updates. It
+    reproduces the per-agent rules in distribution rather than draw-for-draw; the
+    one structural difference is that job matching fills same-MSA vacancies for
+    every searcher before any searcher broadens to other MSAs.
+
+    After each step it brings the rest of the model up to date (firm rosters, job
+    market, resident index and metrics), so agent objects, data collection and
+    RegionalAgent.step see the same state as under the Mesa scheduler.
+
+    With counter-based model streams (`counter_rng=True`), the per-agent coin
+    flips (which firms attempt a layoff, which post a vacancy and with what
+    occupation, which individuals evaluate migration) are the same draws the
+    agents make under the Mesa scheduler.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.streams = model.streams
+        self.rng = model.streams.generator('engine')
+        self.individuals = model.state.individuals
+        self.firms = model.state.firms
+        self.regions = list(model.regions)
+        self.governments = list(model.governments)
+        self.region_ids = [region.unique_id for region in self.regions]
+        self.firm_agents = [model.agent_id_map[i] for i in self.firms.ids()]
+
+        # Encode every region so MSA codes stay valid as individuals move
+        region_index = {msa: i for i, msa in enumerate(self.region_ids)}
+        msa_categories = self.individuals.categories['current_msa']
+        for msa in self.region_ids:
+            msa_categories.encode(msa)
+        self.region_of_msa_code = np.array([region_index[msa] for msa in msa_categories.labels], dtype=np.int64)
+        self.msa_code_of_region = np.array([msa_categories.codes[msa] for msa in self.region_ids], dtype=np.int64)
+        firm_msa_labels = self.firms.categories['msa'].labels
+        self.firm_region = np.array([region_index[msa] for msa in firm_msa_labels], dtype=np.int64)[
+            self.firms.column('msa')]
+
+        firm_ids = self.firms.ids().astype(np.int64)
+        self.firm_ids = firm_ids
+        self.firm_row_of_id = np.full(int(firm_ids.max(initial=0)) + 1, -1, dtype=np.int64)
+        self.firm_row_of_id[firm_ids] = np.arange(len(firm_ids))
+        # (occupation index, number of soc_code labels, neighbour codes) of the last match
+        self._neighbor_cache = None
+
+    def step(self):
+        """Run one model step over the whole population, timing each phase into the model's profiler."""
+        timer = _PhaseTimer(self.model.profiler)
+        laid_off, firing = self.layoffs()
+        timer.lap('ArrayEngine.layoffs', len(self.firm_ids))
+        vacancy_firms, vacancy_socs = self.post_vacancies()
+        timer.lap('ArrayEngine.post_vacancies', len(self.firm_ids))
+        hired, hired_firms, filled = self.match(vacancy_firms, vacancy_socs)
+        timer.lap('ArrayEngine.match', len(vacancy_firms))
+        movers, origins = self.migrate()
+        timer.lap('ArrayEngine.migrate', len(movers))
+        self._sync_rosters(laid_off, firing, hired, hired_firms)
+        self._sync_job_market(vacancy_firms, vacancy_socs, filled)
+        self._sync_residents(movers, origins)
+        self._sync_metrics(laid_off, vacancy_firms, hired, movers)
+        timer.lap('ArrayEngine.sync')
+        for region in self.regions:
+            region.step()
+        timer.lap('RegionalAgent.step', len(self.regions))
+        for government in self.governments:
+            government.step()
+        timer.lap('GovernmentAgent.step', len(self.governments))
+
+    def layoffs(self):
+        """
+        Each firm lays off one random employee with its adoption-stage probability.
+
+        Returns:
+            The laid-off individual rows and the firm rows that laid them off.
+        """
+        is_employed = self.individuals.column('is_employed')
+        employer_id = self.individuals.column('employer_id')
+        employed = np.flatnonzero(is_employed)
+        employer_rows = self.firm_row_of_id[employer_id[employed]]
+        headcount = np.bincount(employer_rows, minlength=len(self.firm_ids))
+        stages = self.firms.categories['ai_adoption_stage'].labels
+        layoff_probability = np.array(
+            [self.model.layoff_probabilities.get(stage, 0) for stage in stages], dtype=np.float64
+        )[self.firms.column('ai_adoption_stage')]
+        draws = self._uniforms('firms', 'layoff', self.firm_ids)
+        firing = np.flatnonzero((draws < layoff_probability) & (headcount > 0))
+        # Employees grouped by firm; pick a uniform offset into each firing firm's block
+        by_firm = employed[np.argsort(employer_rows, kind='stable')]
+        starts = np.cumsum(headcount) - headcount
+        offsets = (self.rng.random(len(firing)) * headcount[firing]).astype(np.int64)
+        laid_off = by_firm[starts[firing] + offsets]
+
+        is_employed[laid_off] = False
+        employer_id[laid_off] = -1
+        np.subtract.at(self.firms.column('total_workers'), firing, 1)
+        return laid_off, firing
+
+    def post_vacancies(self):
+        """Each firm opens one position with probability `model.vacancy_rate`."""
+        posting = np.flatnonzero(self._uniforms('firms', 'vacancy', self.firm_ids) < self.model.vacancy_rate)
+        low, high = FirmAgent.VACANCY_SOC_RANGE
+        if self.streams.counter:
+            # CounterRandom.randint: one uniform, scaled to the inclusive range
+            u = self.streams.uniforms('firms', 'vacancy', self.firm_ids[posting], self.model.schedule.steps, draw=1)
+            numbers = low + (u * (high - low + 1)).astype(np.int64)
+        else:
+            numbers = self.rng.integers(low, high + 1, size=len(posting))
+        unique_numbers, inverse = np.unique(numbers, return_inverse=True)
+        soc_categories = self.individuals.categories['soc_code']
+        codes = np.array([soc_categories.encode(f"15-{n}") for n in unique_numbers.tolist()], dtype=np.int64)
+        return posting, codes[inverse]
+
+    def match(self, vacancy_firms, vacancy_socs):
+        """
+        Match unemployed workers to vacancies of their occupation, in random order,
+        first within their MSA and then in any MSA. With an occupation index on
+        the job market, workers still unmatched then try their most similar
+        occupation, then the next, and so on, again local first.
+
+        Returns:
+            The hired individual rows, the firm rows that hired them and the
+            indices of the filled vacancies.
+        """
+        searchers = self.rng.permutation(np.flatnonzero(~self.individuals.column('is_employed')))
+        order = self.rng.permutation(len(vacancy_firms))
+        vacancy_firms = vacancy_firms[order]
+        vacancy_socs = vacancy_socs[order]
+
+        searcher_socs = self.individuals.column('soc_code')[searchers].astype(np.int64)
+        searcher_regions = self.region_of_msa_code[self.individuals.column('current_msa')[searchers]]
+        vacancy_regions = self.firm_region[vacancy_firms]
+        matched_s, matched_v = self._pair_local_first(searcher_socs, searcher_regions, vacancy_socs, vacancy_regions)
+
+        occupations = self.model.job_market.occupations
+        if occupations is not None:
+            neighbor_codes = self._neighbor_codes(occupations)
+            open_s = np.ones(len(searchers), dtype=bool)
+            open_v = np.ones(len(vacancy_firms), dtype=bool)
+            for rank in range(neighbor_codes.shape[1]):
+                open_s[matched_s] = False
+                open_v[matched_v] = False
+                socs = np.full(len(searchers), -1, dtype=np.int64)
+                socs[open_s] = neighbor_codes[searcher_socs[open_s], rank]
+                rest_s = np.flatnonzero(socs >= 0)
+                rest_v = np.flatnonzero(open_v)
+                if not len(rest_s) or not len(rest_v):
+                    break
+                s, v = self._pair_local_first(socs[rest_s], searcher_regions[rest_s],
+                                              vacancy_socs[rest_v], vacancy_regions[rest_v])
+                matched_s = np.r_[matched_s, rest_s[s]]
+                matched_v = np.r_[matched_v, rest_v[v]]
+
+        hired = searchers[matched_s]
+        hired_firms = vacancy_firms[matched_v]
+        self.individuals.column('is_employed')[hired] = True
+        self.individuals.column('employer_id')[hired] = self.firm_ids[hired_firms]
+        np.add.at(self.firms.column('total_workers'), hired_firms, 1)
+        return hired, hired_firms, order[matched_v]
+
+    def _pair_local_first(self, searcher_socs, searcher_regions, vacancy_socs, vacancy_regions):
+        """Pair searchers with vacancies of the same occupation, same region first, then any region."""
+        n_regions = len(self.regions)
+        local_s, local_v = pair_within_groups(searcher_socs * n_regions + searcher_regions,
+                                              vacancy_socs * n_regions + vacancy_regions)
+        open_s = np.ones(len(searcher_socs), dtype=bool)
+        open_s[local_s] = False
+        open_v = np.ones(len(vacancy_socs), dtype=bool)
+        open_v[local_v] = False
+        rest_s = np.flatnonzero(open_s)
+        rest_v = np.flatnonzero(open_v)
+        broad_s, broad_v = pair_within_groups(searcher_socs[rest_s], vacancy_socs[rest_v])
+        return np.r_[local_s, rest_s[broad_s]], np.r_[local_v, rest_v[broad_v]]
+
+    def _neighbor_codes(self, occupations):
+        """
+        (occupation codes x neighbours) array of the soc_code category codes of each
+        occupation's similar occupations, most similar first; -1 where there are none.
+        """
+        categories = self.individuals.categories['soc_code']
+        cached = self._neighbor_cache
+        if cached is not None and cached[0] is occupations and cached[1] == len(categories.labels):
+            return cached[2]
+        codes = np.full((len(categories.labels), max(occupations.n_neighbors, 0)), -1, dtype=np.int64)
+        for code, label in enumerate(categories.labels):
+            for rank, (neighbor, _) in enumerate(occupations.neighbors(label)[:codes.shape[1]]):
+                codes[code, rank] = categories.codes.get(neighbor, -1)
+        self._neighbor_cache = (occupations, len(categories.labels), codes)
+        return codes
+
+    def migrate(self):
+        """
+        A random `model.migration_rate` share of individuals compare their
+        region with a sample of others and move to the best-scoring one.
+
+        Returns:
+            The moving individual rows and their origin region indices.
+        """
+        n_regions = len(self.regions)
+        n_candidates = min(IndividualAgent.MIGRATION_CANDIDATES, n_regions - 1)
+        draws = self._uniforms('individuals', 'migration', self.individuals.ids().astype(np.int64))
+        deciding = np.flatnonzero(draws < self.model.migration_rate)
+        if n_candidates <= 0 or not len(deciding):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        msa_codes = self.individuals.column('current_msa')
+        origins = self.region_of_msa_code[msa_codes[deciding]]
+        table = self.model.region_scores()
+        candidates = table.sample_candidates(self.rng, origins, n_candidates)
+        movers_columns = None
+        if table.utility is not None:
+            movers_columns = {name: self.individuals.column(name)[deciding] for name in table.mover_fields}
+        destinations = table.choose(origins, candidates, movers_columns)
+        moving = destinations != origins
+        movers = deciding[moving]
+        destinations = destinations[moving]
+
+        msa_codes[movers] = self.msa_code_of_region[destinations]
+        median_price = table.columns['median_price']
+        self.individuals.column('housing_costs')[movers] = median_price[destinations] / 12  # approx monthly
+        return movers, origins[moving]
+
+    def _uniforms(self, stream, purpose, agent_ids):
+        """One uniform per agent: counter-based draws if enabled, else the engine stream."""
+        if self.streams.counter:
+            return self.streams.uniforms(stream, purpose, agent_ids, self.model.schedule.steps)
+        return self.rng.random(len(agent_ids))
+
+    def _sync_rosters(self, laid_off, firing, hired, hired_firms):
+        """Apply this step's layoffs and hires to the firms' employee lists."""
+        ids = self.individuals.ids()
+        for individual_row, firm_row in zip(laid_off.tolist(), firing.tolist()):
+            self.firm_agents[firm_row].employees.remove(ids[individual_row])
+        for individual_row, firm_row in zip(hired.tolist(), hired_firms.tolist()):
+            self.firm_agents[firm_row].employees.add(ids[individual_row])
+
+    def _sync_job_market(self, vacancy_firms, vacancy_socs, filled):
+        """Post this step's vacancies to the job market and take the filled ones."""
+        job_market = self.model.job_market
+        soc_labels = self.individuals.categories['soc_code'].labels
+        posted = [
+            job_market.post(JobVacancy(firm_id=int(self.firm_ids[firm]), soc_code=soc_labels[soc],
+                                       msa=self.region_ids[self.firm_region[firm]]))
+            for firm, soc in zip(vacancy_firms.tolist(), vacancy_socs.tolist())
+        ]
+        for index in filled.tolist():
+            job_market.take(posted[index])
+
+    def _sync_residents(self, movers, origins):
+        """Relocate movers in the resident index and recompute its aggregates."""
+        residents = self.model.residents
+        ids = self.individuals.ids()
+        regions = self.region_of_msa_code[self.individuals.column('current_msa')]
+        for row, origin in zip(movers.tolist(), origins.tolist()):
+            residents.relocate(ids[row], self.region_ids[origin], self.region_ids[regions[row]])
+        self.model.flows.record_many(origins, regions[movers])
+        n_regions = len(self.regions)
+        residents.set_aggregates(
+            self.region_ids,
+            np.bincount(regions, minlength=n_regions),
+            np.bincount(regions, weights=self.individuals.column('is_employed'), minlength=n_regions),
+            np.bincount(regions, weights=self.individuals.column('wage_percentile'), minlength=n_regions),
+        )
+
+    def _sync_metrics(self, laid_off, vacancy_firms, hired, movers):
+        metrics = self.model.metrics
+        metrics.set('Employed', int(self.individuals.column('is_employed').sum()))
+        metrics.set('Hires', len(hired))
+        metrics.set('Layoffs', len(laid_off))
+        metrics.set('Movers', len(movers))
+        metrics.set('VacanciesPosted', len(vacancy_firms))
+        metrics.set('VacanciesFilled', len(hired))
@@ -0,0 +1,213 @@
+import os
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .model import MigrationModel
+
+
+def run_replicate(model_params, seed, steps):
+    """
+    Run one seeded replicate and return its model-level series.
+
+    Args:
+        model_params: Keyword arguments for MigrationModel (without `seed`).
+        seed: The model's root seed.
+        steps: Number of steps to run.
+
+    Returns:
+        A dict mapping each model-level column to an array with one value per step.
+    """
+    model = MigrationModel(**model_params, seed=seed)
+    for _ in range(steps):
+        model.step()
+    df = model.datacollector.get_model_vars_dataframe()
+    return {name: df[name].to_numpy(dtype=np.float64) for name in df.columns}
+
+
+class SeriesAggregator:
+    """
+    Aggregates replicate time series as they arrive.
+
+    Means and variances are updated online (Welford's algorithm). Replicate
+    values are also kept, as one small (replicates x steps) array per metric, so
+    that quantile bands are exact.
+
+    Args:
+        quantiles: Quantiles reported for each metric and step.
+        confidence: Confidence level of the interval around the mean.
+    """
+    def __init__(self, quantiles=(0.05, 0.5, 0.95), confidence=0.95):
+        self.quantiles = tuple(quantiles)
+        self.confidence = confidence
+        self.count = 0
+        self._mean = {}
+        self._m2 = {}
+        self._values = {}
+
+    def add(self, series):
+        """Fold in one replicate's series (a dict of metric name to per-step array)."""
+        self.count += 1
+        for name, values in series.items():
+            values = np.asarray(values, dtype=np.float64)
+            if name not in self._mean:
+                self._mean[name] = np.zeros_like(values)
+                self._m2[name] = np.zeros_like(values)
+                self._values[name] = []
+            delta = values - self._mean[name]
+            self._mean[name] += delta / self.count
+            self._m2[name] += delta * (values - self._mean[name])
+            self._values[name].append(values)
+
+    def summary(self):
+        """
+        A DataFrame indexed by step with (metric, statistic) columns: mean, std,
+        the confidence interval bounds ci_low/ci_high, and one column per quantile
+        named like q05.
+        """
+        columns = {}
+        for name, mean in self._mean.items():
+            std = np.sqrt(self._m2[name] / (self.count - 1)) if self.count > 1 else np.full_like(mean, np.nan)
+            half_width = std / np.sqrt(self.count) * stats.t.ppf((1 + self.confidence) / 2, max(self.count - 1, 1))
+            columns[(name, 'mean')] = mean
+            columns[(name, 'std')] = std
+            columns[(name, 'ci_low')] = mean - half_width
+            columns[(name, 'ci_high')] = mean + half_width
+            bands = np.quantile(np.vstack(self._values[name]), self.quantiles, axis=0)
+            for q, band in zip(self.quantiles, bands):
+                columns[(name, f"q{round(q * 100):02d}")] = band
+        df = pd.DataFrame(columns)
+        df.index = pd.RangeIndex(1, len(df) + 1, name='Step')
+        return df
+
+    def replicates(self, name):
+        """All replicate values of one metric, as a (replicates x steps) array."""
+        return np.vstack(self._values[name])
+
+
+class BatchResult:
+    """
+    Outcome of a batch run.
+
+    Attributes:
+        aggregator: SeriesAggregator over the completed replicates.
+        seeds: Mapping of replicate index to its seed.
+        completed: Indices of the replicates that finished.
+        failures: Mapping of replicate index to the last error, for replicates
+            that failed on every attempt.
+    """
+    def __init__(self, aggregator, seeds):
+        self.aggregator = aggregator
+        self.seeds = seeds
+        self.completed = []
+        self.failures = {}
+
+    def summary(self):
+        return self.aggregator.summary()
+
+
+class BatchRunner:
+    """
+    Runs seeded MigrationModel replicates in parallel and aggregates their
+    model-level series as they complete.
+
+    Replicate seeds are spawned from one base seed with numpy's SeedSequence, so a
+    batch is reproducible and replicates are statistically independent. A
+    replicate that raises is resubmitted up to `max_retries` times. If a worker
+    process dies and breaks the pool, the replicates that finished before it
+    broke are kept, only those lost with the pool are charged an attempt, and
+    they are resubmitted to a fresh pool; completed replicates are never rerun.
+
+    Args:
+        model_params: Keyword arguments for MigrationModel (without `seed`).
+        steps: Number of steps per replicate.
+        n_replicates: Number of replicates.
+        seed: Base seed from which replicate seeds are spawned.
+        max_workers: Worker processes; defaults to the number of CPUs.
+        max_retries: Extra attempts per replicate after a failure.
+        quantiles: Quantiles reported by the aggregator.
+        confidence: Confidence level of the interval around the mean.
+        run_fn: Picklable function (model_params, seed, steps) -> series dict run
+            in the workers; defaults to run_replicate.
+    """
+    def __init__(self, model_params, steps, n_replicates, seed=0, max_workers=None, max_retries=2,
+                 quantiles=(0.05, 0.5, 0.95), confidence=0.95, run_fn=run_replicate):
+        self.model_params = dict(model_params)
+        self.steps = steps
+        self.n_replicates = n_replicates
+        self.max_workers = max_workers or os.cpu_count()
+        self.max_retries = max_retries
+        self.quantiles = quantiles
+        self.confidence = confidence
+        self.run_fn = run_fn
+        children = np.random.SeedSequence(seed).spawn(n_replicates)
+        self.seeds = [int(child.generate_state(1)[0]) for child in children]
+
+    def run(self, callback=None):
+        """
+        Run every replicate.
+
+        Args:
+            callback: Optional function called as callback(index, series) in the
+                parent process as each replicate completes.
+
+        Returns:
+            A BatchResult.
+        """
+        result = BatchResult(SeriesAggregator(self.quantiles, self.confidence), dict(enumerate(self.seeds)))
+        for index, series in self.iter_results(result.failures):
+            result.aggregator.add(series)
+            result.completed.append(index)
+            if callback is not None:
+                callback(index, series)
+        return result
+
+    def iter_results(self, failures=None):
+        """
+        Yield (replicate index, series) pairs in completion order.
+
+        Args:
+            failures: Optional dict that receives the last error of each replicate
+                that exhausted its retries.
+        """
+        failures = {} if failures is None else failures
+        attempts = dict.fromkeys(range(self.n_replicates), 0)
+        pending = list(range(self.n_replicates))
+        while pending:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {self._submit(executor, index): index for index in pending}
+                pending = []
+                broken = False
+                while futures:
+                    # Once the pool is broken, settle every future: those that finished first keep their results
+                    done, _ = wait(futures, return_when=ALL_COMPLETED if broken else FIRST_COMPLETED)
+                    for future in done:
+                        index = futures.pop(future)
+                        error = future.exception()
+                        if error is None:
+                            yield index, future.result()
+                            continue
+                        broken |= isinstance(error, BrokenProcessPool)
+                        if not self._retry(index, error, attempts, failures, pending) or broken:
+                            continue
+                        try:
+                            futures[self._submit(executor, index)] = index
+                        except BrokenProcessPool:
+                            broken = True
+                        else:
+                            pending.remove(index)
+
+    def _submit(self, executor, index):
+        return executor.submit(self.run_fn, self.model_params, self.seeds[index], self.steps)
+
+    def _retry(self, index, error, attempts, failures, pending):
+        """Queue a failed replicate for another attempt, or record it as failed."""
+        attempts[index] += 1
+        if attempts[index] > self.max_retries:
+            failures[index] = repr(error)
+            return False
+        pending.append(index)
+        return True
@@ -0,0 +1,281 @@
+import copyreg
+import gc
+import io
+import os
+import pickle
+import shutil
+import weakref
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+from mesa.agent import AgentSet
+
+FORMAT_VERSION = 2
+_MAGIC = b'MIGCKPT'
+# Python types stored as typed NumPy columns; other attributes stay pickled lists
+_COLUMN_TYPES = (bool, int, float)
+# A column of strings as integer codes into its distinct labels
+_Labels = namedtuple('_Labels', ['codes', 'labels'])
+
+
+class Checkpoint:
+    """
+    A serialized snapshot of a complete MigrationModel.
+
+    The snapshot covers everything a run depends on: every agent (and the state
+    store behind them), `agent_id_map`, the job market, the scheduler's
+    registries and step counters, the resident index, metrics, the model and
+    array-engine RNG states, and the data collected so far. Restoring it gives a
+    model that continues bit-identically to the original. A checkpoint can be
+    restored any number of times, so several scenarios can be forked from one
+    point of a run.
+
+    Individuals and firms are not pickled one object at a time: their attributes
+    are stored as one column per attribute (typed NumPy arrays where every
+    value has the same scalar type), and every reference to them elsewhere in
+    the model is pickled as its (group, row) position. Restoring creates the
+    agents in bulk and fills them from the columns, without running their
+    constructors or re-registering them.
+
+    Args:
+        payload: The serialized snapshot.
+        step: The model step at which the snapshot was taken.
+
+    Attributes:
+        payload: The serialized snapshot.
+        step: The model step at which the snapshot was taken.
+    """
+    def __init__(self, payload, step):
+        self.payload = payload
+        self.step = step
+
+    @classmethod
+    def capture(cls, model):
+        """
+        Snapshot `model` in memory. The model is left untouched: output a
+        streaming model has buffered but not yet written is part of the snapshot.
+        """
+        with _gc_paused():
+            groups = _agent_groups(model)
+            positions = {id(agent): (g, row) for g, (_, agents) in enumerate(groups)
+                         for row, agent in enumerate(agents)}
+            columns = [_agent_columns(model, agents) for _, agents in groups]
+            buffer = io.BytesIO()
+            pickle.dump([(agent_class, len(agents)) for agent_class, agents in groups], buffer,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            _ModelPickler(buffer, positions, {agent_class for agent_class, _ in groups}).dump((columns, model))
+        return cls(buffer.getvalue(), model.schedule.steps)
+
+    def restore(self, output_dir=None):
+        """
+        Build an independent model from the snapshot.
+
+        Args:
+            output_dir: For models that stream their output, the directory the
+                restored run writes its shards to. The shards written up to the
+                snapshot are copied over, so the new directory holds the complete
+                history of the fork. Required for such models, and must differ
+                from the original directory, whose manifest the fork would
+                otherwise overwrite.
+
+        Returns:
+            A MigrationModel in the captured state.
+
+        Raises:
+            ValueError: If the model streams its output and `output_dir` is
+                missing or is the original directory.
+        """
+        with _gc_paused():
+            buffer = io.BytesIO(self.payload)
+            shells = [[agent_class.__new__(agent_class) for _ in range(n)]
+                      for agent_class, n in pickle.load(buffer)]
+            columns, model = _ModelUnpickler(buffer, shells).load()
+            for agents, (names, values) in zip(shells, columns):
+                values = [_column_values(column, model) for column in values]
+                for agent, row in zip(agents, zip(*values)):
+                    agent.__dict__.update(zip(names, row))
+
+        sink = model.datacollector.sink
+        if sink is not None:
+            if output_dir is None or os.path.abspath(output_dir) == os.path.abspath(sink.directory):
+                raise ValueError("Restoring a streaming model needs an output_dir other than "
+                                 f"its original directory {sink.directory!r}")
+            os.makedirs(output_dir, exist_ok=True)
+            for shard in sink.shards:
+                shutil.copy2(os.path.join(sink.directory, shard['file']), os.path.join(output_dir, shard['file']))
+            sink.directory = output_dir
+            sink._write_manifest()
+        return model
+
+    def save(self, path, compress=True):
+        """
+        Write the checkpoint to `path`, replacing any existing file atomically.
+
+        Args:
+            path: Destination file.
+            compress: If True, zlib-compress the payload.
+        """
+        payload = zlib.compress(self.payload, 1) if compress else self.payload
+        header = _MAGIC + bytes([FORMAT_VERSION, int(compress)]) + self.step.to_bytes(8, 'little')
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a checkpoint written by `save`.
+
+        Raises:
+            ValueError: If the file is not a checkpoint or has an unsupported version.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(_MAGIC):
+            raise ValueError(f"{path} is not a model checkpoint")
+        offset = len(_MAGIC)
+        version, compressed = data[offset], data[offset + 1]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {version}; expected {FORMAT_VERSION}")
+        step = int.from_bytes(data[offset + 2:offset + 10], 'little')
+        payload = data[offset + 10:]
+        return cls(zlib.decompress(payload) if compressed else payload, step)
+
+
+class _ModelPickler(pickle.Pickler):
+    """Pickles columnar agents as their (group, row) position, and AgentSets in bulk."""
+    def __init__(self, file, positions, agent_classes):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.positions = positions
+        self.dispatch_table = copyreg.dispatch_table.copy()
+        for agent_class in agent_classes:
+            self.dispatch_table[agent_class] = self._reduce_agent
+        self.dispatch_table[AgentSet] = _reduce_agent_set
+
+    def _reduce_agent(self, agent):
+        position = self.positions.get(id(agent))
+        if position is None:
+            return agent.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+        return _agent_shell, position
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    """Resolves (group, row) positions to the agent objects being restored."""
+    def __init__(self, file, shells):
+        super().__init__(file)
+        self.shells = shells
+
+    def find_class(self, module, name):
+        if module == __name__ and name == _agent_shell.__name__:
+            return self._shell
+        return super().find_class(module, name)
+
+    def _shell(self, group, row):
+        return self.shells[group][row]
+
+
+def _agent_shell(group, row):
+    """Placeholder for the agent at (group, row); resolved by _ModelUnpickler."""
+    raise RuntimeError("Columnar agents can only be unpickled by Checkpoint.restore")
+
+
+def _reduce_agent_set(agent_set):
+    return _agent_set, (agent_set.model, list(agent_set._agents.keys()))
+
+
+def _agent_set(model, agents):
+    """
+    Rebuild an AgentSet. Its weak-key dictionary is filled directly, as
+    WeakKeyDictionary.update adds keys one Python call at a time.
+    """
+    agent_set = AgentSet.__new__(AgentSet)
+    agent_set.model = model
+    agent_set._agents = weakref.WeakKeyDictionary()
+    remove = agent_set._agents._remove
+    agent_set._agents.data = {weakref.ref(agent, remove): None for agent in agents}
+    return agent_set
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Suspend cyclic garbage collection. Building or serializing every agent at
+    once allocates many objects, and none of them are garbage yet.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _agent_groups(model):
+    """
+    The individuals and firms stored as columns, as (class, agents) groups of
+    agents with the same class and attribute names.
+    """
+    groups = {}
+    for registry in (model.individuals, model.firms):
+        for agent in registry.items:
+            groups.setdefault((type(agent), tuple(agent.__dict__)), []).append(agent)
+    return [(agent_class, agents) for (agent_class, _), agents in groups.items()]
+
+
+def _agent_columns(model, agents):
+    """The (names, columns) of a group's attributes; the model reference is not stored."""
+    names = tuple(agents[0].__dict__)
+    columns = []
+    for name in names:
+        values = [agent.__dict__[name] for agent in agents]
+        if name == 'model' and all(value is model for value in values):
+            columns.append(None)
+        else:
+            columns.append(_column(values))
+    return names, columns
+
+
+def _column(values):
+    """
+    A typed array of `values` if they all have one scalar type, _Labels if they
+    are all strings, else the list itself.
+    """
+    kinds = set(map(type, values))
+    kind = kinds.pop() if len(kinds) == 1 else None
+    if kind is str:
+        codes, labels = pd.factorize(np.array(values, dtype=object))
+        return _Labels(codes, labels)
+    if kind in _COLUMN_TYPES:
+        try:
+            return np.array(values)
+        except OverflowError:
+            pass
+    return values
+
+
+def _column_values(column, model):
+    """The Python values of a stored column (None stands for `model`)."""
+    if column is None:
+        return repeat(model)
+    if isinstance(column, _Labels):
+        return column.labels[column.codes].tolist()
+    if isinstance(column, np.ndarray):
+        return column.tolist()
+    return column
+
+
+def save_checkpoint(model, path, compress=True):
+    """Write a checkpoint of `model` to `path`."""
+    Checkpoint.capture(model).save(path, compress=compress)
+
+
+def load_checkpoint(path, output_dir=None):
+    """Restore a model from the checkpoint at `path` (see Checkpoint.restore)."""
+    return Checkpoint.load(path).restore(output_dir=output_dir)
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+from .output import ShardedOutput
+
+
+class _Buffer:
+    """A growable typed array with one entry (or row) per collection."""
+    def __init__(self, dtype, width=None, capacity=16):
+        self.dtype = np.dtype(dtype)
+        shape = (capacity,) if width is None else (capacity, width)
+        self.data = np.zeros(shape, dtype=self.dtype)
+        self.size = 0
+
+    def append(self, values):
+        if self.size == len(self.data):
+            grown = np.zeros((2 * len(self.data),) + self.data.shape[1:], dtype=self.dtype)
+            grown[:self.size] = self.data
+            self.data = grown
+        self.data[self.size] = values
+        self.size += 1
+
+    def values(self):
+        return self.data[:self.size]
+
+    def __getstate__(self):
+        # Pickle only the filled entries; spare capacity is reallocated on append
+        return {'dtype': self.dtype, 'data': self.values().copy(), 'size': self.size}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if not len(self.data):
+            self.data = np.zeros((1,) + self.data.shape[1:], dtype=self.dtype)
+
+
+class _AgentPanel:
+    """
+    The agents of one type whose data is recorded, and one buffer per reporter.
+
+    Attribute reporters on state-store-backed agents are read straight from the
+    store's columns; other reporters are evaluated per agent.
+    """
+    def __init__(self, agents, reporters, capacity):
+        self.agents = agents
+        self.ids = np.array([agent.unique_id for agent in agents], dtype=object)
+        self.reporters = reporters
+        self.capacity = capacity
+        self.steps = _Buffer(np.int64, capacity=capacity)
+        self.buffers = {}
+        self.categories = {}
+        table = getattr(agents[0], '_table', None) if agents else None
+        if table is not None and any(getattr(agent, '_table', None) is not table for agent in agents):
+            table = None
+        self.table = table
+        self.rows = np.array([agent._row for agent in agents], dtype=np.int64) if table is not None else None
+
+    def read(self):
+        """The current value of every reporter, as one array per column."""
+        columns = {}
+        for name, reporter in self.reporters.items():
+            attribute, dtype = reporter if isinstance(reporter, tuple) else (reporter, None)
+            values = self._read(name, attribute)
+            columns[name] = values if dtype is None else values.astype(dtype)
+        return columns
+
+    def labels(self):
+        """Category labels of the columns holding category codes."""
+        return {name: list(categories.labels) for name, categories in self.categories.items()}
+
+    def collect(self, step):
+        self.steps.append(step)
+        for name, values in self.read().items():
+            if name not in self.buffers:
+                self.buffers[name] = _Buffer(values.dtype, width=len(self.agents), capacity=self.capacity)
+            self.buffers[name].append(values)
+
+    def dataframe(self):
+        n_agents = len(self.agents)
+        steps = self.steps.values()
+        index = pd.MultiIndex.from_arrays(
+            [np.repeat(steps, n_agents), np.tile(self.ids, len(steps))], names=['Step', 'AgentID'])
+        columns = {}
+        for name, buffer in self.buffers.items():
+            values = buffer.values().reshape(-1)
+            categories = self.categories.get(name)
+            if categories is not None:
+                values = categories.decode(values)
+            columns[name] = values
+        return pd.DataFrame(columns, index=index)
+
+    def _read(self, name, attribute):
+        if isinstance(attribute, str):
+            if self.table is not None and attribute in self.table.schema:
+                if self.table.schema[attribute] == 'category':
+                    self.categories[name] = self.table.categories[attribute]
+                return self.table.column(attribute)[self.rows]
+            values = [getattr(agent, attribute, None) for agent in self.agents]
+        else:
+            values = [attribute(agent) for agent in self.agents]
+        return np.asarray(values, dtype=object if any(isinstance(v, str) or v is None for v in values) else None)
+
+
+class ColumnarDataCollector:
+    """
+    A data collector that writes into preallocated typed NumPy buffers.
+
+    Model reporters are called once per collection, as in mesa.DataCollector.
+    Agent reporters are registered per agent type, so each type only records the
+    variables it has, and agent-level data can be thinned out in time (every k
+    collections) or restricted to a random panel of agents. DataFrames are built
+    on request in the same layout mesa.DataCollector produces.
+
+    Args:
+        model_reporters: Mapping of column name to a callable taking the model.
+        agent_reporters: Mapping of agent type to a mapping of column name to a
+            reporter. A reporter is an attribute name, an (attribute name, dtype)
+            pair, or a callable taking the agent. Attribute reporters on
+            state-store-backed agents are read directly from the store's columns.
+        agent_every: Record agent-level data on every k-th collection.
+        panel_size: If given, record agent-level data only for a random panel of
+            this many agents per type, drawn at the first collection.
+        capacity: Number of collections to preallocate; buffers grow as needed.
+        sink: Optional StreamingSink. If given, records are streamed to disk
+            instead of being buffered in memory, and the DataFrame accessors read
+            them back from the sink's directory.
+
+    Note:
+        The recorded agents of each type are fixed at the first agent-level
+        collection; agents added later are not recorded.
+    """
+    def __init__(self, model_reporters=None, agent_reporters=None, agent_every=1, panel_size=None,
+                 capacity=16, sink=None):
+        self.model_reporters = dict(model_reporters or {})
+        self.agent_reporters = dict(agent_reporters or {})
+        self.agent_every = agent_every
+        self.panel_size = panel_size
+        self.capacity = capacity
+        self.sink = sink
+        self.collections = 0
+        self._model_vars = {}
+        self._panels = {}
+
+    def collect(self, model, step=None):
+        """
+        Collect all the data for the given model object.
+
+        Args:
+            model: The model to read.
+            step: Step recorded with agent-level and streamed rows; defaults to
+                `model._steps` (Mesa's step counter).
+        """
+        step = model._steps if step is None else step
+        if self.sink is not None:
+            self._stream(model, step)
+            return
+        for name, reporter in self.model_reporters.items():
+            value = reporter(model)
+            if name not in self._model_vars:
+                dtype = np.asarray(value).dtype
+                self._model_vars[name] = _Buffer(object if dtype.kind in 'OU' else dtype, capacity=self.capacity)
+            self._model_vars[name].append(value)
+        if self.agent_reporters and self.collections % self.agent_every == 0:
+            for agent_type, reporters in self.agent_reporters.items():
+                if agent_type not in self._panels:
+                    self._panels[agent_type] = _AgentPanel(self._select(model, agent_type), reporters, self.capacity)
+                self._panels[agent_type].collect(step)
+        self.collections += 1
+
+    def close(self):
+        """Flush records still buffered in the sink, if any."""
+        if self.sink is not None:
+            self.sink.close()
+
+    def output(self):
+        """A ShardedOutput reader over everything streamed so far."""
+        self.close()
+        return ShardedOutput(self.sink.directory)
+
+    def get_model_vars_dataframe(self):
+        """A DataFrame with one row per collection and one column per model reporter."""
+        if self.sink is not None:
+            return self.output().get_model_vars_dataframe()
+        return pd.DataFrame({name: buffer.values() for name, buffer in self._model_vars.items()})
+
+    def get_agent_vars_dataframe(self, agent_type=None):
+        """
+        A DataFrame of agent-level data indexed by (Step, AgentID).
+
+        Args:
+            agent_type: Restrict to one registered agent type. By default all types
+                are combined, with NaN where a type has no such reporter.
+        """
+        if self.sink is not None:
+            output = self.output()
+            agent_types = [agent_type] if agent_type is not None else output.agent_types()
+            frames = [output.get_agent_vars_dataframe(t) for t in agent_types]
+        elif agent_type is not None:
+            return self._panels[agent_type].dataframe()
+        else:
+            frames = [panel.dataframe() for panel in self._panels.values()]
+        if not frames:
+            return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['Step', 'AgentID']))
+        return pd.concat(frames).sort_index(level='Step', sort_remaining=False)
+
+    def _stream(self, model, step):
+        """Hand one collection to the sink without buffering it in memory."""
+        self.sink.write_model(step, {name: reporter(model) for name, reporter in self.model_reporters.items()})
+        if self.agent_reporters and self.collections % self.agent_every == 0:
+            for agent_type, reporters in self.agent_reporters.items():
+                if agent_type not in self._panels:
+                    self._panels[agent_type] = _AgentPanel(self._select(model, agent_type), reporters, self.capacity)
+                panel = self._panels[agent_type]
+                columns = panel.read()
+                self.sink.write_agents(agent_type.__name__, step, panel.ids, columns, panel.labels())
+        self.sink.end_step()
+        self.collections += 1
+
+    def _select(self, model, agent_type):
+        agents = list(model.schedule.registry(agent_type))
+        if self.panel_size is not None and self.panel_size < len(agents):
+            agents = model.random.sample(agents, k=self.panel_size)
+        return agents
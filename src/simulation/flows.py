@@ -0,0 +1,121 @@
+import numpy as np
+from scipy import sparse
+
+
+class MigrationFlows:
+    """
+    Origin-destination migration flows between regions, recorded as moves happen.
+
+    Each move appends its (origin, destination) region indices to the current
+    step's buffer and bumps per-region in/out counters, so recording is O(1).
+    `end_step` folds the buffer into a sparse regions x regions matrix for the
+    step and adds it to the cumulative matrix. Entry [i, j] counts moves from
+    region i to region j.
+
+    Args:
+        region_ids: Region ids, in matrix order.
+
+    Attributes:
+        ids: Region ids, in matrix order.
+        index: Mapping of region id to matrix index.
+        step_matrix: CSR matrix of the last completed step's moves.
+        cumulative: CSR matrix of every move recorded so far.
+        arrivals: Moves into each region during the current step so far.
+        departures: Moves out of each region during the current step so far.
+    """
+    def __init__(self, region_ids):
+        self.ids = list(region_ids)
+        self.index = {msa: i for i, msa in enumerate(self.ids)}
+        n = len(self.ids)
+        self.step_matrix = sparse.csr_matrix((n, n), dtype=np.int64)
+        self.cumulative = sparse.csr_matrix((n, n), dtype=np.int64)
+        self.arrivals = np.zeros(n, dtype=np.int64)
+        self.departures = np.zeros(n, dtype=np.int64)
+        self._origins = []
+        self._destinations = []
+
+    def record(self, origin, destination):
+        """Record one move between two region ids."""
+        i = self.index[origin]
+        j = self.index[destination]
+        self._origins.append(i)
+        self._destinations.append(j)
+        self.departures[i] += 1
+        self.arrivals[j] += 1
+
+    def record_many(self, origins, destinations):
+        """Record moves given as aligned arrays of origin and destination region indices."""
+        origins = np.asarray(origins, dtype=np.int64)
+        destinations = np.asarray(destinations, dtype=np.int64)
+        self._origins.extend(origins.tolist())
+        self._destinations.extend(destinations.tolist())
+        np.add.at(self.departures, origins, 1)
+        np.add.at(self.arrivals, destinations, 1)
+
+    def end_step(self):
+        """Close the current step: build its flow matrix and add it to the cumulative one."""
+        n = len(self.ids)
+        self.step_matrix = sparse.coo_matrix(
+            (np.ones(len(self._origins), dtype=np.int64), (self._origins, self._destinations)), shape=(n, n)
+        ).tocsr()
+        if self.step_matrix.nnz:
+            self.cumulative = self.cumulative + self.step_matrix
+        self._origins = []
+        self._destinations = []
+        self.arrivals[:] = 0
+        self.departures[:] = 0
+
+    def matrix(self, cumulative=False):
+        """The cumulative flow matrix, or that of the last completed step."""
+        return self.cumulative if cumulative else self.step_matrix
+
+    def inflows(self, cumulative=False):
+        """Moves into each region, as an array in matrix order."""
+        return np.asarray(self.matrix(cumulative).sum(axis=0)).ravel()
+
+    def outflows(self, cumulative=False):
+        """Moves out of each region, as an array in matrix order."""
+        return np.asarray(self.matrix(cumulative).sum(axis=1)).ravel()
+
+    def net_migration(self, cumulative=False):
+        """Mapping of region id to inflow minus outflow."""
+        return dict(zip(self.ids, (self.inflows(cumulative) - self.outflows(cumulative)).tolist()))
+
+    def top_corridors(self, n=10, cumulative=True):
+        """
+        The busiest origin-destination pairs.
+
+        Returns:
+            Up to `n` (origin id, destination id, moves) tuples, busiest first.
+        """
+        coo = self.matrix(cumulative).tocoo()
+        order = np.lexsort((coo.col, coo.row, -coo.data))[:n]
+        return [(self.ids[coo.row[k]], self.ids[coo.col[k]], int(coo.data[k])) for k in order]
+
+    def hubs(self, n=5, cumulative=True):
+        """
+        Regions that connect the most others: ranked by the number of distinct
+        regions they exchange migrants with (in either direction), then by gross
+        flow (in plus out).
+
+        Returns:
+            Up to `n` (region id, partner count, gross flow) tuples.
+        """
+        matrix = self.matrix(cumulative)
+        links = (matrix + matrix.T).tocsr()
+        links.setdiag(0)
+        links.eliminate_zeros()
+        partners = np.diff(links.indptr)
+        gross = self.inflows(cumulative) + self.outflows(cumulative)
+        order = np.lexsort((np.arange(len(self.ids)), -gross, -partners))[:n]
+        return [(self.ids[i], int(partners[i]), int(gross[i])) for i in order if gross[i]]
+
+    def migration_rates(self, msa, residents):
+        """
+        The current step's (in-migration, out-migration) rates of a region so far,
+        as moves per resident; (0.0, 0.0) without residents.
+        """
+        if not residents:
+            return 0.0, 0.0
+        i = self.index[msa]
+        return float(self.arrivals[i] / residents), float(self.departures[i] / residents)
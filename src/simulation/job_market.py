@@ -1,4 +1,176 @@
-from collections import namedtuple
+from collections import deque, namedtuple
+
+from ..utils.indexed_set import IndexedSet
 
 # A simple data structure to represent a job vacancy
 JobVacancy = namedtuple('JobVacancy', ['firm_id', 'soc_code', 'msa'])
+
+
+class JobMarket:
+    """
+    The model's central job board.
+
+    Open vacancies are indexed by (soc_code, msa) and by soc_code alone, so a
+    searching worker can draw a matching vacancy and remove it in O(1) instead of
+    scanning every posting. Each posting gets an integer id, which keeps duplicate
+    postings (same firm, occupation and MSA) distinct.
+
+    Attributes:
+        vacancy_lifetime: Number of steps a vacancy stays open before `rollover`
+            expires it. The default of 1 clears the board at the start of every step.
+        occupations: Optional OccupationIndex. When set, `find` falls back to
+            vacancies in similar occupations.
+        step: The job market's step counter, advanced by `rollover`.
+        posted: Total vacancies posted since creation.
+        filled: Total vacancies taken by workers since creation.
+    """
+    def __init__(self, vacancy_lifetime=1, occupations=None):
+        self.vacancy_lifetime = vacancy_lifetime
+        self.occupations = occupations
+        self.step = 0
+        self.posted = 0
+        self.filled = 0
+        self._next_id = 0
+        self._vacancies = {}
+        self._by_soc_msa = {}
+        self._by_soc = {}
+        # (step, [vacancy ids]) buckets in posting order, used for expiry
+        self._postings = deque()
+
+    def post(self, vacancy):
+        """
+        Add a vacancy to the board.
+
+        Args:
+            vacancy: A JobVacancy.
+
+        Returns:
+            The id assigned to the posting.
+        """
+        vacancy_id = self._next_id
+        self._next_id += 1
+        self._vacancies[vacancy_id] = vacancy
+        self._index(self._by_soc_msa, (vacancy.soc_code, vacancy.msa)).add(vacancy_id)
+        self._index(self._by_soc, vacancy.soc_code).add(vacancy_id)
+        if not self._postings or self._postings[-1][0] != self.step:
+            self._postings.append((self.step, []))
+        self._postings[-1][1].append(vacancy_id)
+        self.posted += 1
+        return vacancy_id
+
+    def remove(self, vacancy_id):
+        """Remove a posting by id and return its JobVacancy (KeyError if not open)."""
+        vacancy = self._vacancies.pop(vacancy_id)
+        self._unindex(self._by_soc_msa, (vacancy.soc_code, vacancy.msa), vacancy_id)
+        self._unindex(self._by_soc, vacancy.soc_code, vacancy_id)
+        return vacancy
+
+    def take(self, vacancy_id):
+        """Remove a posting because a worker accepted it, counting it as filled."""
+        vacancy = self.remove(vacancy_id)
+        self.filled += 1
+        return vacancy
+
+    def draw(self, rng, soc_code, msa=None):
+        """
+        Draw a uniformly random open vacancy for an occupation without removing it.
+
+        Args:
+            rng: A random.Random-like generator providing `choice`.
+            soc_code: The occupation to match.
+            msa: If given, only vacancies located in this MSA are considered.
+
+        Returns:
+            A vacancy id, or None if nothing matches.
+        """
+        if msa is None:
+            candidates = self._by_soc.get(soc_code)
+        else:
+            candidates = self._by_soc_msa.get((soc_code, msa))
+        if not candidates:
+            return None
+        return candidates.choice(rng)
+
+    def find(self, rng, soc_code, msa):
+        """
+        Draw a matching vacancy in `msa`, broadening to any MSA if there is none.
+
+        With an occupation index, a searcher without an exact match tries each
+        similar occupation in turn, most similar first, again preferring `msa`.
+        """
+        vacancy_id = self.draw(rng, soc_code, msa)
+        if vacancy_id is None:
+            vacancy_id = self.draw(rng, soc_code)
+        if vacancy_id is None and self.occupations is not None:
+            for neighbor, _ in self.occupations.neighbors(soc_code):
+                if neighbor not in self._by_soc:
+                    continue
+                vacancy_id = self.draw(rng, neighbor, msa)
+                if vacancy_id is None:
+                    vacancy_id = self.draw(rng, neighbor)
+                return vacancy_id
+        return vacancy_id
+
+    def count(self, soc_code=None, msa=None):
+        """Number of open vacancies, optionally restricted to an occupation and MSA."""
+        if soc_code is None:
+            if msa is None:
+                return len(self._vacancies)
+            return sum(1 for v in self._vacancies.values() if v.msa == msa)
+        if msa is None:
+            return len(self._by_soc.get(soc_code, ()))
+        return len(self._by_soc_msa.get((soc_code, msa), ()))
+
+    def most_demanded(self):
+        """The occupation with the most open vacancies (the earliest posted on ties), or None."""
+        return max(self._by_soc, key=lambda soc_code: len(self._by_soc[soc_code]), default=None)
+
+    def rollover(self):
+        """
+        Advance the job market by one step and expire postings that have been
+        open for `vacancy_lifetime` steps.
+        """
+        self.step += 1
+        cutoff = self.step - self.vacancy_lifetime
+        while self._postings and self._postings[0][0] <= cutoff:
+            _, vacancy_ids = self._postings.popleft()
+            for vacancy_id in vacancy_ids:
+                if vacancy_id in self._vacancies:
+                    self.remove(vacancy_id)
+
+    def clear(self):
+        """Remove every open vacancy."""
+        self._vacancies.clear()
+        self._by_soc_msa.clear()
+        self._by_soc.clear()
+        self._postings.clear()
+
+    def items(self):
+        """Iterate over (vacancy_id, JobVacancy) pairs of open postings."""
+        return iter(list(self._vacancies.items()))
+
+    def __getitem__(self, vacancy_id):
+        return self._vacancies[vacancy_id]
+
+    def __contains__(self, vacancy_id):
+        return vacancy_id in self._vacancies
+
+    def __len__(self):
+        return len(self._vacancies)
+
+    def __iter__(self):
+        return iter(list(self._vacancies.values()))
+
+    @staticmethod
+    def _index(index, key):
+        bucket = index.get(key)
+        if bucket is None:
+            bucket = index[key] = IndexedSet()
+        return bucket
+
+    @staticmethod
+    def _unindex(index, key, vacancy_id):
+        bucket = index[key]
+        bucket.remove(vacancy_id)
+        if not bucket:
+            del index[key]
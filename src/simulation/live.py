@@ -0,0 +1,237 @@
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Model-level metrics included in every snapshot
+SNAPSHOT_METRICS = ('Employed', 'UnemploymentRate', 'Hires', 'Layoffs', 'Movers',
+                    'VacanciesPosted', 'VacanciesFilled')
+
+_DASHBOARD = b"""<!doctype html>
+<title>Migration model</title>
+<pre id="latest">waiting for the first step...</pre>
+<script>
+new EventSource('/events').onmessage = function (event) {
+  document.getElementById('latest').textContent = JSON.stringify(JSON.parse(event.data), null, 1);
+};
+</script>
+"""
+
+
+def step_snapshot(model):
+    """
+    The step-level aggregates published for monitoring: the step number, the
+    SNAPSHOT_METRICS and each MSA's unemployment rate.
+    """
+    snapshot = {'Step': int(model.schedule.steps)}
+    for name in SNAPSHOT_METRICS:
+        snapshot[name] = float(model.metrics[name])
+    rates = {}
+    for region in model.regions:
+        rate = model.residents.unemployment_rate(region.unique_id)
+        if rate is not None:
+            rates[str(region.unique_id)] = float(rate)
+    snapshot['UnemploymentByMSA'] = rates
+    return snapshot
+
+
+def offer(updates, update):
+    """
+    Put `update` on the bounded queue `updates` without blocking. If the queue
+    is full, the oldest queued update is dropped to make room, so a slow reader
+    always gets the most recent state.
+
+    Returns:
+        False if an older update was dropped, else True.
+    """
+    try:
+        updates.put_nowait(update)
+        return True
+    except queue.Full:
+        pass
+    try:
+        updates.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        updates.put_nowait(update)
+    except queue.Full:
+        pass
+    return False
+
+
+class MetricsPublisher:
+    """
+    Serves live step snapshots of a running model over HTTP.
+
+    The simulation loop hands snapshots to `publish`, which never blocks: they
+    go through a bounded queue, and under backpressure the oldest queued
+    snapshot is dropped (see `offer`). A background thread forwards each
+    snapshot to every connected client, each with its own small bounded
+    buffer, so a slow client only misses intermediate updates and never slows
+    the simulation or the other clients.
+
+    Endpoints:
+        /events: Server-sent events stream; each event's data is one snapshot
+            as JSON, with the step number as its id. New clients first get
+            the latest snapshot.
+        /latest: The latest snapshot as JSON (204 before the first one).
+        /: A minimal page showing the stream.
+
+    Args:
+        host: Interface to listen on.
+        port: Port to listen on; 0 picks a free one (see `port`).
+        maxsize: Capacity of the publish queue.
+        client_buffer: Capacity of each client's queue.
+
+    Attributes:
+        published: Number of snapshots handed to `publish`.
+        dropped: Number of snapshots dropped from the publish queue.
+
+    Example:
+        with MetricsPublisher(port=8765) as publisher:
+            for _ in range(steps):
+                model.step()
+                publisher.publish(step_snapshot(model))
+    """
+    def __init__(self, host='127.0.0.1', port=0, maxsize=8, client_buffer=4):
+        self.client_buffer = client_buffer
+        self.published = 0
+        self.dropped = 0
+        self._updates = queue.Queue(maxsize=maxsize)
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._closed = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.publisher = self
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True),
+            threading.Thread(target=self._forward, name='metrics-publisher', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def port(self):
+        """The port the server listens on."""
+        return self._server.server_address[1]
+
+    @property
+    def url(self):
+        """Base URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def latest(self):
+        """The most recently forwarded snapshot, or None."""
+        return self._latest[0] if self._latest is not None else None
+
+    def publish(self, snapshot):
+        """Hand a snapshot (a JSON-serialisable dict) to the publisher without blocking."""
+        self.published += 1
+        if not offer(self._updates, snapshot):
+            self.dropped += 1
+
+    def close(self):
+        """Stop the server and the forwarding thread, disconnecting clients."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        offer(self._updates, None)
+        with self._lock:
+            for client in self._clients:
+                offer(client, None)
+        self._server.shutdown()
+        self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _forward(self):
+        """Forwarding thread: move snapshots from the publish queue to the clients."""
+        while True:
+            snapshot = self._updates.get()
+            if snapshot is None:
+                break
+            message = json.dumps(snapshot).encode()
+            self._latest = (snapshot, message)
+            with self._lock:
+                clients = list(self._clients)
+            for client in clients:
+                offer(client, (snapshot.get('Step'), message))
+
+    def _connect(self):
+        client = queue.Queue(maxsize=self.client_buffer)
+        with self._lock:
+            self._clients.add(client)
+            latest = self._latest
+        if latest is not None:
+            offer(client, (latest[0].get('Step'), latest[1]))
+        return client
+
+    def _disconnect(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler of MetricsPublisher's server."""
+    # Seconds between keep-alive comments on an idle event stream
+    KEEPALIVE = 5.0
+
+    def do_GET(self):
+        publisher = self.server.publisher
+        if self.path == '/events':
+            self._stream(publisher)
+        elif self.path == '/latest':
+            latest = publisher._latest
+            if latest is None:
+                self.send_response(204)
+                self.end_headers()
+            else:
+                self._send(200, 'application/json', latest[1])
+        elif self.path == '/':
+            self._send(200, 'text/html; charset=utf-8', _DASHBOARD)
+        else:
+            self.send_error(404)
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, publisher):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        client = publisher._connect()
+        try:
+            while not publisher._closed.is_set():
+                try:
+                    update = client.get(timeout=self.KEEPALIVE)
+                except queue.Empty:
+                    self.wfile.write(b': keep-alive\n\n')
+                else:
+                    if update is None:
+                        break
+                    step, message = update
+                    self.wfile.write(b'id: %d\ndata: %s\n\n' % (step or 0, message))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            publisher._disconnect(client)
+
+    def log_message(self, format, *args):
+        """Keep request logs out of the simulation's output."""
@@ -0,0 +1,102 @@
+from functools import partial
+
+
+class MetricsRegistry:
+    """
+    Model-level metrics backed by counters that are updated where state changes.
+
+    Counters are either stocks (e.g. employed workers), which persist across steps,
+    or per-step flows (e.g. hires), which `begin_step` resets to zero. Derived
+    metrics are computed from other metrics on read. All reads are O(1), so the
+    DataCollector can report them without scanning agents.
+
+    Example:
+        metrics.counter('Retrained', per_step=True)
+        metrics.increment('Retrained')
+        metrics['Retrained']
+    """
+    def __init__(self):
+        self._values = {}
+        self._per_step = []
+        self._derived = {}
+
+    def counter(self, name, initial=0, per_step=False):
+        """
+        Declare a counter-backed metric.
+
+        Args:
+            name: Metric name, also used as the DataCollector column.
+            initial: Starting value.
+            per_step: If True, the counter is reset to zero at the start of each step.
+        """
+        if name in self._values or name in self._derived:
+            raise ValueError(f"Metric {name!r} is already declared")
+        self._values[name] = initial
+        if per_step:
+            self._per_step.append(name)
+
+    def derived(self, name, func):
+        """
+        Declare a metric computed from other metrics.
+
+        Args:
+            name: Metric name.
+            func: Callable taking the registry and returning the metric value. It
+                should only read other metrics so it stays O(1).
+        """
+        if name in self._values or name in self._derived:
+            raise ValueError(f"Metric {name!r} is already declared")
+        self._derived[name] = func
+
+    def increment(self, name, amount=1):
+        self._values[name] += amount
+
+    def set(self, name, value):
+        self._values[name] = value
+
+    @classmethod
+    def combine(cls, registries):
+        """
+        A registry declaring the same metrics as the first of `registries`, with
+        every counter summed across them. Derived metrics are recomputed from the
+        sums, e.g. to report totals over model shards.
+        """
+        first = registries[0]
+        combined = cls()
+        combined._values = {name: sum(r._values[name] for r in registries) for name in first._values}
+        combined._per_step = list(first._per_step)
+        combined._derived = dict(first._derived)
+        return combined
+
+    def begin_step(self):
+        """Reset every per-step counter to zero."""
+        for name in self._per_step:
+            self._values[name] = 0
+
+    def names(self):
+        """All declared metric names, counters first, in declaration order."""
+        return list(self._values) + list(self._derived)
+
+    def reporters(self):
+        """Model reporters for a DataCollector, one per declared metric."""
+        return {name: partial(read_metric, name=name) for name in self.names()}
+
+    def __getitem__(self, name):
+        if name in self._values:
+            return self._values[name]
+        return self._derived[name](self)
+
+    def __contains__(self, name):
+        return name in self._values or name in self._derived
+
+
+def read_metric(model, name):
+    """Model reporter reading one registry metric; bound to a name with functools.partial."""
+    return model.metrics[name]
+
+
+def unemployment_rate(metrics):
+    """Share of individuals that are unemployed."""
+    if not metrics['Individuals']:
+        return 0.0
+    return 1 - metrics['Employed'] / metrics['Individuals']
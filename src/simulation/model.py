@@ -1,98 +1,438 @@
+from collections import namedtuple
+from time import perf_counter
+
 import mesa
+import numpy as np
 from ..agents.individual import IndividualAgent
 from ..agents.firm import FirmAgent
 from ..agents.regional import RegionalAgent
 from ..agents.government import GovernmentAgent
-from ..utils.data_generator import generate_individual_data, generate_firm_data, generate_regional_data
-from .job_market import JobVacancy
+from ..agents.state_store import AgentStateStore, StoredFirmAgent, StoredIndividualAgent
+from ..utils.data_generator import (
+    FIRM_FIELDS, INDIVIDUAL_FIELDS, REGION_FIELDS, generate_firm_columns,
+    generate_individual_columns, generate_regional_columns, iter_rows,
+)
+from ..utils.rng import RandomStreams
+from .array_engine import ArrayEngine
+from .checkpoint import Checkpoint
+from .datacollection import ColumnarDataCollector
+from .flows import MigrationFlows
+from .job_market import JobMarket
+from .metrics import MetricsRegistry, unemployment_rate
+from .output import StreamingSink
+from .policy import PolicyEngine
+from .profiling import PROFILED_EVENTS, StepProfiler
+from .region_scores import RegionScoreTable
+from .residents import ResidentIndex
+from .scheduler import DEFAULT_STAGES, EventScheduler, StagedTypeScheduler
+
+# Generated agent attributes and ids. `regions`, `firms` and `individuals` are
+# column dicts (see data_generator); `employer_ids` is aligned with
+# `individual_ids`; `roster` is a pair of aligned (employee_ids, employer_ids)
+# arrays listing the employees of the firms in `firms`.
+Population = namedtuple('Population', [
+    'regions', 'firms', 'firm_ids', 'individuals', 'individual_ids', 'employer_ids', 'roster',
+])
+
+
+def generate_population(rng, n_individuals, n_firms, n_regions, first_id=1):
+    """
+    Generates regions, firms and individuals with their ids and initial employers.
+
+    Firms get consecutive ids from `first_id`, followed by individuals, and
+    individuals are assigned to firms in a round-robin fashion.
+
+    Args:
+        rng: numpy.random.Generator to draw attributes from.
+        n_individuals: Number of individuals.
+        n_firms: Number of firms.
+        n_regions: Number of regions.
+        first_id: The first agent id to assign.
+
+    Returns:
+        A Population.
+    """
+    regions = generate_regional_columns(n_regions, rng)
+    firms = generate_firm_columns(n_firms, regions['unique_id'], rng)
+    individuals = generate_individual_columns(n_individuals, regions['unique_id'], rng)
+    firm_ids = np.arange(first_id, first_id + n_firms)
+    individual_ids = np.arange(first_id + n_firms, first_id + n_firms + n_individuals)
+    employer_ids = firm_ids[np.arange(n_individuals) % n_firms]
+    return Population(regions, firms, firm_ids, individuals, individual_ids, employer_ids,
+                      (individual_ids, employer_ids))
+
 
 def compute_employed(model):
-    """Helper function to compute the number of employed agents."""
-    return sum([1 for agent in model.schedule.agents if isinstance(agent, IndividualAgent) and agent.is_employed])
+    """Helper function to read the number of employed agents."""
+    return model.metrics['Employed']
 
 class MigrationModel(mesa.Model):
     """
     The main model for the AI-driven economic displacement and migration simulation.
+
+    Args:
+        n_individuals: Number of individual agents.
+        n_firms: Number of firm agents.
+        n_regions: Number of regional (MSA) agents.
+        n_governments: Number of government agents (one federal, the rest state).
+        debug: If True, cross-check the incrementally maintained resident index
+            against a full recount after every step.
+        state_store: If True, keep individual and firm attributes in typed NumPy
+            columns (`self.state`) and create agents as views onto their rows.
+        engine: 'mesa' to step every agent through the scheduler, or 'array' to run
+            each step as batched NumPy kernels over the state store (implies
+            state_store=True).
+        seed: Root seed of every random stream the model uses (population
+            generation, scheduling, per-agent decisions and the array engine);
+            see RandomStreams.
+        stages: Sequence of (agent_type, method_name) stages run each step by the
+            Mesa engine; defaults to firms, then individuals, regions and governments.
+            Ignored by the event scheduler.
+        agent_every: Collect agent-level data every k steps (model-level data is
+            collected every step).
+        agent_panel: If given, collect agent-level data for a random panel of this
+            many individuals instead of all of them.
+        output_dir: If given, stream collected data to shards in this directory
+            instead of keeping it in memory (see StreamingSink).
+        flush_every: Number of steps buffered before each write to `output_dir`.
+        counter_rng: If True, agents' random decisions are counter-based draws
+            keyed by (agent, step, decision), so they do not depend on activation
+            order, and the Mesa and array engines make the same coin flips.
+        population: Optional pre-generated Population to create the agents from,
+            instead of generating one from the model's generation stream.
+        panel: Optional MSAPanel of monthly regional indicators. At the start of
+            each step, every region covered by the panel takes its indicators
+            for month `panel_start + step`.
+        panel_start: Panel month number of step 0.
+        population_cache: Optional PopulationCache. A seeded model then loads its
+            population from the cache, generating and storing it on a miss.
+        region_table: Optional RegionScoreTable used for migration decisions, e.g.
+            with a custom score function or individual-specific utility terms.
+        occupation_index: Optional OccupationIndex; unemployed workers without a
+            vacancy in their own occupation then take one in a similar occupation.
+        profile: If True, time every stage, agent method, engine phase and data
+            collection of each step into `self.profiler` (a StepProfiler).
+        layoff_probabilities: Per-step probability that a firm lays off a worker,
+            by AI adoption stage; defaults to FirmAgent.LAYOFF_PROBABILITIES.
+        vacancy_rate: Per-step probability that a firm posts a vacancy; defaults
+            to FirmAgent.VACANCY_RATE.
+        migration_rate: Per-step probability that an individual evaluates a
+            migration decision; defaults to IndividualAgent.MIGRATION_RATE.
+        scheduler: How the Mesa engine activates agents: 'staged' calls every
+            agent's step each step (StagedTypeScheduler); 'event' only activates
+            agents with an action due, drawing their next action times from
+            geometric distributions (EventScheduler).
+        policies: Sequence of Policy objects (see src.simulation.policy). Each is
+            run every step by the governments of its level; state governments
+            each cover an equal share of the regions.
+        budgets: Mapping of government level to its total policy budget over the
+            run; levels not listed have no limit.
     """
-    def __init__(self, n_individuals, n_firms, n_regions, n_governments):
+    ENGINES = ('mesa', 'array')
+    SCHEDULERS = ('staged', 'event')
+    # Behavioural parameters that can be changed between construction and the
+    # first step, e.g. by a parameter sweep
+    PARAMETERS = ('layoff_probabilities', 'vacancy_rate', 'migration_rate')
+    AGENT_TYPES = (FirmAgent, IndividualAgent, RegionalAgent, GovernmentAgent)
+
+    def __init__(self, n_individuals, n_firms, n_regions, n_governments, debug=False,
+                 state_store=False, engine='mesa', seed=None, stages=DEFAULT_STAGES,
+                 agent_every=1, agent_panel=None, output_dir=None, flush_every=1,
+                 counter_rng=False, population=None, region_table=None,
+                 occupation_index=None, profile=False, layoff_probabilities=None,
+                 vacancy_rate=None, migration_rate=None, scheduler='staged', population_cache=None,
+                 panel=None, panel_start=0, policies=(), budgets=None):
         super().__init__()
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of {self.ENGINES}")
+        if scheduler not in self.SCHEDULERS:
+            raise ValueError(f"Unknown scheduler {scheduler!r}; expected one of {self.SCHEDULERS}")
+        state_store = state_store or engine == 'array'
+        # Seeded stream hierarchy; model.random (scheduling, panels) is one of them
+        self.streams = RandomStreams(seed, counter=counter_rng)
+        self.random = self.streams.random('schedule')
+        self.layoff_probabilities = dict(FirmAgent.LAYOFF_PROBABILITIES if layoff_probabilities is None
+                                         else layoff_probabilities)
+        self.vacancy_rate = FirmAgent.VACANCY_RATE if vacancy_rate is None else vacancy_rate
+        self.migration_rate = IndividualAgent.MIGRATION_RATE if migration_rate is None else migration_rate
         self.num_individuals = n_individuals
         self.num_firms = n_firms
         self.num_regions = n_regions
         self.num_governments = n_governments
-        self.schedule = mesa.time.RandomActivation(self)
-        self.job_board = [] # Central list for job vacancies
+        if scheduler == 'event':
+            self.schedule = EventScheduler(self, agent_types=self.AGENT_TYPES)
+        else:
+            self.schedule = StagedTypeScheduler(self, stages, agent_types=self.AGENT_TYPES)
+        self.job_market = JobMarket(occupations=occupation_index) # Central, indexed job board
         self.agent_id_map = {} # Helper to find agents by ID
+        self.residents = ResidentIndex() # Per-MSA residents and labour aggregates
+        # Region attractiveness scores, rebuilt once per step for migration decisions
+        self.region_table = region_table if region_table is not None else RegionScoreTable()
+        self.debug = debug
+        # Per-step timings of the model's phases; None when profiling is off
+        self.profiler = StepProfiler() if profile else None
+        # Optional columnar agent state; None when agents keep plain attributes
+        self.state = AgentStateStore(n_individuals, n_firms) if state_store else None
+        self._individual_class = StoredIndividualAgent if state_store else IndividualAgent
+        self._firm_class = StoredFirmAgent if state_store else FirmAgent
+        self.metrics = MetricsRegistry() # Counter-backed model-level metrics
+        self._declare_metrics()
 
         # Create agents
         # In the future, this will be replaced with realistic data generation
-        self.datacollector = mesa.DataCollector(
-            model_reporters={"Employed": compute_employed},
-            # Use getattr to safely access attributes that may not exist on all agents
+        self.datacollector = ColumnarDataCollector(
+            model_reporters=self.metrics.reporters(),
             agent_reporters={
-                "Age": lambda a: getattr(a, 'age', None),
-                "Education": lambda a: getattr(a, 'education', None),
-                "MSA": lambda a: getattr(a, 'current_msa', None),
-                "IsEmployed": lambda a: int(getattr(a, 'is_employed', 0)) if isinstance(a, IndividualAgent) else None
-            }
+                IndividualAgent: {
+                    "Age": "age",
+                    "Education": "education",
+                    "MSA": "current_msa",
+                    "IsEmployed": ("is_employed", np.int8),
+                },
+            },
+            agent_every=agent_every,
+            panel_size=agent_panel,
+            capacity=64,
+            sink=StreamingSink(output_dir, flush_every) if output_dir is not None else None,
         )
 
-        # Create regions
-        regional_data = generate_regional_data(self.num_regions)
-        self._create_regions(regional_data)
-        region_ids = [data['unique_id'] for data in regional_data]
+        if population is None and population_cache is not None and seed is not None:
+            population = population_cache.get(self.streams, self.num_individuals, self.num_firms,
+                                              self.num_regions, first_id=self.current_id + 1)
+        if population is None:
+            population = generate_population(self.streams.generator('generation'), self.num_individuals,
+                                             self.num_firms, self.num_regions, first_id=self.current_id + 1)
+        self._create_regions(population.regions)
+        # Origin-destination flows between regions, recorded at each move
+        self.flows = MigrationFlows(population.regions['unique_id'].tolist())
+        self._create_firms(population.firms, population.firm_ids)
+        self._create_individuals(population.individuals, population.individual_ids, population.employer_ids)
+        self._create_rosters(*population.roster)
+        # Later agents get ids after every generated one
+        self.current_id = max(self.current_id, int(population.firm_ids.max(initial=0)),
+                              int(population.individual_ids.max(initial=0)))
+
+        # Create governments and the engine applying their policies
+        self.policy_engine = PolicyEngine(self, budgets)
+        self._create_governments(policies)
+
+        # Exogenous regional indicators; the panel rows of the regions, in registry order
+        self.panel = panel
+        self.panel_start = panel_start
+        if panel is not None:
+            self._panel_regions = list(self.regions.items)
+            self._panel_rows = panel.rows(region.unique_id for region in self._panel_regions)
 
-        # Create firms
-        firm_data = generate_firm_data(self.num_firms, region_ids)
-        self._create_firms(firm_data)
+        self.engine = ArrayEngine(self) if engine == 'array' else None
 
-        # Create individuals and assign them to firms
-        individual_data = generate_individual_data(self.num_individuals, region_ids)
-        self._create_individuals(individual_data)
+    @property
+    def individuals(self):
+        """Registry (IndexedSet) of the model's IndividualAgents."""
+        return self.schedule.registry(IndividualAgent)
 
-        # Create governments
-        self._create_governments()
+    @property
+    def firms(self):
+        """Registry (IndexedSet) of the model's FirmAgents."""
+        return self.schedule.registry(FirmAgent)
 
-    def _create_individuals(self, individual_data):
-        firm_agents = [agent for agent in self.schedule.agents if isinstance(agent, FirmAgent)]
-        for i, data in enumerate(individual_data):
-            # Assign individuals to firms in a round-robin fashion
-            employer = firm_agents[i % len(firm_agents)]
-            data['employer_id'] = employer.unique_id
+    @property
+    def regions(self):
+        """Registry (IndexedSet) of the model's RegionalAgents."""
+        return self.schedule.registry(RegionalAgent)
 
-            agent = IndividualAgent(self.next_id(), self, **data)
+    @property
+    def governments(self):
+        """Registry (IndexedSet) of the model's GovernmentAgents."""
+        return self.schedule.registry(GovernmentAgent)
+
+    def region_scores(self):
+        """
+        The RegionScoreTable for the current step. It is rebuilt on the first
+        call of each step, after the regions last updated, and shared by every
+        migration decision made during the step.
+        """
+        table = self.region_table
+        if table.step != self.schedule.steps:
+            table.refresh(self.regions.items, self.schedule.steps)
+        return table
+
+    def checkpoint(self):
+        """Snapshot the complete model state in memory; see Checkpoint."""
+        return Checkpoint.capture(self)
+
+    def _declare_metrics(self):
+        """
+        Declare the model-level metrics reported each step. Subclasses can extend
+        this to add counter-backed metrics; every declared metric is collected.
+        """
+        self.metrics.counter('Employed')
+        self.metrics.counter('Individuals')
+        self.metrics.derived('UnemploymentRate', unemployment_rate)
+        self.metrics.counter('Hires', per_step=True)
+        self.metrics.counter('Layoffs', per_step=True)
+        self.metrics.counter('Movers', per_step=True)
+        self.metrics.counter('VacanciesPosted', per_step=True)
+        self.metrics.counter('VacanciesFilled', per_step=True)
+        self.metrics.counter('PolicyRecipients', per_step=True)
+        self.metrics.counter('PolicySpend', per_step=True)
+
+    def record_hire(self, individual, firm):
+        """Update indexes and metrics after `individual` accepts a job at `firm`."""
+        self.residents.hire(individual)
+        self.schedule.reschedule(individual)
+        self.metrics.increment('Employed')
+        self.metrics.increment('Hires')
+        self.metrics.increment('VacanciesFilled')
+
+    def record_layoff(self, individual, firm):
+        """Update indexes and metrics after `firm` lays off `individual`."""
+        self.residents.separate(individual)
+        self.schedule.reschedule(individual)
+        self.metrics.increment('Employed', -1)
+        self.metrics.increment('Layoffs')
+
+    def record_move(self, individual, origin, destination):
+        """Update indexes and metrics after `individual` migrates between MSAs."""
+        self.residents.move(individual, origin, destination)
+        self.flows.record(origin, destination)
+        self.metrics.increment('Movers')
+
+    def record_remote_layoff(self, employee_id, firm):
+        """
+        Handle a layoff of an employee that is not an agent of this model.
+
+        Returns:
+            True if the layoff goes ahead and `firm` should drop the employee.
+            A single model simulates every employee, so this returns False.
+        """
+        return False
+
+    def record_vacancy(self, vacancy):
+        """Update metrics after a vacancy is posted to the job market."""
+        self.metrics.increment('VacanciesPosted')
+
+    def _create_individuals(self, individual_columns, unique_ids, employer_ids):
+        if self.state is not None:
+            self._load_individuals(individual_columns, unique_ids, employer_ids)
+            return
+        rows = iter_rows(individual_columns, INDIVIDUAL_FIELDS)
+        for unique_id, employer_id, row in zip(unique_ids.tolist(), employer_ids.tolist(), rows):
+            agent = self._individual_class(unique_id, self, *row, employer_id=employer_id)
             self.schedule.add(agent)
             self.agent_id_map[agent.unique_id] = agent
+            self.residents.add(agent)
+            self.metrics.increment('Individuals')
+            if agent.is_employed:
+                self.metrics.increment('Employed')
 
-            # Add employee to firm's list
-            employer.employees.append(agent.unique_id)
+    def _load_individuals(self, individual_columns, unique_ids, employer_ids):
+        # Fill the state store's columns in bulk and bind an agent to each row,
+        # so (possibly memory-mapped) columns are never converted row by row
+        employer_ids = np.asarray(employer_ids)
+        if employer_ids.dtype == object:
+            employed = np.not_equal(employer_ids, None)
+        else:
+            employed = np.ones(len(employer_ids), dtype=bool)
+        columns = {name: individual_columns[name] for name in INDIVIDUAL_FIELDS}
+        rows = self.state.individuals.extend(unique_ids, dict(columns, is_employed=employed,
+                                                              employer_id=employer_ids))
+        for unique_id, row in zip(unique_ids.tolist(), rows.tolist()):
+            agent = self._individual_class.bind(unique_id, self, row)
+            self.schedule.add(agent)
+            self.agent_id_map[unique_id] = agent
+        self.residents.add_many(unique_ids, columns['current_msa'], employed,
+                                self.state.individuals.column('wage_percentile')[rows])
+        self.metrics.increment('Individuals', len(rows))
+        self.metrics.increment('Employed', int(employed.sum()))
 
+    def _create_rosters(self, employee_ids, employer_ids):
+        # Add employees to their firm's list
+        for employee_id, employer_id in zip(employee_ids.tolist(), employer_ids.tolist()):
+            self.agent_id_map[employer_id].employees.add(employee_id)
 
-    def _create_firms(self, firm_data):
-        for data in firm_data:
-            agent = FirmAgent(self.next_id(), self, **data)
+    def _create_firms(self, firm_columns, unique_ids):
+        if self.state is not None:
+            rows = self.state.firms.extend(unique_ids, {name: firm_columns[name] for name in FIRM_FIELDS})
+            for unique_id, row in zip(unique_ids.tolist(), rows.tolist()):
+                agent = self._firm_class.bind(unique_id, self, row)
+                self.schedule.add(agent)
+                self.agent_id_map[unique_id] = agent
+            return
+        for unique_id, row in zip(unique_ids.tolist(), iter_rows(firm_columns, FIRM_FIELDS)):
+            agent = self._firm_class(unique_id, self, *row)
             self.schedule.add(agent)
             self.agent_id_map[agent.unique_id] = agent
 
-    def _create_regions(self, regional_data):
-        for data in regional_data:
-            agent = RegionalAgent(model=self, **data)
+    def _create_regions(self, regional_columns):
+        for unique_id, *row in iter_rows(regional_columns, REGION_FIELDS):
+            agent = RegionalAgent(unique_id, self, *row)
             self.schedule.add(agent)
             self.agent_id_map[agent.unique_id] = agent
 
-    def _create_governments(self):
-        # Create one federal and a few state governments for simplicity
+    def _create_governments(self, policies=()):
+        # Create one federal and a few state governments for simplicity; the
+        # state governments split the regions between them
         federal_gov = GovernmentAgent(self.next_id(), self, level='federal')
-        self.schedule.add(federal_gov)
-        self.agent_id_map[federal_gov.unique_id] = federal_gov
-        for i in range(self.num_governments - 1):
-            state_gov = GovernmentAgent(self.next_id(), self, level='state')
-            self.schedule.add(state_gov)
-            self.agent_id_map[state_gov.unique_id] = state_gov
+        governments = [federal_gov]
+        region_ids = [region.unique_id for region in self.regions]
+        n_states = self.num_governments - 1
+        for i in range(n_states):
+            governments.append(GovernmentAgent(self.next_id(), self, level='state',
+                                               jurisdiction=region_ids[i::n_states]))
+        names = set()
+        for policy in policies:
+            if policy.name in names:
+                raise ValueError(f"Duplicate policy name {policy.name!r}")
+            names.add(policy.name)
+            runners = [government for government in governments if government.level == policy.level]
+            if not runners:
+                raise ValueError(f"No {policy.level!r} government to run policy {policy.name!r}")
+            for government in runners:
+                getattr(government, policy.program)[policy.name] = policy
+        for government in governments:
+            self.schedule.add(government)
+            self.agent_id_map[government.unique_id] = government
 
     def step(self):
         """Advance the model by one step."""
-        # Clear job board at the beginning of each step
-        self.job_board = []
-        self.schedule.step()
+        start = perf_counter() if self.profiler is not None else None
+        # Expire last step's vacancies at the beginning of each step
+        self.job_market.rollover()
+        self.metrics.begin_step()
+        self.policy_engine.begin_step()
+        if self.panel is not None:
+            self._apply_panel()
+        if self.engine is None:
+            self.schedule.step()
+        else:
+            self.engine.step()
+            self.schedule.steps += 1
+            self.schedule.time += 1
+            self._advance_time()
+        self.flows.end_step()
+        if self.debug:
+            self.residents.check(self.individuals)
+        self._collect(start)
+
+    def _apply_panel(self):
+        """Set the panel's indicators for the current step's month on the regions it covers."""
+        values = self.panel.month_values(self._panel_rows, self.panel_start + self.schedule.steps)
+        rows, columns = np.nonzero(~np.isnan(values))
+        for i, j, value in zip(rows.tolist(), columns.tolist(), values[rows, columns].tolist()):
+            setattr(self._panel_regions[i], self.panel.indicators[j], value)
+
+    def _collect(self, start=None):
+        """
+        Collect the step's data. With profiling on, also time the collection and
+        close the step's timings; `start` is when the step began, if known.
+        """
+        if self.profiler is None:
+            self.datacollector.collect(self)
+            return
+        collect_start = perf_counter()
         self.datacollector.collect(self)
+        end = perf_counter()
+        self.profiler.add('collect', end - collect_start)
+        if start is not None:
+            self.profiler.add('MigrationModel.step', end - start)
+        self.profiler.end_step(self.schedule.steps, {name: self.metrics[name] for name in PROFILED_EVENTS})
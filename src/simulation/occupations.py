@@ -0,0 +1,91 @@
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+
+def soc_features(codes):
+    """
+    Coordinates of SOC codes ("MM-NNNN") in which nearby detailed occupations are
+    close: the detailed number within a major group, with major groups far apart.
+    Codes of the same broad group ("MM-NNN") are at most 9 apart.
+    """
+    major = np.array([int(code.split('-')[0]) for code in codes], dtype=np.float64)
+    detailed = np.array([int(code.split('-')[1]) for code in codes], dtype=np.float64)
+    return np.column_stack([major * 1e5, detailed])
+
+
+class OccupationIndex:
+    """
+    Precomputed nearest neighbours of every occupation, for skills-aware job search.
+
+    The k most similar other occupations of each SOC code are found once, with a
+    scikit-learn NearestNeighbors tree over occupation features, and kept as
+    lists sorted by decreasing similarity, so a searcher's fallback occupations
+    are an O(1) lookup. Similarity is 1 / (1 + distance / scale).
+
+    Args:
+        codes: The SOC codes to index.
+        features: Optional (n_codes, d) feature array (e.g. skill or task
+            profiles); defaults to `soc_features(codes)`.
+        n_neighbors: Number of similar occupations kept per code.
+        min_similarity: Neighbours less similar than this are dropped.
+        scale: Feature distance at which similarity falls to one half.
+    """
+    def __init__(self, codes, features=None, n_neighbors=5, min_similarity=0.0, scale=10.0):
+        self.codes = list(dict.fromkeys(codes))
+        self.n_neighbors = n_neighbors
+        self._neighbors = {code: [] for code in self.codes}
+        if len(self.codes) < 2 or n_neighbors <= 0:
+            return
+        features = soc_features(self.codes) if features is None else np.asarray(features, dtype=np.float64)
+        k = min(n_neighbors + 1, len(self.codes))
+        distances, indices = NearestNeighbors(n_neighbors=k).fit(features).kneighbors(features)
+        similarities = 1.0 / (1.0 + distances / scale)
+        for row, code in enumerate(self.codes):
+            self._neighbors[code] = [
+                (self.codes[i], float(s)) for i, s in zip(indices[row].tolist(), similarities[row].tolist())
+                if i != row and s >= min_similarity
+            ][:n_neighbors]
+
+    @classmethod
+    def from_transferability(cls, codes, matrix, n_neighbors=5, min_similarity=0.0):
+        """
+        Build the index from a skills-transferability matrix instead of features.
+
+        Args:
+            codes: SOC codes labelling the matrix rows and columns.
+            matrix: (n_codes, n_codes) dense or scipy sparse matrix; entry [i, j]
+                is how well skills of occupation i transfer to occupation j.
+            n_neighbors: Number of similar occupations kept per code.
+            min_similarity: Entries below this are ignored.
+        """
+        index = cls(codes, n_neighbors=0)
+        index.n_neighbors = n_neighbors
+        rows = matrix.tocsr() if hasattr(matrix, 'tocsr') else np.asarray(matrix)
+        for row, code in enumerate(index.codes):
+            if hasattr(rows, 'indptr'):
+                start, end = rows.indptr[row], rows.indptr[row + 1]
+                columns, values = rows.indices[start:end], rows.data[start:end]
+            else:
+                columns = np.flatnonzero(rows[row])
+                values = rows[row][columns]
+            keep = (columns != row) & (values >= min_similarity)
+            columns, values = columns[keep], values[keep]
+            order = np.argsort(-values, kind='stable')[:n_neighbors]
+            index._neighbors[code] = [(index.codes[columns[i]], float(values[i])) for i in order]
+        return index
+
+    def neighbors(self, code):
+        """The (code, similarity) pairs most similar to `code`, most similar first."""
+        return self._neighbors.get(code, [])
+
+    def similarity(self, code, other):
+        """Similarity of two codes: 1 for the same code, 0 if `other` is not a neighbour."""
+        if code == other:
+            return 1.0
+        return next((s for neighbor, s in self.neighbors(code) if neighbor == other), 0.0)
+
+    def __contains__(self, code):
+        return code in self._neighbors
+
+    def __len__(self):
+        return len(self.codes)
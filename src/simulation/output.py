@@ -0,0 +1,199 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = 'manifest.json'
+FORMATS = ('npz', 'parquet')
+_LABELS_PREFIX = '__labels__'
+
+
+class StreamingSink:
+    """
+    Writes collected model and agent records to chunked columnar files on disk.
+
+    Records are buffered for `flush_every` steps and then written as one shard per
+    record kind (model, and each agent type), so memory stays bounded by the flush
+    interval. A JSON manifest listing every shard and its step range is rewritten
+    after each flush, so the output of an interrupted run remains readable.
+
+    Args:
+        directory: Output directory; created if missing.
+        flush_every: Number of collected steps buffered before writing a shard.
+        format: 'npz' (NumPy archives, no extra dependencies) or 'parquet'
+            (requires pyarrow or fastparquet).
+    """
+    def __init__(self, directory, flush_every=1, format='npz'):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format {format!r}; expected one of {FORMATS}")
+        self.directory = directory
+        self.flush_every = flush_every
+        self.format = format
+        self.shards = []
+        os.makedirs(directory, exist_ok=True)
+        self._model_rows = []
+        self._agent_rows = {}
+        self._labels = {}
+        self._pending_steps = 0
+
+    def write_model(self, step, values):
+        """Buffer one step of model-level values (a dict of scalars)."""
+        self._model_rows.append((step, dict(values)))
+
+    def write_agents(self, agent_type, step, ids, columns, labels=None):
+        """
+        Buffer one step of agent-level values.
+
+        Args:
+            agent_type: Name of the agent type.
+            step: The model step.
+            ids: Array of agent ids, one per row.
+            columns: Mapping of column name to an array aligned with `ids`.
+            labels: Optional mapping of column name to category labels, for
+                columns holding integer category codes.
+        """
+        self._agent_rows.setdefault(agent_type, []).append((step, np.asarray(list(ids)), dict(columns)))
+        if labels:
+            self._labels.setdefault(agent_type, {}).update(labels)
+
+    def end_step(self):
+        """Mark the end of a collected step, flushing if the buffer is full."""
+        self._pending_steps += 1
+        if self._pending_steps >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered records to new shards and update the manifest."""
+        if self._model_rows:
+            steps = np.array([step for step, _ in self._model_rows], dtype=np.int64)
+            names = list(self._model_rows[0][1])
+            columns = {name: np.array([values[name] for _, values in self._model_rows]) for name in names}
+            self._write_shard('model', None, steps, steps, columns, {})
+        for agent_type, rows in self._agent_rows.items():
+            if not rows:
+                continue
+            steps = np.concatenate([np.full(len(ids), step, dtype=np.int64) for step, ids, _ in rows])
+            columns = {'AgentID': np.concatenate([ids for _, ids, _ in rows])}
+            for name in rows[0][2]:
+                columns[name] = np.concatenate([values[name] for _, _, values in rows])
+            self._write_shard('agents', agent_type, np.array([step for step, _, _ in rows]), steps, columns,
+                              self._labels.get(agent_type, {}))
+        self._model_rows = []
+        self._agent_rows = {}
+        self._pending_steps = 0
+        self._write_manifest()
+
+    def close(self):
+        """Flush any buffered records."""
+        self.flush()
+
+    def _write_shard(self, kind, agent_type, collected_steps, row_steps, columns, labels):
+        index = sum(1 for shard in self.shards if shard['kind'] == kind and shard['agent_type'] == agent_type)
+        stem = kind if agent_type is None else f"{kind}_{agent_type}"
+        filename = f"{stem}_{index:05d}.{self.format}"
+        path = os.path.join(self.directory, filename)
+        if self.format == 'npz':
+            arrays = {'Step': row_steps, **columns}
+            for name, values in labels.items():
+                arrays[_LABELS_PREFIX + name] = np.asarray(values)
+            np.savez(path, **arrays)
+        else:
+            frame = pd.DataFrame({'Step': row_steps, **columns})
+            for name, values in labels.items():
+                frame[name] = np.asarray(values, dtype=object)[frame[name].to_numpy()]
+            frame.to_parquet(path, index=False)
+        self.shards.append({
+            'kind': kind,
+            'agent_type': agent_type,
+            'file': filename,
+            'first_step': int(collected_steps.min()),
+            'last_step': int(collected_steps.max()),
+            'columns': list(columns),
+        })
+
+    def _write_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'format': self.format, 'shards': self.shards}, f, indent=1)
+        os.replace(tmp, path)
+
+
+class ShardedOutput:
+    """
+    Lazily reads output written by a StreamingSink.
+
+    Only the shards overlapping the requested steps are opened, and only the
+    requested columns are read from them.
+
+    Args:
+        directory: Directory containing the sink's manifest and shards.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.format = manifest['format']
+        self.shards = manifest['shards']
+
+    def agent_types(self):
+        return sorted({shard['agent_type'] for shard in self.shards if shard['kind'] == 'agents'})
+
+    def steps(self):
+        """All collected model steps."""
+        return sorted(step for frame in self._frames('model', None, None, ['Step']) for step in frame['Step'])
+
+    def get_model_vars_dataframe(self, steps=None, columns=None):
+        """Model-level data, one row per collected step, optionally restricted."""
+        frames = list(self._frames('model', None, steps, columns))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True).drop(columns='Step')
+
+    def get_agent_vars_dataframe(self, agent_type, steps=None, columns=None):
+        """
+        Agent-level data indexed by (Step, AgentID).
+
+        Args:
+            agent_type: The agent type or its name.
+            steps: Optional iterable of steps to load; all steps by default.
+            columns: Optional list of columns to load; all columns by default.
+        """
+        frames = list(self.iter_agent_frames(agent_type, steps, columns))
+        if not frames:
+            return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['Step', 'AgentID']))
+        return pd.concat(frames)
+
+    def iter_agent_frames(self, agent_type, steps=None, columns=None):
+        """Yield agent-level DataFrames shard by shard, for out-of-core analysis."""
+        name = agent_type if isinstance(agent_type, str) else agent_type.__name__
+        wanted = None if columns is None else ['AgentID'] + list(columns)
+        for frame in self._frames('agents', name, steps, wanted):
+            yield frame.set_index(['Step', 'AgentID'])
+
+    def _frames(self, kind, agent_type, steps, columns):
+        steps = None if steps is None else set(steps)
+        for shard in self.shards:
+            if shard['kind'] != kind or shard['agent_type'] != agent_type:
+                continue
+            if steps is not None and not any(shard['first_step'] <= s <= shard['last_step'] for s in steps):
+                continue
+            names = shard['columns'] if columns is None else [c for c in columns if c != 'Step']
+            frame = self._read(shard, names)
+            if steps is not None:
+                frame = frame[frame['Step'].isin(steps)]
+            yield frame
+
+    def _read(self, shard, names):
+        path = os.path.join(self.directory, shard['file'])
+        if self.format == 'parquet':
+            return pd.read_parquet(path, columns=['Step'] + names)
+        with np.load(path, allow_pickle=True) as archive:
+            data = {'Step': archive['Step']}
+            for name in names:
+                values = archive[name]
+                if _LABELS_PREFIX + name in archive.files:
+                    values = archive[_LABELS_PREFIX + name].astype(object)[values]
+                data[name] = values
+        return pd.DataFrame(data)
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Exogenous RegionalAgent fields a panel can drive; the model never updates them itself
+PANEL_INDICATORS = (
+    'median_price', 'rent_burden', 'construction_permits', 'population_growth', 'gdp_growth',
+    'productivity', 'industry_diversification', 'startup_density', 'minimum_wage', 'retraining_funding',
+)
+# Version of the cached panel layout; bump when `MSAPanel.read` changes its output
+PANEL_FORMAT_VERSION = 1
+
+
+class MSAPanel:
+    """
+    Monthly MSA indicators as a dense (msa x month x indicator) array.
+
+    A model given a panel refreshes the panel's indicators on every RegionalAgent
+    at the start of each step, from the month `start + step`. The whole step is a
+    single array lookup (see `rows` and `month_values`). Missing observations are
+    NaN and leave a region's current value unchanged.
+
+    Args:
+        msas: MSA ids, one per row of `values`.
+        months: numpy datetime64[M] array of the months, one per column.
+        indicators: Indicator (RegionalAgent attribute) names.
+        values: float64 array of shape (len(msas), len(months), len(indicators)).
+    """
+    def __init__(self, msas, months, indicators, values):
+        self.msas = [str(msa) for msa in msas]
+        self.months = np.asarray(months, dtype='datetime64[M]')
+        self.indicators = tuple(indicators)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.index = {msa: i for i, msa in enumerate(self.msas)}
+        if self.values.shape != (len(self.msas), len(self.months), len(self.indicators)):
+            raise ValueError(f"Panel values have shape {self.values.shape}; expected "
+                             f"{(len(self.msas), len(self.months), len(self.indicators))}")
+
+    @classmethod
+    def read(cls, paths, indicators=PANEL_INDICATORS, msa_column='msa', month_column='month',
+             chunksize=100_000, cache_dir=None):
+        """
+        Build a panel from local CSV or Parquet files in wide format: one row per
+        (MSA, month) with one column per indicator. Later rows override earlier
+        ones for the same MSA and month, so files can be layered (e.g. BLS, then
+        ACS, then BEA extracts each holding some of the indicators).
+
+        Files are parsed in chunks of `chunksize` rows, reading only the needed
+        columns with fixed dtypes; reading Parquet files requires pyarrow. With
+        `cache_dir`, the parsed panel is stored as an .npz archive keyed by the
+        files' paths, sizes and modification times and the read options, and
+        reused while they match.
+
+        Args:
+            paths: A path or sequence of paths ('.parquet' files are read as
+                Parquet, anything else as CSV).
+            indicators: Indicator columns to read. Files may hold any subset.
+            msa_column: Column of MSA ids.
+            month_column: Column of months (anything pandas parses as a date,
+                e.g. '2024-01').
+            chunksize: Rows per parsed chunk.
+            cache_dir: Optional directory of parsed panels.
+
+        Returns:
+            An MSAPanel.
+        """
+        paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+        indicators = tuple(indicators)
+        cache_path = None
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            cache_path = os.path.join(cache_dir, _cache_key(paths, indicators, msa_column, month_column) + '.npz')
+            if os.path.exists(cache_path):
+                return cls.load(cache_path)
+
+        parts = []
+        for path in paths:
+            for frame in _read_frames(path, indicators, msa_column, month_column, chunksize):
+                values = np.full((len(frame), len(indicators)), np.nan)
+                for j, name in enumerate(indicators):
+                    if name in frame:
+                        values[:, j] = frame[name].to_numpy(dtype=np.float64, na_value=np.nan)
+                months = pd.to_datetime(frame[month_column]).to_numpy().astype('datetime64[M]')
+                parts.append((frame[msa_column].to_numpy(dtype=str), months, values))
+        if parts:
+            msa_ids, months, values = (np.concatenate(column) for column in zip(*parts))
+        else:
+            msa_ids = np.empty(0, dtype=str)
+            months = np.empty(0, dtype='datetime64[M]')
+            values = np.empty((0, len(indicators)))
+
+        msas, msa_rows = np.unique(msa_ids, return_inverse=True)
+        first = months.min() if len(months) else np.datetime64('NaT', 'M')
+        month_columns = (months - first).astype(np.int64)
+        n_months = int(month_columns.max()) + 1 if len(months) else 0
+        cube = np.full((len(msas), n_months, len(indicators)), np.nan)
+        # Scatter in row order, skipping NaNs so later files only override what they hold
+        for j in range(len(indicators)):
+            observed = ~np.isnan(values[:, j])
+            cube[msa_rows[observed], month_columns[observed], j] = values[observed, j]
+        panel = cls(msas, first + np.arange(n_months), indicators, cube)
+        if cache_path is not None:
+            panel.save(cache_path)
+        return panel
+
+    @classmethod
+    def load(cls, path):
+        """Read a panel written by `save`."""
+        with np.load(path) as archive:
+            return cls(archive['msas'].tolist(), archive['months'], archive['indicators'].tolist(),
+                       archive['values'])
+
+    def save(self, path):
+        """Write the panel to `path` as an .npz archive, replacing any existing file atomically."""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, msas=np.asarray(self.msas), months=self.months,
+                     indicators=np.asarray(self.indicators), values=self.values)
+        os.replace(tmp, path)
+
+    def rows(self, msa_ids):
+        """Panel row of each id in `msa_ids`, or -1 for MSAs the panel does not cover."""
+        return np.array([self.index.get(str(msa), -1) for msa in msa_ids], dtype=np.int64)
+
+    def month_values(self, rows, month):
+        """
+        The (len(rows), n_indicators) indicator values of `rows` in month number
+        `month`, clamped to the panel's last month. Rows of -1 are all NaN.
+        """
+        if not len(self.months):
+            return np.full((len(rows), len(self.indicators)), np.nan)
+        values = self.values[rows, min(month, len(self.months) - 1)]
+        values[rows < 0] = np.nan
+        return values
+
+    def __len__(self):
+        return len(self.msas)
+
+
+def _read_frames(path, indicators, msa_column, month_column, chunksize):
+    """Yield the panel columns of one file as DataFrames."""
+    if str(path).endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("Reading Parquet panels requires pyarrow") from error
+        parquet = pq.ParquetFile(path)
+        names = parquet.schema_arrow.names
+        columns = [msa_column, month_column] + [name for name in indicators if name in names]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [msa_column, month_column] + [name for name in indicators if name in header]
+    dtypes = {msa_column: str, month_column: str, **{name: np.float64 for name in columns[2:]}}
+    yield from pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+
+def _cache_key(paths, indicators, msa_column, month_column):
+    """Name of a parsed panel: a hash of the files' identities and the read options."""
+    files = []
+    for path in paths:
+        info = os.stat(path)
+        files.append([os.path.abspath(path), info.st_size, info.st_mtime_ns])
+    options = {'version': PANEL_FORMAT_VERSION, 'files': files, 'indicators': list(indicators),
+               'msa_column': msa_column, 'month_column': month_column}
+    return 'panel-' + hashlib.sha256(json.dumps(options).encode()).hexdigest()[:16]
@@ -0,0 +1,337 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from ..agents.individual import IndividualAgent
+
+# Comparison operators allowed in eligibility conditions
+OPERATORS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+    '==': np.equal, '!=': np.not_equal,
+}
+# Prefix of condition fields read from the individual's RegionalAgent
+REGION_PREFIX = 'region.'
+
+# One government's application of one policy in one step
+PolicyRecord = namedtuple('PolicyRecord', ['step', 'government_id', 'level', 'policy', 'eligible',
+                                           'recipients', 'cost'])
+
+
+class PopulationView:
+    """
+    Bulk columns of the model's individuals for evaluating and applying policies.
+
+    With a state store, columns are read from (and written to) its typed arrays
+    directly. Otherwise each column used is gathered from the agents once per
+    view. Rows are positions in the view, the same for every column.
+
+    Args:
+        model: The MigrationModel.
+    """
+    def __init__(self, model):
+        self.model = model
+        self._table = model.state.individuals if model.state is not None else None
+        if self._table is not None:
+            self._agents = None
+            self.ids = self._table.ids()
+        else:
+            self._agents = list(model.individuals.items)
+            self.ids = np.array([agent.unique_id for agent in self._agents], dtype=np.int64)
+        self._columns = {}
+        self._region_rows = None
+
+    def column(self, name):
+        """
+        The values of individual attribute `name`, or with a 'region.' prefix, of
+        the attribute of each individual's region (NaN outside known regions).
+        """
+        values = self._columns.get(name)
+        if values is None:
+            if name.startswith(REGION_PREFIX):
+                values = self._region_column(name[len(REGION_PREFIX):])
+            elif self._table is not None:
+                values = self._table.values(name)
+            else:
+                values = np.array([getattr(agent, name) for agent in self._agents])
+            self._columns[name] = values
+        return values
+
+    def region_rows(self):
+        """Index of each individual's region in `model.region_scores()`, or -1."""
+        if self._region_rows is None:
+            index = self.model.region_scores().index
+            if self._table is not None:
+                labels = self._table.categories['current_msa'].labels
+                lookup = np.array([index.get(msa, -1) for msa in labels], dtype=np.int64)
+                self._region_rows = lookup[self._table.column('current_msa')]
+            else:
+                self._region_rows = np.array([index.get(agent.current_msa, -1) for agent in self._agents],
+                                             dtype=np.int64)
+        return self._region_rows
+
+    def invalidate(self, *names):
+        """
+        Drop the cached columns `names` after the agents' attributes changed other
+        than through `assign`; changing 'current_msa' also drops region columns.
+        """
+        for name in names:
+            self._columns.pop(name, None)
+        if 'current_msa' in names:
+            self._region_rows = None
+            for name in [name for name in self._columns if name.startswith(REGION_PREFIX)]:
+                del self._columns[name]
+
+    def assign(self, name, rows, values):
+        """Set attribute `name` of the individuals at `rows` to `values` (a scalar or one per row)."""
+        self._columns.pop(name, None)
+        if self._table is not None and self._table.schema[name] != 'category':
+            self._table.column(name)[rows] = values
+            return
+        values = np.broadcast_to(np.asarray(values, dtype=object), rows.shape)
+        for row, value in zip(rows.tolist(), values.tolist()):
+            setattr(self.agent(row), name, value)
+
+    def agent(self, row):
+        """The IndividualAgent at `row`."""
+        if self._agents is not None:
+            return self._agents[row]
+        return self.model.agent_id_map[int(self.ids[row])]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _region_column(self, name):
+        table = self.model.region_scores()
+        regions = self.model.agent_id_map
+        values = np.array([getattr(regions[msa], name) for msa in table.ids] + [np.nan], dtype=np.float64)
+        # Row -1 (an individual outside every known region) reads the trailing NaN
+        return values[self.region_rows()]
+
+
+class Policy:
+    """
+    A benefit a government pays to eligible individuals.
+
+    Eligibility is a conjunction of conditions evaluated as one mask over the
+    whole population, e.g. ('is_employed', '==', False),
+    ('ai_exposure_index', '>', 0.7), ('liquid_savings', '<', 5000) or
+    ('region.unemployment_rate', '>', 0.06).
+
+    Args:
+        name: Unique name of the policy, keying its counters.
+        conditions: Sequence of (field, operator, value) conditions that must
+            all hold. `field` is an IndividualAgent attribute or 'region.' plus
+            an attribute of the individual's RegionalAgent; `operator` is a key
+            of OPERATORS.
+        cost: Cost to the government of each recipient.
+        take_up: Probability that an eligible individual takes the benefit up
+            in a given step.
+        level: Level of the governments that run the policy.
+    """
+    # The GovernmentAgent dict the policy is filed under
+    program = None
+
+    def __init__(self, name, conditions=(), cost=0.0, take_up=1.0, level='federal'):
+        self.name = name
+        self.conditions = tuple(conditions)
+        self.cost = cost
+        self.take_up = take_up
+        self.level = level
+        for field, operator, value in self.conditions:
+            if operator not in OPERATORS:
+                raise ValueError(f"Unknown operator {operator!r} in policy {name!r}; "
+                                 f"expected one of {tuple(OPERATORS)}")
+
+    def eligible(self, view):
+        """Boolean mask of the eligible rows of a PopulationView."""
+        mask = np.ones(len(view), dtype=bool)
+        for field, operator, value in self.conditions:
+            mask &= OPERATORS[operator](view.column(field), value)
+        return mask
+
+    def apply(self, view, rows, rng):
+        """
+        Pay the benefit to the individuals at `rows`. The view is shared by every
+        policy run in the step, so attributes changed other than through
+        `view.assign` must be passed to `view.invalidate`.
+
+        Returns:
+            The rows that received it.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class RelocationGrant(Policy):
+    """
+    Pays `amount` to eligible individuals who relocate. Each compares its region
+    with a sample of others through the model's region scores, as a migration
+    decision does; those with a better-scoring destination move there and are
+    paid the grant, the others stay and cost nothing.
+    """
+    program = 'relocation_incentives'
+
+    def __init__(self, name, amount, conditions=(), take_up=1.0, level='federal'):
+        super().__init__(name, conditions, cost=amount, take_up=take_up, level=level)
+        self.amount = amount
+
+    def apply(self, view, rows, rng):
+        model = view.model
+        table = model.region_scores()
+        n_candidates = min(IndividualAgent.MIGRATION_CANDIDATES, len(table) - 1)
+        rows = rows[view.region_rows()[rows] >= 0]
+        if n_candidates <= 0 or not len(rows):
+            return rows[:0]
+        origins = view.region_rows()[rows]
+        candidates = table.sample_candidates(rng, origins, n_candidates)
+        movers = None
+        if table.utility is not None:
+            movers = {name: view.column(name)[rows] for name in table.mover_fields}
+        destinations = table.choose(origins, candidates, movers)
+        moving = destinations != origins
+        for row, destination in zip(rows[moving].tolist(), destinations[moving].tolist()):
+            agent = view.agent(row)
+            origin = agent.current_msa
+            agent.current_msa = table.ids[destination]
+            agent.housing_costs = float(table.columns['median_price'][destination]) / 12  # approx monthly
+            agent.liquid_savings += self.amount
+            model.record_move(agent, origin, agent.current_msa)
+        view.invalidate('current_msa', 'housing_costs', 'liquid_savings')
+        return rows[moving]
+
+
+class Retraining(Policy):
+    """
+    Retrains eligible individuals into occupation `target_soc`, changing their
+    soc_code; with no target, into the occupation with the most open vacancies
+    at the time. Individuals already in the target occupation are not eligible.
+    """
+    program = 'retraining_programs'
+
+    def __init__(self, name, cost, target_soc=None, conditions=(), take_up=1.0, level='federal'):
+        super().__init__(name, conditions, cost=cost, take_up=take_up, level=level)
+        self.target_soc = target_soc
+
+    def target(self, model):
+        """The occupation recipients are retrained into, or None if there is none."""
+        return self.target_soc if self.target_soc is not None else model.job_market.most_demanded()
+
+    def eligible(self, view):
+        target = self.target(view.model)
+        if target is None:
+            return np.zeros(len(view), dtype=bool)
+        return super().eligible(view) & (view.column('soc_code') != target)
+
+    def apply(self, view, rows, rng):
+        view.assign('soc_code', rows, self.target(view.model))
+        return rows
+
+
+class ExtendedBenefits(Policy):
+    """Pays `amount` to each eligible individual every step and marks them benefit-eligible."""
+    program = 'benefit_programs'
+
+    def __init__(self, name, amount, conditions=(('is_employed', '==', False),), take_up=1.0, level='federal'):
+        super().__init__(name, conditions, cost=amount, take_up=take_up, level=level)
+        self.amount = amount
+
+    def apply(self, view, rows, rng):
+        view.assign('liquid_savings', rows, view.column('liquid_savings')[rows] + self.amount)
+        view.assign('unemployment_benefits_eligible', rows, True)
+        return rows
+
+
+class PolicyEngine:
+    """
+    Applies government policies to the population in bulk.
+
+    Each GovernmentAgent step runs its policies through `run`: eligibility is one
+    mask query over individual and region columns of a PopulationView built
+    once per step and shared by every run in it (see `view`), take-up
+    is one vector of draws from the model's 'regions' stream, and the budget of
+    the government's level caps the recipients, taken in random order. Spending
+    is tracked per level and cost and uptake per policy; each step's totals are
+    also added to the model's PolicyRecipients and PolicySpend metrics. Under
+    ShardedSimulation each shard runs its own engine with its share of the
+    budgets, and grantees relocating to another shard's region are handed over
+    at the next step's exchange.
+
+    Args:
+        model: The MigrationModel.
+        budgets: Mapping of government level to its total budget over the run;
+            levels not listed have no limit.
+
+    Attributes:
+        budgets: The budget of each level.
+        spent: Total spent by each level.
+        uptake: Total recipients of each policy.
+        cost: Total cost of each policy.
+        history: A PolicyRecord per policy run.
+    """
+    def __init__(self, model, budgets=None):
+        self.model = model
+        self.budgets = dict(budgets or {})
+        self.spent = {}
+        self.uptake = {}
+        self.cost = {}
+        self.history = []
+        self._view = None
+
+    def begin_step(self):
+        """Start a new step; the step's first run builds a fresh PopulationView."""
+        self._view = None
+
+    def view(self):
+        """The PopulationView of the current step, shared by every policy run in it."""
+        if self._view is None:
+            self._view = PopulationView(self.model)
+        return self._view
+
+    def __getstate__(self):
+        # The view only caches columns of the agents; checkpoints rebuild it on demand
+        return dict(self.__dict__, _view=None)
+
+    def remaining(self, level):
+        """Unspent budget of `level` (inf without a budget)."""
+        return self.budgets.get(level, math.inf) - self.spent.get(level, 0.0)
+
+    def run(self, government, policy):
+        """
+        Apply `policy` on behalf of `government` to the eligible individuals in
+        its jurisdiction.
+
+        Returns:
+            The PolicyRecord of the run.
+        """
+        view = self.view()
+        mask = policy.eligible(view)
+        if government.jurisdiction is not None:
+            index = self.model.region_scores().index
+            covered = np.array([index[msa] for msa in government.jurisdiction if msa in index], dtype=np.int64)
+            mask &= np.isin(view.region_rows(), covered)
+        rows = np.flatnonzero(mask)
+        rng = self.model.streams.generator('regions')
+        if policy.take_up < 1:
+            rows = rows[rng.random(len(rows)) < policy.take_up]
+        rows = rng.permutation(rows)
+        if policy.cost > 0:
+            rows = rows[:int(min(len(rows), self.remaining(government.level) // policy.cost))]
+        recipients = policy.apply(view, rows, rng) if len(rows) else rows
+        cost = len(recipients) * policy.cost
+        self.spent[government.level] = self.spent.get(government.level, 0.0) + cost
+        self.uptake[policy.name] = self.uptake.get(policy.name, 0) + len(recipients)
+        self.cost[policy.name] = self.cost.get(policy.name, 0.0) + cost
+        self.model.metrics.increment('PolicyRecipients', len(recipients))
+        self.model.metrics.increment('PolicySpend', cost)
+        record = PolicyRecord(self.model.schedule.steps, government.unique_id, government.level, policy.name,
+                              int(mask.sum()), len(recipients), cost)
+        self.history.append(record)
+        return record
+
+    def records(self):
+        """The history as a DataFrame, one row per policy run."""
+        return pd.DataFrame(self.history, columns=PolicyRecord._fields)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from ..utils.data_generator import GENERATOR_VERSION
+from .model import Population, generate_population
+
+MANIFEST = 'manifest.json'
+# Population fields stored as column dicts, one .npy file per column
+_TABLES = ('regions', 'firms', 'individuals')
+# Population fields stored as single id arrays
+_ARRAYS = ('firm_ids', 'individual_ids', 'employer_ids')
+
+
+class PopulationCache:
+    """
+    Generated populations stored on local disk as typed binary columns.
+
+    Each population is kept in its own subdirectory, named by a hash of its
+    generation parameters (sizes, first id and the root seed) and
+    GENERATOR_VERSION, with one .npy file per column. Numeric, boolean and
+    string columns are memory-mapped when loaded, so a cached population is
+    ready in milliseconds and processes loading the same population share its
+    pages through the OS page cache. Object columns (small region fields) are
+    loaded into memory. A model with a state store copies the columns into its
+    tables in bulk (see ColumnTable.extend); plain agents still take their
+    attributes row by row, so the cache then saves only the generation time.
+
+    A population is written to a temporary directory that is renamed into
+    place, so readers never see a partial entry and concurrent writers of the
+    same population are safe: the first rename wins and the others are dropped.
+
+    Args:
+        directory: Cache directory; created if missing.
+        mmap: If True, memory-map columns when loading; otherwise read them
+            into memory.
+
+    Example:
+        cache = PopulationCache('~/.cache/migration-populations')
+        model = MigrationModel(500_000, 50_000, 384, 2, seed=42, population_cache=cache)
+    """
+    def __init__(self, directory, mmap=True):
+        self.directory = os.path.expanduser(directory)
+        self.mmap = mmap
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, seed_sequence, n_individuals, n_firms, n_regions, first_id=1):
+        """The entry name of the population generated with these parameters."""
+        params = self._params(seed_sequence, n_individuals, n_firms, n_regions, first_id)
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+        return f"population-v{GENERATOR_VERSION}-{digest}"
+
+    def get(self, streams, n_individuals, n_firms, n_regions, first_id=1):
+        """
+        The population of a model seeded with `streams`, generated from its
+        'generation' stream and cached on the first request.
+
+        Args:
+            streams: The model's RandomStreams.
+            n_individuals: Number of individuals.
+            n_firms: Number of firms.
+            n_regions: Number of regions.
+            first_id: The first agent id to assign.
+
+        Returns:
+            A Population.
+        """
+        key = self.key(streams.seed_sequence, n_individuals, n_firms, n_regions, first_id)
+        population = self.load(key)
+        if population is None:
+            population = generate_population(streams.generator('generation'), n_individuals, n_firms,
+                                             n_regions, first_id=first_id)
+            self.save(key, population,
+                      self._params(streams.seed_sequence, n_individuals, n_firms, n_regions, first_id))
+        return population
+
+    def load(self, key):
+        """The cached population `key`, or None if it is not cached."""
+        path = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(path, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if manifest['version'] != GENERATOR_VERSION:
+            return None
+        objects = set(manifest['object_columns'])
+        tables = {
+            table: {name: self._read(path, f"{table}.{name}", f"{table}.{name}" in objects)
+                    for name in manifest['columns'][table]}
+            for table in _TABLES
+        }
+        arrays = {name: self._read(path, name) for name in _ARRAYS}
+        roster = (self._read(path, 'roster.employee_ids'), self._read(path, 'roster.employer_ids'))
+        return Population(tables['regions'], tables['firms'], arrays['firm_ids'], tables['individuals'],
+                          arrays['individual_ids'], arrays['employer_ids'], roster)
+
+    def save(self, key, population, params=None):
+        """
+        Store `population` as entry `key`, unless it is already cached.
+
+        Args:
+            key: The entry name (see `key`).
+            population: The Population to store.
+            params: Optional generation parameters recorded in the manifest.
+        """
+        final = os.path.join(self.directory, key)
+        if os.path.exists(final):
+            return
+        tmp = tempfile.mkdtemp(prefix=f".{key}.", dir=self.directory)
+        try:
+            columns, objects = {}, []
+            for table in _TABLES:
+                columns[table] = list(getattr(population, table))
+                for name, values in getattr(population, table).items():
+                    values = np.asarray(values)
+                    if values.dtype == object:
+                        objects.append(f"{table}.{name}")
+                    np.save(os.path.join(tmp, f"{table}.{name}.npy"), values, allow_pickle=values.dtype == object)
+            for name in _ARRAYS:
+                np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(getattr(population, name)))
+            employee_ids, employer_ids = population.roster
+            np.save(os.path.join(tmp, 'roster.employee_ids.npy'), np.asarray(employee_ids))
+            np.save(os.path.join(tmp, 'roster.employer_ids.npy'), np.asarray(employer_ids))
+            with open(os.path.join(tmp, MANIFEST), 'w') as f:
+                json.dump({'version': GENERATOR_VERSION, 'params': params, 'columns': columns,
+                           'object_columns': objects}, f, indent=1)
+            os.rename(tmp, final)
+        except OSError:
+            # Another process stored the same population first
+            if not os.path.isfile(os.path.join(final, MANIFEST)):
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _read(self, path, name, objects=False):
+        filename = os.path.join(path, f"{name}.npy")
+        if objects:
+            return np.load(filename, allow_pickle=True)
+        return np.load(filename, mmap_mode='r' if self.mmap else None)
+
+    @staticmethod
+    def _params(seed_sequence, n_individuals, n_firms, n_regions, first_id):
+        return {
+            'entropy': str(seed_sequence.entropy),
+            'spawn_key': list(seed_sequence.spawn_key),
+            'n_individuals': int(n_individuals),
+            'n_firms': int(n_firms),
+            'n_regions': int(n_regions),
+            'first_id': int(first_id),
+        }
@@ -0,0 +1,124 @@
+import functools
+from time import perf_counter
+
+import pandas as pd
+
+# Per-step metrics recorded next to the timings as event counts
+PROFILED_EVENTS = ('Hires', 'Layoffs', 'Movers', 'VacanciesPosted', 'VacanciesFilled')
+
+
+class StepProfiler:
+    """
+    Wall-clock time and call counts of model phases, per step.
+
+    Instrumented code reports each timed phase with `add`. Phases are named like
+    'FirmAgent.step' (a scheduler stage over every firm), 'FirmAgent.layoff_logic'
+    (one agent method, summed over its calls), 'ArrayEngine.match' or 'collect'.
+    Times are inclusive, so a stage includes the agent methods it calls.
+    `end_step` closes the step's row of the timing table, with the step's event
+    counters.
+
+    Example:
+        model = MigrationModel(..., profile=True)
+        model.step()
+        model.profiler.summary()
+    """
+    def __init__(self):
+        self._current = {}
+        self._rows = []
+        self._events = []
+
+    def add(self, phase, seconds, calls=1):
+        """Add `calls` calls taking `seconds` in total to `phase` in the current step."""
+        entry = self._current.get(phase)
+        if entry is None:
+            self._current[phase] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+
+    def end_step(self, step, events=None):
+        """
+        Record the current step's timings under `step` and start a new one.
+
+        Args:
+            step: The step number.
+            events: Optional mapping of event name to the step's count.
+        """
+        for phase, (seconds, calls) in self._current.items():
+            self._rows.append((step, phase, seconds, calls))
+        self._current = {}
+        if events is not None:
+            self._events.append(dict(events, Step=step))
+
+    def dataframe(self):
+        """The timing table: one row per (Step, Phase) with Seconds and Calls."""
+        df = pd.DataFrame(self._rows, columns=['Step', 'Phase', 'Seconds', 'Calls'])
+        return df.set_index(['Step', 'Phase'])
+
+    def events_dataframe(self):
+        """Event counts, one row per step."""
+        if not self._events:
+            return pd.DataFrame(index=pd.Index([], name='Step'))
+        return pd.DataFrame(self._events).set_index('Step')
+
+    def summary(self):
+        """
+        Totals per phase over all steps: Seconds, Calls, seconds per call and the
+        phase's share of the model step time, slowest first.
+        """
+        totals = self.dataframe().groupby(level='Phase')[['Seconds', 'Calls']].sum()
+        totals['PerCall'] = totals['Seconds'] / totals['Calls'].where(totals['Calls'] > 0)
+        step_seconds = totals['Seconds'].get('MigrationModel.step')
+        if step_seconds:
+            totals['Share'] = totals['Seconds'] / step_seconds
+        return totals.sort_values('Seconds', ascending=False)
+
+    def to_csv(self, path):
+        """Write the timing table, for comparison with other runs (see `compare`)."""
+        self.dataframe().to_csv(path)
+
+    @staticmethod
+    def read_csv(path):
+        """Read a timing table written by `to_csv`."""
+        return pd.read_csv(path, index_col=['Step', 'Phase'])
+
+    @staticmethod
+    def compare(baseline, candidate):
+        """
+        Compare per-phase total seconds of two timing tables.
+
+        Args:
+            baseline: Timing table (see `dataframe`) of the reference run.
+            candidate: Timing table of the run to compare.
+
+        Returns:
+            A DataFrame per phase with Baseline and Candidate seconds and their
+            Ratio (candidate over baseline), largest ratio first.
+        """
+        df = pd.DataFrame({
+            'Baseline': baseline.groupby(level='Phase')['Seconds'].sum(),
+            'Candidate': candidate.groupby(level='Phase')['Seconds'].sum(),
+        })
+        df['Ratio'] = df['Candidate'] / df['Baseline']
+        return df.sort_values('Ratio', ascending=False)
+
+
+def profiled(method):
+    """
+    Decorator timing an agent method into its model's profiler, if it has one.
+    With profiling disabled it costs one attribute check per call.
+    """
+    phase = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = self.model.profiler
+        if profiler is None:
+            return method(self, *args, **kwargs)
+        start = perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profiler.add(phase, perf_counter() - start)
+    return wrapper
@@ -0,0 +1,110 @@
+import numpy as np
+
+# Region attributes copied into the table by default
+REGION_SCORE_FIELDS = ('unemployment_rate', 'median_price')
+
+
+def region_score(columns):
+    """Default migration score: unemployment rate plus median house price in millions; lower is better."""
+    return columns['unemployment_rate'] + columns['median_price'] / 1e6
+
+
+class RegionScoreTable:
+    """
+    Per-step table of region attractiveness used by migration decisions.
+
+    `refresh` copies the regions' score fields into arrays once and scores every
+    region with `score`. Decisions then sample candidate region indices and
+    compare table entries, at O(1) cost per candidate instead of reading agents.
+    The same `choose` serves one Mesa agent or every deciding individual of the
+    array engine at once.
+
+    Individual-specific terms (moving costs, family proximity, savings, ...) go in
+    `utility`. It is called as utility(table, origins, candidates, movers), where
+    `origins` is an (n,) array of region indices, `candidates` an (n, k) array of
+    region indices and `movers` maps each name in `mover_fields` to an (n,)
+    array of the deciding individuals' attributes. It returns an (n, k) array
+    added to the candidates' scores; staying adds nothing, so such terms are
+    expressed relative to staying put.
+
+    Args:
+        score: Function of a dict of region field arrays returning one score per
+            region; lower is more attractive.
+        fields: Region attributes copied into `columns`.
+        utility: Optional individual-specific term, see above.
+        mover_fields: Individual attributes passed to `utility`.
+
+    Attributes:
+        ids: Region ids, in table order.
+        index: Mapping of region id to table index.
+        columns: Mapping of each field to an array over regions.
+        scores: Array of region scores.
+        step: Model step the table was last refreshed for.
+    """
+    def __init__(self, score=region_score, fields=REGION_SCORE_FIELDS, utility=None, mover_fields=()):
+        self.score = score
+        self.fields = tuple(fields)
+        self.utility = utility
+        self.mover_fields = tuple(mover_fields)
+        self.ids = []
+        self.index = {}
+        self.columns = {}
+        self.scores = np.empty(0)
+        self.step = None
+
+    def refresh(self, regions, step=None):
+        """Rebuild the table from `regions` (RegionalAgents, in a fixed order)."""
+        regions = list(regions)
+        if len(regions) != len(self.ids):
+            self.ids = [region.unique_id for region in regions]
+            self.index = {msa: i for i, msa in enumerate(self.ids)}
+        self.columns = {name: np.array([getattr(region, name) for region in regions], dtype=np.float64)
+                        for name in self.fields}
+        self.scores = np.asarray(self.score(self.columns), dtype=np.float64)
+        self.step = step
+
+    def choose(self, origins, candidates, movers=None):
+        """
+        Pick each decision's destination: the best-scoring candidate if it beats
+        the origin, else the origin (ties stay).
+
+        Args:
+            origins: (n,) array of origin region indices.
+            candidates: (n, k) array of candidate region indices.
+            movers: Mapping of `mover_fields` to (n,) arrays, needed with `utility`.
+
+        Returns:
+            An (n,) array of destination region indices.
+        """
+        origins = np.asarray(origins, dtype=np.int64)
+        candidates = np.asarray(candidates, dtype=np.int64)
+        candidate_scores = self.scores[candidates]
+        if self.utility is not None:
+            candidate_scores = candidate_scores + self.utility(self, origins, candidates, movers)
+        best = np.argmin(candidate_scores, axis=1)
+        rows = np.arange(len(origins))
+        return np.where(candidate_scores[rows, best] < self.scores[origins], candidates[rows, best], origins)
+
+    def sample_candidates(self, rng, origins, k):
+        """
+        Sample `k` distinct candidate regions other than each origin.
+
+        Args:
+            rng: numpy Generator to draw from.
+            origins: (n,) array of origin region indices.
+            k: Candidates per origin, at most len(self) - 1.
+
+        Returns:
+            An (n, k) array of region indices.
+        """
+        keys = rng.random((len(origins), len(self.ids) - 1))
+        candidates = np.argpartition(keys, k - 1, axis=1)[:, :k]
+        candidates += candidates >= np.asarray(origins)[:, None]
+        return candidates
+
+    def mover_columns(self, agent):
+        """The `movers` mapping for a single individual agent."""
+        return {name: np.array([getattr(agent, name)]) for name in self.mover_fields}
+
+    def __len__(self):
+        return len(self.ids)
@@ -0,0 +1,165 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from ..utils.indexed_set import IndexedSet
+
+
+class ResidentIndex:
+    """
+    Per-MSA index of resident individuals with running labour-market aggregates.
+
+    The model updates the index wherever a resident's location or employment
+    changes (migration, hiring, layoffs), so regional indicators can be read in
+    O(1) per MSA instead of scanning the whole population.
+
+    Attributes:
+        residents: Mapping of MSA id to an IndexedSet of resident agent ids.
+        resident_count: Mapping of MSA id to the number of residents.
+        employed_count: Mapping of MSA id to the number of employed residents.
+        wage_sum: Mapping of MSA id to the sum of residents' wage_percentile.
+    """
+    def __init__(self, region_ids=()):
+        self.residents = {}
+        self.resident_count = {}
+        self.employed_count = {}
+        self.wage_sum = {}
+        for msa in region_ids:
+            self._ensure(msa)
+
+    def add(self, agent):
+        """Register an individual as a resident of its current MSA."""
+        msa = agent.current_msa
+        self._ensure(msa)
+        self.residents[msa].add(agent.unique_id)
+        self._adjust(msa, agent, 1)
+
+    def add_many(self, unique_ids, msas, employed, wages):
+        """
+        Register many individuals at once, as `add` would one by one.
+
+        Args:
+            unique_ids: Array of the individuals' ids.
+            msas: Array of their current MSAs.
+            employed: Boolean array of their employment status.
+            wages: Array of their wage_percentile.
+        """
+        codes, labels = pd.factorize(np.asarray(msas))
+        n_labels = len(labels)
+        order = np.argsort(codes, kind='stable')
+        ends = np.cumsum(np.bincount(codes, minlength=n_labels)).tolist()
+        ids = np.asarray(unique_ids)[order].tolist()
+        totals = zip(labels.tolist(), np.bincount(codes, minlength=n_labels).tolist(),
+                     np.bincount(codes, weights=np.asarray(employed, dtype=np.float64), minlength=n_labels).tolist(),
+                     np.bincount(codes, weights=wages, minlength=n_labels).tolist())
+        start = 0
+        for end, (msa, residents, employed_count, wage_sum) in zip(ends, totals):
+            self._ensure(msa)
+            for unique_id in ids[start:end]:
+                self.residents[msa].add(unique_id)
+            self.resident_count[msa] += residents
+            self.employed_count[msa] += int(employed_count)
+            self.wage_sum[msa] += wage_sum
+            start = end
+
+    def remove(self, agent):
+        """Remove an individual from its current MSA."""
+        msa = agent.current_msa
+        self.residents[msa].remove(agent.unique_id)
+        self._adjust(msa, agent, -1)
+
+    def move(self, agent, origin, destination):
+        """Record that an individual moved from `origin` to `destination`."""
+        self.residents[origin].remove(agent.unique_id)
+        self._adjust(origin, agent, -1)
+        self._ensure(destination)
+        self.residents[destination].add(agent.unique_id)
+        self._adjust(destination, agent, 1)
+
+    def hire(self, agent):
+        """Record that a resident became employed."""
+        self.employed_count[agent.current_msa] += 1
+
+    def separate(self, agent):
+        """Record that a resident lost their job."""
+        self.employed_count[agent.current_msa] -= 1
+
+    def relocate(self, agent_id, origin, destination):
+        """
+        Move a resident id between MSAs without touching the counters. Used by bulk
+        updates that recompute the aggregates with `set_aggregates` afterwards.
+        """
+        self.residents[origin].remove(agent_id)
+        self._ensure(destination)
+        self.residents[destination].add(agent_id)
+
+    def set_aggregates(self, msas, resident_count, employed_count, wage_sum):
+        """
+        Overwrite the counters of the given MSAs with recomputed totals.
+
+        Args:
+            msas: Sequence of MSA ids.
+            resident_count: Resident totals aligned with `msas`.
+            employed_count: Employed totals aligned with `msas`.
+            wage_sum: wage_percentile sums aligned with `msas`.
+        """
+        for msa, residents, employed, wages in zip(msas, resident_count, employed_count, wage_sum):
+            self._ensure(msa)
+            self.resident_count[msa] = int(residents)
+            self.employed_count[msa] = int(employed)
+            self.wage_sum[msa] = float(wages)
+
+    def unemployment_rate(self, msa):
+        """Share of an MSA's residents that are unemployed, or None if it has none."""
+        count = self.resident_count.get(msa, 0)
+        if not count:
+            return None
+        return 1 - (self.employed_count[msa] / count)
+
+    def mean_wage_percentile(self, msa):
+        """Average wage_percentile of an MSA's residents, or None if it has none."""
+        count = self.resident_count.get(msa, 0)
+        if not count:
+            return None
+        return self.wage_sum[msa] / count
+
+    def check(self, individuals):
+        """
+        Cross-check the index against a full recount of `individuals`.
+
+        Args:
+            individuals: Iterable of every IndividualAgent in the model.
+
+        Raises:
+            RuntimeError: If any resident set or counter disagrees with the recount.
+        """
+        expected = ResidentIndex()
+        for agent in individuals:
+            expected.add(agent)
+        for msa in set(self.residents) | set(expected.residents):
+            actual_ids = set(self.residents.get(msa, ()))
+            expected_ids = set(expected.residents.get(msa, ()))
+            if actual_ids != expected_ids:
+                raise RuntimeError(f"Resident index out of sync for {msa}: "
+                                   f"{len(actual_ids)} indexed vs {len(expected_ids)} recounted")
+            for name in ('resident_count', 'employed_count'):
+                actual = getattr(self, name).get(msa, 0)
+                recount = getattr(expected, name).get(msa, 0)
+                if actual != recount:
+                    raise RuntimeError(f"{name} out of sync for {msa}: {actual} indexed vs {recount} recounted")
+            if not math.isclose(self.wage_sum.get(msa, 0.0), expected.wage_sum.get(msa, 0.0), abs_tol=1e-6):
+                raise RuntimeError(f"wage_sum out of sync for {msa}")
+
+    def _ensure(self, msa):
+        if msa not in self.residents:
+            self.residents[msa] = IndexedSet()
+            self.resident_count[msa] = 0
+            self.employed_count[msa] = 0
+            self.wage_sum[msa] = 0.0
+
+    def _adjust(self, msa, agent, sign):
+        self.resident_count[msa] += sign
+        if agent.is_employed:
+            self.employed_count[msa] += sign
+        self.wage_sum[msa] += sign * agent.wage_percentile
@@ -0,0 +1,288 @@
+import heapq
+from collections import namedtuple
+from time import perf_counter
+
+import mesa
+import numpy as np
+
+from ..agents.firm import FirmAgent
+from ..agents.government import GovernmentAgent
+from ..agents.individual import IndividualAgent
+from ..agents.regional import RegionalAgent
+from ..utils.indexed_set import IndexedSet
+
+# (agent type, method) pairs run in order each step
+DEFAULT_STAGES = (
+    (FirmAgent, 'step'),        # lay off workers and post vacancies
+    (IndividualAgent, 'step'),  # search for jobs and evaluate migration
+    (RegionalAgent, 'step'),    # update regional indicators
+    (GovernmentAgent, 'step'),  # apply policies
+)
+
+# One kind of action run by the EventScheduler: `method` of agents of
+# `agent_type`. With `rate`, a function of the agent giving the per-step
+# probability of the action, each agent runs it at geometrically distributed
+# intervals. With `active`, a predicate, the agents for which it holds run it
+# every step. With neither, every agent runs it every step.
+Process = namedtuple('Process', ['agent_type', 'method', 'rate', 'active'], defaults=(None, None))
+
+
+def layoff_rate(firm):
+    """Per-step probability that `firm` lays off a worker."""
+    return firm.model.layoff_probabilities.get(firm.ai_adoption_stage, 0)
+
+
+def vacancy_rate(firm):
+    """Per-step probability that `firm` posts a vacancy."""
+    return firm.model.vacancy_rate
+
+
+def migration_rate(individual):
+    """Per-step probability that `individual` evaluates a migration decision."""
+    return individual.model.migration_rate
+
+
+def is_unemployed(individual):
+    """Whether `individual` searches for a job this step."""
+    return not individual.is_employed
+
+
+# The actions of FirmAgent.step and IndividualAgent.step as separate processes,
+# in DEFAULT_STAGES order
+EVENT_PROCESSES = (
+    Process(FirmAgent, 'lay_off_employee', rate=layoff_rate),
+    Process(FirmAgent, 'open_vacancy', rate=vacancy_rate),
+    Process(IndividualAgent, 'search_for_job', active=is_unemployed),
+    Process(IndividualAgent, 'decide_migration', rate=migration_rate),
+    Process(RegionalAgent, 'step'),
+    Process(GovernmentAgent, 'step'),
+)
+
+
+class StagedTypeScheduler(mesa.time.BaseScheduler):
+    """
+    A scheduler that keeps a registry per agent type and runs each step as a
+    sequence of stages.
+
+    Each stage calls one method on every agent of one type, in a freshly shuffled
+    order, before the next stage starts. Agent types are therefore never
+    interleaved within a step, and per-type collections are available in O(1)
+    without isinstance scans over the whole schedule.
+
+    Args:
+        model: The model instance the scheduler belongs to.
+        stages: Sequence of (agent_type, method_name) pairs; defaults to DEFAULT_STAGES.
+        agent_types: Types to keep registries for; defaults to the types named in
+            `stages`, in order. Agents are filed under the first type they are an
+            instance of, so subclasses share their base type's registry.
+    """
+    def __init__(self, model, stages=DEFAULT_STAGES, agent_types=None):
+        super().__init__(model)
+        self.stages = list(stages)
+        if agent_types is None:
+            agent_types = list(dict.fromkeys(agent_type for agent_type, _ in self.stages))
+        self._registries = {agent_type: IndexedSet() for agent_type in agent_types}
+        self._type_of_class = {}
+
+    def add(self, agent):
+        super().add(agent)
+        self._registry_for(agent).add(agent)
+
+    def remove(self, agent):
+        super().remove(agent)
+        self._registry_for(agent).remove(agent)
+
+    def registry(self, agent_type):
+        """The IndexedSet of registered agents of `agent_type`."""
+        return self._registries[agent_type]
+
+    def step(self):
+        """Run every stage in order, activating agents in random order within a stage."""
+        for agent_type, method in self.stages:
+            self.step_stage(agent_type, method)
+        self.steps += 1
+        self.time += 1
+
+    def step_stage(self, agent_type, method):
+        """
+        Call `method` on every agent of `agent_type` in a shuffled order. The
+        stage is timed into the model's profiler, if it has one.
+        """
+        agents = list(self._registries[agent_type].items)
+        self.model.random.shuffle(agents)
+        profiler = getattr(self.model, 'profiler', None)
+        start = perf_counter() if profiler is not None else None
+        for agent in agents:
+            getattr(agent, method)()
+        if profiler is not None:
+            profiler.add(f"{agent_type.__name__}.{method}", perf_counter() - start, len(agents))
+
+    def reschedule(self, agent):
+        """
+        Hook called after `agent`'s state changed in a way that may change when
+        it next acts. Every agent acts every step here, so this does nothing.
+        """
+
+    def _registry_for(self, agent):
+        return self._registries[self._type_for(agent)]
+
+    def _type_for(self, agent):
+        cls = type(agent)
+        agent_type = self._type_of_class.get(cls)
+        if agent_type is None:
+            agent_type = next((t for t in self._registries if issubclass(cls, t)), None)
+            if agent_type is None:
+                raise TypeError(f"No registry for agents of type {cls.__name__}")
+            self._type_of_class[cls] = agent_type
+        return agent_type
+
+
+class EventScheduler(StagedTypeScheduler):
+    """
+    A scheduler that only activates agents with an action due this step.
+
+    Each step runs a sequence of processes (see Process) instead of whole agent
+    steps. For a process with a per-step rate p, each agent's next action time
+    is drawn from the geometric distribution with parameter p and kept in the
+    process's priority queue, so an agent acts in each step with probability p,
+    as if it had flipped a coin every step. Processes with an `active`
+    predicate run every step for the agents it holds for, e.g. job search for
+    the unemployed. Agents due in a process are activated in random order, and
+    the cost of a step grows with the number of actions rather than with the
+    population.
+
+    Model code must call `reschedule(agent)` after changing state that a rate or
+    predicate reads (e.g. after a layoff or a hire). A changed rate is applied
+    from the agent's next undecided trial; by memorylessness this leaves the
+    timing of its actions distributed as under per-step coin flips.
+
+    Args:
+        model: The model instance the scheduler belongs to.
+        processes: Sequence of Process tuples run in order each step; defaults
+            to EVENT_PROCESSES.
+        agent_types: Types to keep registries for; see StagedTypeScheduler.
+    """
+    def __init__(self, model, processes=EVENT_PROCESSES, agent_types=None):
+        self.processes = [Process(*process) for process in processes]
+        super().__init__(model, [(p.agent_type, p.method) for p in self.processes], agent_types)
+        self._index = {(p.agent_type, p.method): i for i, p in enumerate(self.processes)}
+        self._by_type = {}
+        for i, process in enumerate(self.processes):
+            self._by_type.setdefault(process.agent_type, []).append(i)
+        # Per rate process: a heap of (time, seq, agent) entries, the seq of each
+        # agent's valid entry (older entries are skipped when popped) and its rate
+        self._heaps = [[] if p.rate is not None else None for p in self.processes]
+        self._wake = [{} if p.rate is not None else None for p in self.processes]
+        self._rates = [{} if p.rate is not None else None for p in self.processes]
+        # Per predicate process: the agents it currently holds for
+        self._active = [IndexedSet() if p.active is not None else None for p in self.processes]
+        # The step each process last ran in, so its trial for that step is decided
+        self._last_run = [None] * len(self.processes)
+        self._seq = 0
+        self._pending = []
+
+    def add(self, agent):
+        super().add(agent)
+        # Draws for new agents are made together at the next stage
+        self._pending.append(agent)
+
+    def remove(self, agent):
+        super().remove(agent)
+        for i in self._by_type.get(self._type_for(agent), ()):
+            if self._wake[i] is not None:
+                self._wake[i].pop(agent.unique_id, None)
+                self._rates[i].pop(agent.unique_id, None)
+            if self._active[i] is not None:
+                self._active[i].discard(agent)
+
+    def reschedule(self, agent):
+        """Update `agent`'s active processes and redraw its times for changed rates."""
+        for i in self._by_type.get(self._type_for(agent), ()):
+            process = self.processes[i]
+            if process.active is not None:
+                if process.active(agent):
+                    self._active[i].add(agent)
+                else:
+                    self._active[i].discard(agent)
+            rates = self._rates[i]
+            if rates is not None and agent.unique_id in rates and process.rate(agent) != rates[agent.unique_id]:
+                self._schedule(i, [agent], self._next_trial(i))
+
+    def step_stage(self, agent_type, method):
+        """
+        Run process `(agent_type, method)` for this step's due agents in a
+        shuffled order, timed into the model's profiler if it has one.
+        """
+        self._flush()
+        i = self._index[(agent_type, method)]
+        process = self.processes[i]
+        self._last_run[i] = self.steps
+        profiler = getattr(self.model, 'profiler', None)
+        # Methods decorated with `profiled` already time each call under this name
+        if hasattr(getattr(agent_type, method), '__wrapped__'):
+            profiler = None
+        start = perf_counter() if profiler is not None else None
+        if process.rate is None:
+            members = self._active[i] if process.active is not None else self._registries[agent_type]
+            agents = list(members.items)
+            self.model.random.shuffle(agents)
+            for agent in agents:
+                getattr(agent, method)()
+        else:
+            heap, wake = self._heaps[i], self._wake[i]
+            due = []
+            while heap and heap[0][0] <= self.steps:
+                _, seq, agent = heapq.heappop(heap)
+                if wake.get(agent.unique_id) == seq:
+                    due.append((agent, seq))
+            self.model.random.shuffle(due)
+            agents = [agent for agent, _ in due]
+            for agent in agents:
+                getattr(agent, method)()
+            # Agents rescheduled or removed meanwhile already have their next time
+            self._schedule(i, [agent for agent, seq in due if wake.get(agent.unique_id) == seq], self.steps + 1)
+        if profiler is not None:
+            profiler.add(f"{agent_type.__name__}.{method}", perf_counter() - start, len(agents))
+
+    def _next_trial(self, i):
+        """The first step whose trial of process `i` is still undecided."""
+        return self.steps + 1 if self._last_run[i] == self.steps else self.steps
+
+    def _schedule(self, i, agents, first_trial):
+        """Draw the next action time of `agents` in rate process `i`, from step `first_trial` on."""
+        if not agents:
+            return
+        rate = self.processes[i].rate
+        rates = np.array([rate(agent) for agent in agents], dtype=np.float64)
+        acting = rates > 0
+        waits = np.zeros(len(agents), dtype=np.int64)
+        waits[acting] = self.model.streams.generator('schedule').geometric(rates[acting])
+        heap, wake, known = self._heaps[i], self._wake[i], self._rates[i]
+        for agent, p, wait in zip(agents, rates.tolist(), waits.tolist()):
+            known[agent.unique_id] = p
+            if wait == 0:
+                wake.pop(agent.unique_id, None)
+                continue
+            self._seq += 1
+            wake[agent.unique_id] = self._seq
+            heapq.heappush(heap, (first_trial + wait - 1, self._seq, agent))
+
+    def _flush(self):
+        """Give agents added since the last stage their processes' first times."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        groups = {}
+        for agent in pending:
+            agent_type = self._type_for(agent)
+            if agent in self._registries[agent_type]:
+                groups.setdefault(agent_type, []).append(agent)
+        for agent_type, agents in groups.items():
+            for i in self._by_type.get(agent_type, ()):
+                process = self.processes[i]
+                if process.rate is not None:
+                    self._schedule(i, agents, self._next_trial(i))
+                if process.active is not None:
+                    for agent in agents:
+                        if process.active(agent):
+                            self._active[i].add(agent)
@@ -0,0 +1,529 @@
+import multiprocessing
+import traceback
+
+import numpy as np
+
+from ..agents.firm import FirmAgent
+from ..agents.individual import IndividualAgent
+from ..utils.data_generator import INDIVIDUAL_FIELDS
+from ..utils.rng import RandomStreams
+from .datacollection import ColumnarDataCollector
+from .metrics import MetricsRegistry
+from .model import MigrationModel, Population, generate_population
+
+# Regional indicators owners broadcast to the other shards after each step
+REGION_SUMMARY_FIELDS = ('unemployment_rate', 'wage_growth', 'vacancy_rates', 'median_price')
+
+# Agent types stepped before the cross-shard exchange; the rest run after it
+LOCAL_STAGE_TYPES = (FirmAgent, IndividualAgent)
+
+# MigrationModel arguments shards do not support, with the only value accepted:
+# shards step plain agents through the Mesa engine, hand individuals over as
+# attribute dicts, and get their population and output from the coordinator
+FIXED_MODEL_ARGUMENTS = {
+    'engine': 'mesa',
+    'state_store': False,
+    'population': None,
+    'output_dir': None,
+}
+
+# Seconds between liveness checks while waiting for a shard worker
+_POLL_INTERVAL = 1.0
+
+
+def partition_regions(region_ids, resident_counts, n_shards):
+    """
+    Assign regions to shards, balancing residents (largest region first, each to
+    the currently lightest shard).
+
+    Returns:
+        A list with the region ids of each shard.
+    """
+    shards = [[] for _ in range(n_shards)]
+    load = np.zeros(n_shards)
+    for index in np.argsort(-np.asarray(resident_counts), kind='stable'):
+        shard = int(np.argmin(load))
+        shards[shard].append(region_ids[index])
+        load[shard] += resident_counts[index]
+    return shards
+
+
+def subset_population(population, msas):
+    """
+    The part of a population located in `msas`: firms in those MSAs with their
+    full rosters, and individuals resident there. Every region is kept.
+    """
+    msas = np.asarray(list(msas))
+    firm_mask = np.isin(population.firms['msa'], msas)
+    individual_mask = np.isin(population.individuals['current_msa'], msas)
+    employee_ids, employer_ids = population.roster
+    roster_mask = np.isin(employer_ids, population.firm_ids[firm_mask])
+    return Population(
+        population.regions,
+        {name: values[firm_mask] for name, values in population.firms.items()},
+        population.firm_ids[firm_mask],
+        {name: values[individual_mask] for name, values in population.individuals.items()},
+        population.individual_ids[individual_mask],
+        population.employer_ids[individual_mask],
+        (employee_ids[roster_mask], employer_ids[roster_mask]),
+    )
+
+
+class ShardModel(MigrationModel):
+    """
+    The part of a sharded simulation that owns a subset of the regions, with the
+    firms located there and the individuals resident there.
+
+    Every shard holds all RegionalAgents, so migration decisions see every MSA;
+    regions owned by other shards are refreshed from their owners' summaries. A
+    step is split in three phases around the coordinator's exchange:
+
+    1. `step_local` runs the firm and individual stages and returns what must
+       cross shards: emigrants, layoff notices for employees living elsewhere,
+       and per occupation, the number of residents still unemployed after the
+       local search and of vacancies still open.
+    2. `offer` returns the ids of the job seekers and vacancies the coordinator
+       picked from those counts for matching across shards.
+    3. `finish_step` applies what other shards sent (immigrants, layoffs, hires
+       and filled vacancies), runs the remaining stages, collects model-level
+       data and returns the summaries of the owned regions.
+
+    Every unemployed resident searches the shard's whole job board, so no job
+    seeker left after the local search has an open vacancy of its occupation
+    in the same shard; only counts cross shards until a match is possible.
+
+    A shard's migration flows hold every move out of or into its own regions, so
+    a move between shards appears in the flows of both.
+
+    Args:
+        owned_msas: The region ids this shard owns.
+        population: The shard's Population (see subset_population).
+        n_governments: Number of government agents in the shard.
+        seed: Seed of the shard's random streams.
+        last_id: Largest agent id of the whole population. The shard's own
+            governments are numbered after it, so they never share an id with
+            an individual living in another shard.
+        **kwargs: Further MigrationModel arguments.
+    """
+    def __init__(self, owned_msas, population, n_governments, seed=None, last_id=0, **kwargs):
+        self._last_id = last_id
+        super().__init__(len(population.individual_ids), len(population.firm_ids),
+                         len(population.regions['unique_id']), n_governments,
+                         seed=seed, population=population, **kwargs)
+        self.owned = frozenset(owned_msas)
+        # Agent-level panels would go stale as individuals change shards
+        self.datacollector.agent_reporters = {}
+        self._emigrants = []
+        self._remote_layoffs = []
+        self._seekers = {}
+        self._openings = {}
+
+    def _create_governments(self, policies=()):
+        self.current_id = max(self.current_id, self._last_id)
+        super()._create_governments(policies)
+
+    def record_move(self, individual, origin, destination):
+        super().record_move(individual, origin, destination)
+        if destination not in self.owned:
+            self._emigrants.append((individual, origin))
+
+    def record_remote_layoff(self, employee_id, firm):
+        self._remote_layoffs.append((employee_id, firm.unique_id))
+        self.metrics.increment('Layoffs')
+        return True
+
+    def step_local(self, summaries):
+        """
+        Run the firm and individual stages of a step.
+
+        Args:
+            summaries: Mapping of region id to REGION_SUMMARY_FIELDS values
+                from the regions' owners.
+
+        Returns:
+            A dict of outbound 'emigrants' (attribute dicts) and 'layoffs'
+            ((employee id, firm id) pairs), and of 'seekers' and 'openings'
+            mapping occupations to the number of unemployed residents and open
+            vacancies.
+        """
+        for msa, values in summaries.items():
+            if msa not in self.owned:
+                region = self.agent_id_map[msa]
+                for name, value in zip(REGION_SUMMARY_FIELDS, values):
+                    setattr(region, name, value)
+
+        self.job_market.rollover()
+        self.metrics.begin_step()
+        self.policy_engine.begin_step()
+        if self.panel is not None:
+            self._apply_panel()
+        for agent_type, method in self.schedule.stages:
+            if agent_type in LOCAL_STAGE_TYPES:
+                self.schedule.step_stage(agent_type, method)
+
+        emigrants = [self._emigrate(agent, origin) for agent, origin in self._emigrants]
+        layoffs = self._remote_layoffs
+        self._emigrants = []
+        self._remote_layoffs = []
+        self._seekers = {}
+        for agent in self.individuals:
+            if not agent.is_employed:
+                self._seekers.setdefault(agent.soc_code, []).append(agent.unique_id)
+        self._openings = {}
+        for vacancy_id, vacancy in self.job_market.items():
+            self._openings.setdefault(vacancy.soc_code, []).append((vacancy_id, vacancy.firm_id))
+        return {
+            'emigrants': emigrants,
+            'layoffs': layoffs,
+            'seekers': {soc: len(ids) for soc, ids in self._seekers.items()},
+            'openings': {soc: len(vacancies) for soc, vacancies in self._openings.items()},
+        }
+
+    def offer(self, request):
+        """
+        The job seekers and vacancies picked for matching across shards.
+
+        Args:
+            request: A dict of 'seekers' and 'openings', each mapping an
+                occupation to positions among those counted by `step_local`.
+
+        Returns:
+            A dict of 'seekers' mapping each requested occupation to individual
+            ids, and 'openings' to (vacancy id, firm id) pairs, in the order of
+            the requested positions.
+        """
+        return {
+            'seekers': {soc: [self._seekers[soc][i] for i in positions]
+                        for soc, positions in request['seekers'].items()},
+            'openings': {soc: [self._openings[soc][i] for i in positions]
+                         for soc, positions in request['openings'].items()},
+        }
+
+    def finish_step(self, inbound):
+        """
+        Apply the exchange, run the remaining stages and collect data.
+
+        Args:
+            inbound: A dict of 'immigrants' (attribute dicts), 'layoffs' ((employee
+                id, firm id) pairs), 'hires' ((individual id, firm id) pairs) and
+                'fills' ((vacancy id, individual id) pairs).
+
+        Returns:
+            The summaries of the owned regions and the shard's MetricsRegistry.
+        """
+        for record in inbound['immigrants']:
+            self._immigrate(record)
+        for employee_id, firm_id in inbound['layoffs']:
+            employee = self.agent_id_map.get(employee_id)
+            if employee is not None and employee.employer_id == firm_id:
+                employee.is_employed = False
+                employee.employer_id = None
+                self.residents.separate(employee)
+                self.schedule.reschedule(employee)
+                self.metrics.increment('Employed', -1)
+        for individual_id, firm_id in inbound['hires']:
+            individual = self.agent_id_map[individual_id]
+            individual.is_employed = True
+            individual.employer_id = firm_id
+            self.residents.hire(individual)
+            self.schedule.reschedule(individual)
+            self.metrics.increment('Employed')
+            self.metrics.increment('Hires')
+        for vacancy_id, individual_id in inbound['fills']:
+            employer = self.agent_id_map[self.job_market[vacancy_id].firm_id]
+            employer.employees.add(individual_id)
+            employer.total_workers += 1
+            self.job_market.take(vacancy_id)
+            self.metrics.increment('VacanciesFilled')
+
+        for agent_type, method in self.schedule.stages:
+            if agent_type not in LOCAL_STAGE_TYPES:
+                self.schedule.step_stage(agent_type, method)
+        self.schedule.steps += 1
+        self.schedule.time += 1
+        self._advance_time()
+        self.flows.end_step()
+        if self.debug:
+            self.residents.check(self.individuals)
+        self._collect()
+        summaries = {msa: tuple(getattr(self.agent_id_map[msa], name) for name in REGION_SUMMARY_FIELDS)
+                     for msa in self.owned}
+        return summaries, self.metrics
+
+    def _emigrate(self, agent, origin):
+        """Remove an individual that moved to another shard; return its attributes."""
+        record = {name: getattr(agent, name) for name in INDIVIDUAL_FIELDS}
+        record['unique_id'] = agent.unique_id
+        record['employer_id'] = agent.employer_id
+        record['origin_msa'] = origin
+        self.residents.remove(agent)
+        self.schedule.remove(agent)
+        agent.remove()
+        del self.agent_id_map[agent.unique_id]
+        self.metrics.increment('Individuals', -1)
+        if agent.is_employed:
+            self.metrics.increment('Employed', -1)
+        return record
+
+    def _immigrate(self, record):
+        """Create an individual that moved here from another shard."""
+        agent = self._individual_class(record['unique_id'], self, *(record[name] for name in INDIVIDUAL_FIELDS),
+                                       employer_id=record['employer_id'])
+        self.schedule.add(agent)
+        self.agent_id_map[agent.unique_id] = agent
+        self.residents.add(agent)
+        self.flows.record(record['origin_msa'], agent.current_msa)
+        self.metrics.increment('Individuals')
+        if agent.is_employed:
+            self.metrics.increment('Employed')
+
+
+def _serve(connection, shard_kwargs):
+    """Worker process loop: build a ShardModel and run the commands it receives."""
+    try:
+        model = ShardModel(**shard_kwargs)
+    except BaseException:
+        connection.send(('error', traceback.format_exc()))
+        return
+    connection.send(('ok', None))
+    while True:
+        command, payload = connection.recv()
+        if command == 'close':
+            break
+        try:
+            connection.send(('ok', getattr(model, command)(payload)))
+        except BaseException:
+            connection.send(('error', traceback.format_exc()))
+            break
+    connection.close()
+
+
+class _LocalShard:
+    """A shard stepped in the coordinator's process."""
+    def __init__(self, shard_kwargs):
+        self.model = ShardModel(**shard_kwargs)
+        self._result = None
+
+    def submit(self, command, payload):
+        self._result = getattr(self.model, command)(payload)
+
+    def result(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class _ProcessShard:
+    """A shard stepped in its own worker process, driven over a pipe."""
+    def __init__(self, shard_kwargs, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, shard_kwargs), daemon=True)
+        self.process.start()
+        child.close()
+
+    def submit(self, command, payload):
+        self.connection.send((command, payload))
+
+    def result(self):
+        # Poll rather than block, so a worker that dies without replying is noticed
+        while not self.connection.poll(_POLL_INTERVAL):
+            if not self.process.is_alive():
+                raise RuntimeError(f"Shard worker {self.process.pid} exited with code {self.process.exitcode}")
+        try:
+            status, value = self.connection.recv()
+        except EOFError:
+            raise RuntimeError(f"Shard worker {self.process.pid} exited unexpectedly") from None
+        if status == 'error':
+            raise RuntimeError(f"Shard worker failed:\n{value}")
+        return value
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+        self.connection.close()
+
+
+class ShardedSimulation:
+    """
+    Runs one MigrationModel population split by MSA across several shards.
+
+    The coordinator generates the population, partitions regions across shards
+    (balancing residents) and hands each shard its regions' firms and residents.
+    Each step every shard runs its firm and individual stages in parallel. The
+    coordinator then routes emigrants to their destination shard and layoff
+    notices to the shard where the employee lives. Job seekers left over from
+    each shard's broadened search are matched to the vacancies still open in
+    other shards, by occupation and in random order: shards report only how
+    many of each they have, the coordinator draws the seekers and vacancies to
+    pair, and only those are fetched, so the exchange grows with the number of
+    cross-shard hires rather than with the population. Finally the shards
+    finish the step and broadcast their regions' indicators for the next step's
+    migration decisions.
+
+    Model-level metrics are the sums of the shards' counters; agent-level data
+    is not collected. Each shard runs the policies of its own governments, so
+    policy `budgets` are split between the shards in proportion to the
+    residents they start with, and total spending stays within each budget.
+
+    Args:
+        n_individuals: Number of individual agents.
+        n_firms: Number of firm agents.
+        n_regions: Number of regional (MSA) agents.
+        n_governments: Number of government agents per shard.
+        n_shards: Number of shards.
+        seed: Root seed; determines the population, the shards' streams and the
+            exchange, so results do not depend on `processes`.
+        processes: If True, run each shard in a worker process; otherwise step
+            them in this process (useful for tests and debugging).
+        population_cache: Optional PopulationCache the population is loaded from.
+        **model_kwargs: Further MigrationModel arguments for the shards, except
+            those in FIXED_MODEL_ARGUMENTS: shards use the Mesa engine with plain
+            agents and keep their data in memory.
+
+    Attributes:
+        metrics: MetricsRegistry with the counters summed over shards.
+        datacollector: ColumnarDataCollector of the combined model-level metrics.
+        owner: Mapping of individual id to the index of the shard it lives in.
+    """
+    def __init__(self, n_individuals, n_firms, n_regions, n_governments, n_shards=2, seed=None,
+                 processes=True, population_cache=None, **model_kwargs):
+        for name, value in FIXED_MODEL_ARGUMENTS.items():
+            if model_kwargs.get(name, value) != value:
+                raise ValueError(f"ShardedSimulation does not support {name}={model_kwargs[name]!r}; "
+                                 f"shards require {name}={value!r}")
+        if seed is None:
+            seed = int(np.random.SeedSequence().generate_state(1)[0])
+        streams = RandomStreams(seed)
+        if population_cache is not None:
+            population = population_cache.get(streams, n_individuals, n_firms, n_regions)
+        else:
+            population = generate_population(streams.generator('generation'), n_individuals, n_firms, n_regions)
+        region_ids = population.regions['unique_id'].tolist()
+        index_of_region = {msa: i for i, msa in enumerate(region_ids)}
+        regions_of_individuals = np.array([index_of_region[msa] for msa in population.individuals['current_msa']],
+                                          dtype=np.int64)
+        self.partition = partition_regions(
+            region_ids, np.bincount(regions_of_individuals, minlength=len(region_ids)), n_shards)
+        self.shard_of_msa = {msa: shard for shard, msas in enumerate(self.partition) for msa in msas}
+        shard_of_region = np.array([self.shard_of_msa[msa] for msa in region_ids], dtype=np.int64)
+        self.owner = dict(zip(population.individual_ids.tolist(),
+                              shard_of_region[regions_of_individuals].tolist()))
+
+        last_id = max(int(population.firm_ids.max(initial=0)), int(population.individual_ids.max(initial=0)))
+        budgets = model_kwargs.pop('budgets', None)
+        shares = np.bincount(list(self.owner.values()), minlength=n_shards) / max(len(self.owner), 1)
+        children = streams.seed_sequence.spawn(n_shards + 1)
+        self.rng = np.random.default_rng(children[0])
+        context = multiprocessing.get_context()
+        self.shards = []
+        try:
+            for shard, msas in enumerate(self.partition):
+                shard_kwargs = dict(model_kwargs, owned_msas=msas, population=subset_population(population, msas),
+                                    n_governments=n_governments, last_id=last_id,
+                                    budgets=None if budgets is None else
+                                    {level: amount * shares[shard] for level, amount in budgets.items()},
+                                    seed=int(children[shard + 1].generate_state(1)[0]))
+                self.shards.append(_ProcessShard(shard_kwargs, context) if processes else _LocalShard(shard_kwargs))
+            for shard in self.shards:
+                shard.result()  # wait until the shard's agents are created
+        except BaseException:
+            self.close()
+            raise
+        self._summaries = {}
+        self.steps = 0
+        self.metrics = None
+        self.datacollector = None
+
+    def step(self):
+        """Advance every shard by one step."""
+        outbound = self._call('step_local', [self._summaries] * len(self.shards))
+        inbound = self._exchange(outbound)
+        results = self._call('finish_step', inbound)
+        self._summaries = {}
+        for summaries, _ in results:
+            self._summaries.update(summaries)
+        self.metrics = MetricsRegistry.combine([registry for _, registry in results])
+        if self.datacollector is None:
+            self.datacollector = ColumnarDataCollector(model_reporters=self.metrics.reporters())
+        self.steps += 1
+        self.datacollector.collect(self, step=self.steps)
+
+    def close(self):
+        """Stop the worker processes."""
+        for shard in self.shards:
+            shard.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _call(self, command, payloads):
+        for shard, payload in zip(self.shards, payloads):
+            shard.submit(command, payload)
+        return [shard.result() for shard in self.shards]
+
+    def _exchange(self, outbound):
+        """Route migrants and layoff notices, and match applications to open vacancies."""
+        inbound = [{'immigrants': [], 'layoffs': [], 'hires': [], 'fills': []} for _ in self.shards]
+        for sent in outbound:
+            for record in sent['emigrants']:
+                destination = self.shard_of_msa[record['current_msa']]
+                inbound[destination]['immigrants'].append(record)
+                self.owner[record['unique_id']] = destination
+        for sent in outbound:
+            for employee_id, firm_id in sent['layoffs']:
+                inbound[self.owner[employee_id]]['layoffs'].append((employee_id, firm_id))
+
+        seekers, openings = {}, {}
+        for shard, sent in enumerate(outbound):
+            for soc, count in sent['seekers'].items():
+                seekers.setdefault(soc, []).append((shard, count))
+            for soc, count in sent['openings'].items():
+                openings.setdefault(soc, []).append((shard, count))
+        requests = [{'seekers': {}, 'openings': {}} for _ in self.shards]
+        pairs = []
+        for soc, seeker_counts in seekers.items():
+            if soc not in openings:
+                continue
+            n = min(sum(count for _, count in seeker_counts), sum(count for _, count in openings[soc]))
+            # Shards of the matched seekers and vacancies, in pairing order
+            pairs.append((soc, self._draw(seeker_counts, n, requests, 'seekers', soc),
+                          self._draw(openings[soc], n, requests, 'openings', soc)))
+        if not pairs:
+            return inbound
+        offers = self._call('offer', requests)
+        for soc, seeker_shards, vacancy_shards in pairs:
+            offered_seekers = {shard: iter(offers[shard]['seekers'][soc]) for shard in set(seeker_shards)}
+            offered_vacancies = {shard: iter(offers[shard]['openings'][soc]) for shard in set(vacancy_shards)}
+            for applicant_shard, vacancy_shard in zip(seeker_shards, vacancy_shards):
+                individual_id = next(offered_seekers[applicant_shard])
+                vacancy_id, firm_id = next(offered_vacancies[vacancy_shard])
+                inbound[applicant_shard]['hires'].append((individual_id, firm_id))
+                inbound[vacancy_shard]['fills'].append((vacancy_id, individual_id))
+        return inbound
+
+    def _draw(self, counts, n, requests, kind, soc):
+        """
+        Draw `n` of the seekers or vacancies of one occupation across shards, in
+        random order, and add their positions to the shards' `kind` requests.
+
+        Args:
+            counts: (shard, count) pairs of the shards holding any.
+
+        Returns:
+            The shard of each drawn seeker or vacancy, in drawing order.
+        """
+        shards = [shard for shard, _ in counts]
+        offsets = np.cumsum([0] + [count for _, count in counts])
+        positions = self.rng.choice(offsets[-1], n, replace=False)
+        holders = np.searchsorted(offsets, positions, side='right') - 1
+        for holder in np.unique(holders):
+            requests[shards[holder]][kind][soc] = (positions[holders == holder] - offsets[holder]).tolist()
+        return [shards[holder] for holder in holders.tolist()]
@@ -0,0 +1,249 @@
+import multiprocessing
+import os
+import traceback
+from itertools import product
+from multiprocessing.connection import wait
+
+import numpy as np
+import pandas as pd
+
+from .checkpoint import Checkpoint
+from .model import MigrationModel
+
+
+def grid_design(space):
+    """
+    Every combination of the given parameter values.
+
+    Args:
+        space: Mapping of parameter name (see `apply_parameters`) to a sequence
+            of values.
+
+    Returns:
+        A list of {name: value} points, the last parameter varying fastest.
+    """
+    names = list(space)
+    return [dict(zip(names, values)) for values in product(*(space[name] for name in names))]
+
+
+def latin_hypercube_design(space, n_points, seed=None):
+    """
+    A Latin hypercube sample of parameter ranges. Each range is split into
+    `n_points` equal strata, and every stratum of every parameter is sampled
+    exactly once.
+
+    Args:
+        space: Mapping of parameter name (see `apply_parameters`) to a (low,
+            high) range.
+        n_points: Number of points.
+        seed: Seed of the sample.
+
+    Returns:
+        A list of `n_points` {name: value} points.
+    """
+    names = list(space)
+    rng = np.random.default_rng(seed)
+    strata = rng.permuted(np.tile(np.arange(n_points), (len(names), 1)), axis=1).T
+    unit = (strata + rng.random((n_points, len(names)))) / n_points
+    low = np.array([space[name][0] for name in names], dtype=np.float64)
+    high = np.array([space[name][1] for name in names], dtype=np.float64)
+    return [dict(zip(names, row)) for row in (low + unit * (high - low)).tolist()]
+
+
+def apply_parameters(model, point):
+    """
+    Set a sweep point's parameters on a model that has not stepped yet.
+
+    Args:
+        model: A MigrationModel.
+        point: Mapping of parameter name to value. Names are MigrationModel.PARAMETERS,
+            or 'layoff_probabilities.<stage>' to set one adoption stage's probability.
+
+    Raises:
+        ValueError: If a name is not a sweepable parameter.
+    """
+    for name, value in point.items():
+        attribute, key = _parameter(name)
+        if key:
+            value = dict(getattr(model, attribute), **{key: value})
+        setattr(model, attribute, value)
+
+
+def _parameter(name):
+    """Split a sweep parameter name into (model attribute, stage key or '')."""
+    attribute, _, key = name.partition('.')
+    if attribute not in MigrationModel.PARAMETERS or (key and attribute != 'layoff_probabilities'):
+        raise ValueError(f"Unknown sweep parameter {name!r}; expected one of {MigrationModel.PARAMETERS}")
+    return attribute, key
+
+
+def run_point(model, point, steps):
+    """
+    Apply `point` to `model`, run it and return its model-level series.
+
+    Returns:
+        A dict mapping each model-level column to an array with one value per step.
+    """
+    apply_parameters(model, point)
+    for _ in range(steps):
+        model.step()
+    df = model.datacollector.get_model_vars_dataframe()
+    return {name: df[name].to_numpy(dtype=np.float64) for name in df.columns}
+
+
+def _run_forked_point(connection, model, point, steps):
+    """Body of a forked sweep worker: run its copy of the base model and send the series."""
+    try:
+        connection.send(('ok', run_point(model, point, steps)))
+    except BaseException:
+        connection.send(('error', traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+class SweepResult:
+    """
+    Outcome of a parameter sweep.
+
+    Attributes:
+        design: DataFrame of the sweep points, one row per point.
+        seeds: Mapping of replicate index to its seed.
+        series: Mapping of (point index, replicate index) to the run's series
+            dict (model-level column to per-step array).
+        failures: Mapping of (point index, replicate index) to the error of
+            runs that failed.
+    """
+    def __init__(self, design, seeds):
+        self.design = pd.DataFrame(design, index=pd.RangeIndex(len(design), name='Point'))
+        self.seeds = seeds
+        self.series = {}
+        self.failures = {}
+
+    def summary(self, metric, statistic='last'):
+        """
+        The design with the mean and standard deviation of one metric over replicates.
+
+        Args:
+            metric: A model-level column, e.g. 'UnemploymentRate'.
+            statistic: 'last' for each run's final value, or 'mean' for its
+                average over steps.
+
+        Returns:
+            The design DataFrame with `metric` mean and std columns added.
+        """
+        reduce = {'last': lambda values: values[-1], 'mean': np.mean}[statistic]
+        values = {}
+        for (point, _), series in self.series.items():
+            values.setdefault(point, []).append(float(reduce(series[metric])))
+        df = self.design.copy()
+        df[metric] = pd.Series({point: np.mean(v) for point, v in values.items()}, dtype=np.float64)
+        df[f"{metric}_std"] = pd.Series(
+            {point: np.std(v, ddof=1) if len(v) > 1 else np.nan for point, v in values.items()}, dtype=np.float64)
+        return df
+
+
+class SweepRunner:
+    """
+    Runs MigrationModel over a design of behavioural parameter values, building
+    each replicate's population only once.
+
+    For every replicate, one base model is constructed (population generation
+    and agent setup) and every sweep point runs a copy of it with the point's
+    parameters applied. Where the platform can fork, each point runs in a
+    forked worker process that shares the base model's memory copy-on-write, so
+    a point costs only its simulation. Otherwise points run in turn on clones
+    restored from a checkpoint of the base model.
+
+    All points of a replicate share its seed, population and random stream
+    states (common random numbers), so differences between points are due to
+    the parameters rather than to sampling noise. Replicate seeds are spawned
+    from one base seed with numpy's SeedSequence, as in BatchRunner.
+
+    Args:
+        model_params: Keyword arguments for MigrationModel (without `seed`).
+        design: Sequence of points ({parameter: value} mappings), e.g. from
+            `grid_design` or `latin_hypercube_design`.
+        steps: Number of steps per run.
+        n_replicates: Number of replicates (base models) per point.
+        seed: Base seed from which replicate seeds are spawned.
+        max_workers: Concurrent forked workers; defaults to the number of CPUs.
+        fork: Whether to run points in forked workers; defaults to whether the
+            'fork' start method is available.
+
+    Raises:
+        ValueError: If a point names an unknown parameter, or `model_params`
+            streams output to disk, which the runs of a sweep cannot share.
+    """
+    def __init__(self, model_params, design, steps, n_replicates=1, seed=0, max_workers=None, fork=None):
+        if model_params.get('output_dir') is not None:
+            raise ValueError("Sweep runs keep their output in memory; output_dir is not supported")
+        self.model_params = dict(model_params)
+        self.design = [dict(point) for point in design]
+        for point in self.design:
+            for name in point:
+                _parameter(name)
+        self.steps = steps
+        self.n_replicates = n_replicates
+        self.max_workers = max_workers or os.cpu_count()
+        self.fork = 'fork' in multiprocessing.get_all_start_methods() if fork is None else fork
+        children = np.random.SeedSequence(seed).spawn(n_replicates)
+        self.seeds = [int(child.generate_state(1)[0]) for child in children]
+
+    def run(self, callback=None):
+        """
+        Run every point of every replicate.
+
+        Args:
+            callback: Optional function called as callback(point, replicate,
+                series) as each run completes.
+
+        Returns:
+            A SweepResult.
+        """
+        result = SweepResult(self.design, dict(enumerate(self.seeds)))
+        for replicate, seed in enumerate(self.seeds):
+            base = MigrationModel(**self.model_params, seed=seed)
+            runs = self._forked(base) if self.fork else self._cloned(base)
+            for point, status, payload in runs:
+                if status == 'ok':
+                    result.series[(point, replicate)] = payload
+                    if callback is not None:
+                        callback(point, replicate, payload)
+                else:
+                    result.failures[(point, replicate)] = payload
+        return result
+
+    def _cloned(self, base):
+        """Run the points in turn, each on a model restored from a checkpoint of `base`."""
+        checkpoint = Checkpoint.capture(base)
+        for point, parameters in enumerate(self.design):
+            try:
+                yield point, 'ok', run_point(checkpoint.restore(), parameters, self.steps)
+            except Exception:
+                yield point, 'error', traceback.format_exc()
+
+    def _forked(self, base):
+        """Run the points in forked workers sharing `base` copy-on-write, at most max_workers at a time."""
+        context = multiprocessing.get_context('fork')
+        pending = list(range(len(self.design)))
+        running = {}
+        while pending or running:
+            while pending and len(running) < self.max_workers:
+                point = pending.pop(0)
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=_run_forked_point,
+                                          args=(sender, base, self.design[point], self.steps), daemon=True)
+                process.start()
+                sender.close()
+                running[receiver] = (point, process)
+            for connection in wait(list(running)):
+                point, process = running.pop(connection)
+                try:
+                    status, payload = connection.recv()
+                except EOFError:
+                    status, payload = 'error', None
+                connection.close()
+                process.join()
+                if payload is None:
+                    payload = f"worker exited with code {process.exitcode}"
+                yield point, status, payload
@@ -1,126 +1,233 @@
 import numpy as np
 
-def generate_firm_data(num_firms, region_ids):
+# Version of the generated populations. Bump it whenever a change here alters
+# the columns drawn for a given seed, so cached populations are regenerated.
+GENERATOR_VERSION = 1
+
+# Attribute names in the positional order of each agent constructor (after
+# unique_id and model), so columns can be zipped straight into agents.
+FIRM_FIELDS = (
+    'industry', 'size_category', 'age', 'remote_work_policy', 'ai_adoption_stage',
+    'revenue_growth', 'labor_intensity', 'geographic_footprint', 'automation_investment',
+    'total_workers', 'layoff_history', 'hiring_projections', 'wage_structure', 'msa',
+)
+REGION_FIELDS = (
+    'unique_id', 'unemployment_rate', 'wage_growth', 'job_openings_rate', 'skills_mismatch',
+    'median_price', 'rent_burden', 'construction_permits', 'vacancy_rates',
+    'population_growth', 'in_migration', 'out_migration', 'age_distribution',
+    'gdp_growth', 'productivity', 'industry_diversification', 'startup_density',
+    'minimum_wage', 'right_to_work', 'remote_work_incentives', 'retraining_funding',
+)
+INDIVIDUAL_FIELDS = (
+    'age', 'education', 'race_ethnicity', 'marital_status', 'household_size', 'homeownership',
+    'soc_code', 'industry_naics', 'ai_exposure_index', 'wage_percentile', 'tenure',
+    'current_msa', 'commute_distance', 'housing_costs', 'local_network_strength',
+    'liquid_savings', 'debt_levels', 'equity_holdings', 'unemployment_benefits_eligible',
+    'climate_preference', 'urban_rural_preference', 'family_proximity_weight',
+)
+
+
+def _generator(rng):
+    """
+    The Generator to draw from: `rng` itself, one seeded with `rng` if it is a
+    seed, or with None one seeded from the global np.random state, so callers
+    that seed with np.random.seed(...) still get reproducible data.
+    """
+    if rng is None:
+        return np.random.default_rng(np.random.randint(0, 2**32, size=4, dtype=np.uint64))
+    return np.random.default_rng(rng)
+
+
+def generate_firm_columns(num_firms, region_ids, rng=None):
+    """
+    Generates firm agent attributes as columns, drawing each attribute for all
+    firms in a single NumPy call.
+
+    Args:
+        num_firms: The number of firm agents to generate.
+        region_ids: A sequence of regional agent unique_ids (e.g., MSA codes) for location assignment.
+        rng: numpy Generator or seed to draw from; defaults to the global
+            np.random state (see `_generator`).
+
+    Returns:
+        A dict mapping each name in FIRM_FIELDS to an array of length num_firms.
+    """
+    rng = _generator(rng)
+    n = num_firms
+    return {
+        # Characteristics
+        'industry': rng.choice(['tech', 'finance', 'manufacturing', 'retail', 'healthcare'], size=n),
+        'size_category': rng.choice(['small', 'medium', 'large'], size=n, p=[0.6, 0.3, 0.1]),
+        'age': rng.integers(1, 50, size=n),
+        'remote_work_policy': rng.choice(['none', 'hybrid', 'full'], size=n),
+        'ai_adoption_stage': rng.choice(['none', 'early', 'mature'], size=n),
+        # Economics
+        'revenue_growth': rng.uniform(-0.05, 0.15, size=n),
+        'labor_intensity': rng.uniform(0.2, 0.8, size=n),
+        'geographic_footprint': rng.choice(['local', 'national', 'global'], size=n),
+        'automation_investment': rng.lognormal(mean=12, sigma=2.0, size=n),
+        # Employment
+        'total_workers': rng.integers(10, 10000, size=n),
+        'layoff_history': rng.choice([True, False], size=n),
+        'hiring_projections': rng.uniform(-0.1, 0.1, size=n),
+        'wage_structure': rng.choice(['below_market', 'market_rate', 'above_market'], size=n),
+        # Location
+        'msa': rng.choice(np.asarray(region_ids), size=n),
+    }
+
+
+def generate_regional_columns(num_regions, rng=None):
+    """
+    Generates regional agent attributes as columns, drawing each attribute for all
+    regions in a single NumPy call.
+
+    Args:
+        num_regions: The number of regional agents to generate.
+        rng: numpy Generator or seed to draw from; defaults to the global
+            np.random state (see `_generator`).
+
+    Returns:
+        A dict mapping each name in REGION_FIELDS to an array of length num_regions.
+    """
+    rng = _generator(rng)
+    n = num_regions
+    age_distribution = np.empty(n, dtype=object)
+    for i in range(n):
+        age_distribution[i] = {'18-34': 0.3, '35-54': 0.4, '55+': 0.3} # Simplified
+    return {
+        'unique_id': np.char.add('MSA', np.arange(1, n + 1).astype(str)),
+        # Labor Markets
+        'unemployment_rate': rng.uniform(0.02, 0.1, size=n),
+        'wage_growth': rng.uniform(0.01, 0.05, size=n),
+        'job_openings_rate': rng.uniform(0.02, 0.08, size=n),
+        'skills_mismatch': rng.uniform(0.1, 0.5, size=n),
+        # Housing
+        'median_price': rng.lognormal(mean=12.5, sigma=0.4, size=n),
+        'rent_burden': rng.uniform(0.2, 0.5, size=n),
+        'construction_permits': rng.integers(100, 10000, size=n),
+        'vacancy_rates': rng.uniform(0.01, 0.15, size=n),
+        # Demographics
+        'population_growth': rng.uniform(-0.01, 0.03, size=n),
+        'in_migration': rng.integers(500, 50000, size=n),
+        'out_migration': rng.integers(500, 50000, size=n),
+        'age_distribution': age_distribution,
+        # Economics
+        'gdp_growth': rng.uniform(-0.02, 0.06, size=n),
+        'productivity': rng.uniform(0.8, 1.5, size=n),
+        'industry_diversification': rng.uniform(0.3, 0.9, size=n),
+        'startup_density': rng.uniform(0.001, 0.05, size=n),
+        # Policy
+        'minimum_wage': rng.uniform(7.25, 20.0, size=n),
+        'right_to_work': rng.choice([True, False], size=n),
+        'remote_work_incentives': rng.choice([True, False], size=n),
+        'retraining_funding': rng.lognormal(mean=13, sigma=1.5, size=n),
+    }
+
+
+def generate_individual_columns(num_individuals, regions, rng=None):
+    """
+    Generates individual agent attributes as columns, drawing each attribute for
+    the whole population in a single NumPy call.
+
+    Args:
+        num_individuals: The number of individual agents to generate.
+        regions: A sequence of regional agent unique_ids (e.g., MSA codes) for location assignment.
+        rng: numpy Generator or seed to draw from; defaults to the global
+            np.random state (see `_generator`).
+
+    Returns:
+        A dict mapping each name in INDIVIDUAL_FIELDS to an array of length num_individuals.
+    """
+    rng = _generator(rng)
+    n = num_individuals
+    return {
+        # Demographics
+        'age': rng.integers(18, 65, size=n),
+        'education': rng.choice(['high_school', 'bachelor', 'master', 'phd'], size=n, p=[0.3, 0.5, 0.15, 0.05]),
+        'race_ethnicity': rng.choice(['white', 'black', 'hispanic', 'asian', 'other'], size=n, p=[0.6, 0.13, 0.18, 0.06, 0.03]),
+        'marital_status': rng.choice(['single', 'married'], size=n),
+        'household_size': rng.integers(1, 5, size=n),
+        'homeownership': rng.choice([True, False], size=n),
+        # Occupation
+        'soc_code': np.char.add('15-', rng.integers(1000, 2000, size=n).astype(str)),
+        'industry_naics': rng.choice(['54', '62', '44-45', '72', '31-33'], size=n),
+        'ai_exposure_index': rng.uniform(0, 1, size=n),
+        'wage_percentile': rng.uniform(0.1, 0.99, size=n),
+        'tenure': rng.uniform(0, 20, size=n),
+        # Location
+        'current_msa': rng.choice(np.asarray(regions), size=n),
+        'commute_distance': rng.uniform(5, 60, size=n),
+        'housing_costs': rng.uniform(800, 5000, size=n),
+        'local_network_strength': rng.uniform(0.1, 1.0, size=n),
+        # Financial
+        'liquid_savings': rng.lognormal(mean=9, sigma=1.5, size=n),
+        'debt_levels': rng.lognormal(mean=10, sigma=1.2, size=n),
+        'equity_holdings': rng.lognormal(mean=8, sigma=2.0, size=n),
+        'unemployment_benefits_eligible': rng.choice([True, False], size=n),
+        # Preferences
+        'climate_preference': rng.choice(['warm', 'moderate', 'cold'], size=n),
+        'urban_rural_preference': rng.choice(['urban', 'suburban', 'rural'], size=n),
+        'family_proximity_weight': rng.uniform(0, 1, size=n),
+    }
+
+
+def iter_rows(columns, fields):
+    """
+    Iterates over the rows of a column dict as tuples of Python scalars, in `fields` order.
+
+    Args:
+        columns: A dict of equal-length arrays, as returned by the generate_*_columns functions.
+        fields: The column names to include, in output order.
+    """
+    return zip(*(np.asarray(columns[name]).tolist() for name in fields))
+
+
+def columns_to_records(columns, fields):
+    """Converts a column dict into a list of per-agent dictionaries."""
+    return [dict(zip(fields, row)) for row in iter_rows(columns, fields)]
+
+
+def generate_firm_data(num_firms, region_ids, rng=None):
     """
     Generates a list of dictionaries, each representing a firm agent's attributes.
 
     Args:
         num_firms: The number of firm agents to generate.
         region_ids: A list of regional agent unique_ids (e.g., MSA codes) for location assignment.
+        rng: numpy Generator or seed to draw from; defaults to the global
+            np.random state, so np.random.seed(...) makes the data reproducible.
 
     Returns:
         A list of dictionaries with synthetic data for each firm.
     """
-    data = []
-    for _ in range(num_firms):
-        agent_data = {
-            # Characteristics
-            'industry': np.random.choice(['tech', 'finance', 'manufacturing', 'retail', 'healthcare']),
-            'size_category': np.random.choice(['small', 'medium', 'large'], p=[0.6, 0.3, 0.1]),
-            'age': np.random.randint(1, 50),
-            'remote_work_policy': np.random.choice(['none', 'hybrid', 'full']),
-            'ai_adoption_stage': np.random.choice(['none', 'early', 'mature']),
-            # Economics
-            'revenue_growth': np.random.uniform(-0.05, 0.15),
-            'labor_intensity': np.random.uniform(0.2, 0.8),
-            'geographic_footprint': np.random.choice(['local', 'national', 'global']),
-            'automation_investment': np.random.lognormal(mean=12, sigma=2.0),
-            # Employment
-            'total_workers': np.random.randint(10, 10000),
-            'layoff_history': np.random.choice([True, False]),
-            'hiring_projections': np.random.uniform(-0.1, 0.1),
-            'wage_structure': np.random.choice(['below_market', 'market_rate', 'above_market']),
-            # Location
-            'msa': np.random.choice(region_ids),
-        }
-        data.append(agent_data)
-    return data
-
-
-def generate_regional_data(num_regions):
+    return columns_to_records(generate_firm_columns(num_firms, region_ids, rng), FIRM_FIELDS)
+
+
+def generate_regional_data(num_regions, rng=None):
     """
     Generates a list of dictionaries, each representing a regional agent's attributes.
 
     Args:
         num_regions: The number of regional agents to generate.
+        rng: numpy Generator or seed to draw from; defaults to the global
+            np.random state, so np.random.seed(...) makes the data reproducible.
 
     Returns:
         A list of dictionaries with synthetic data for each region.
     """
-    data = []
-    for i in range(num_regions):
-        agent_data = {
-            'unique_id': f'MSA{i+1}',
-            # Labor Markets
-            'unemployment_rate': np.random.uniform(0.02, 0.1),
-            'wage_growth': np.random.uniform(0.01, 0.05),
-            'job_openings_rate': np.random.uniform(0.02, 0.08),
-            'skills_mismatch': np.random.uniform(0.1, 0.5),
-            # Housing
-            'median_price': np.random.lognormal(mean=12.5, sigma=0.4),
-            'rent_burden': np.random.uniform(0.2, 0.5),
-            'construction_permits': np.random.randint(100, 10000),
-            'vacancy_rates': np.random.uniform(0.01, 0.15),
-            # Demographics
-            'population_growth': np.random.uniform(-0.01, 0.03),
-            'in_migration': np.random.randint(500, 50000),
-            'out_migration': np.random.randint(500, 50000),
-            'age_distribution': {'18-34': 0.3, '35-54': 0.4, '55+': 0.3}, # Simplified
-            # Economics
-            'gdp_growth': np.random.uniform(-0.02, 0.06),
-            'productivity': np.random.uniform(0.8, 1.5),
-            'industry_diversification': np.random.uniform(0.3, 0.9),
-            'startup_density': np.random.uniform(0.001, 0.05),
-            # Policy
-            'minimum_wage': np.random.uniform(7.25, 20.0),
-            'right_to_work': np.random.choice([True, False]),
-            'remote_work_incentives': np.random.choice([True, False]),
-            'retraining_funding': np.random.lognormal(mean=13, sigma=1.5),
-        }
-        data.append(agent_data)
-    return data
-
-def generate_individual_data(num_individuals, regions):
+    return columns_to_records(generate_regional_columns(num_regions, rng), REGION_FIELDS)
+
+def generate_individual_data(num_individuals, regions, rng=None):
     """
     Generates a list of dictionaries, each representing an individual agent's attributes.
-    
+
     Args:
         num_individuals: The number of individual agents to generate.
         regions: A list of regional agent unique_ids (e.g., MSA codes) for location assignment.
+        rng: numpy Generator or seed to draw from; defaults to the global
+            np.random state, so np.random.seed(...) makes the data reproducible.
 
     Returns:
         A list of dictionaries with synthetic data for each individual.
     """
-    data = []
-    for _ in range(num_individuals):
-        agent_data = {
-            # Demographics
-            'age': np.random.randint(18, 65),
-            'education': np.random.choice(['high_school', 'bachelor', 'master', 'phd'], p=[0.3, 0.5, 0.15, 0.05]),
-            'race_ethnicity': np.random.choice(['white', 'black', 'hispanic', 'asian', 'other'], p=[0.6, 0.13, 0.18, 0.06, 0.03]),
-            'marital_status': np.random.choice(['single', 'married']),
-            'household_size': np.random.randint(1, 5),
-            'homeownership': np.random.choice([True, False]),
-            # Occupation
-            'soc_code': f"15-{np.random.randint(1000, 2000)}",
-            'industry_naics': np.random.choice(['54', '62', '44-45', '72', '31-33']),
-            'ai_exposure_index': np.random.uniform(0, 1),
-            'wage_percentile': np.random.uniform(0.1, 0.99),
-            'tenure': np.random.uniform(0, 20),
-            # Location
-            'current_msa': np.random.choice(regions),
-            'commute_distance': np.random.uniform(5, 60),
-            'housing_costs': np.random.uniform(800, 5000),
-            'local_network_strength': np.random.uniform(0.1, 1.0),
-            # Financial
-            'liquid_savings': np.random.lognormal(mean=9, sigma=1.5),
-            'debt_levels': np.random.lognormal(mean=10, sigma=1.2),
-            'equity_holdings': np.random.lognormal(mean=8, sigma=2.0),
-            'unemployment_benefits_eligible': np.random.choice([True, False]),
-            # Preferences
-            'climate_preference': np.random.choice(['warm', 'moderate', 'cold']),
-            'urban_rural_preference': np.random.choice(['urban', 'suburban', 'rural']),
-            'family_proximity_weight': np.random.uniform(0, 1),
-        }
-        data.append(agent_data)
-    return data
+    return columns_to_records(generate_individual_columns(num_individuals, regions, rng), INDIVIDUAL_FIELDS)
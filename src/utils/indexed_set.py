@@ -0,0 +1,61 @@
+class IndexedSet:
+    """
+    A set supporting O(1) add, remove and uniform random choice.
+
+    Items are kept in a dense list next to a map of their positions. Removing an
+    item moves the last element into its slot before popping, so the list never
+    has holes and `choice` can index it directly.
+
+    Attributes:
+        items: The dense list of members, in arbitrary order. Treat as read-only.
+    """
+    __slots__ = ('items', '_positions')
+
+    def __init__(self, items=()):
+        self.items = []
+        self._positions = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        """Add an item. Returns False if it was already present."""
+        if item in self._positions:
+            return False
+        self._positions[item] = len(self.items)
+        self.items.append(item)
+        return True
+
+    def remove(self, item):
+        """Remove an item, raising KeyError if it is not present."""
+        position = self._positions.pop(item)
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self._positions[last] = position
+
+    def discard(self, item):
+        """Remove an item if present. Returns True if it was removed."""
+        if item not in self._positions:
+            return False
+        self.remove(item)
+        return True
+
+    def choice(self, rng):
+        """Return a uniformly random member using `rng.choice` (IndexError if empty)."""
+        return rng.choice(self.items)
+
+    def clear(self):
+        self.items.clear()
+        self._positions.clear()
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(list(self.items))
+
+    def __repr__(self):
+        return f"IndexedSet({self.items!r})"
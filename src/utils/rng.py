@@ -0,0 +1,220 @@
+import random
+import zlib
+
+import numpy as np
+
+# Independent streams spawned, in this order, from each model's root seed
+STREAMS = ('generation', 'schedule', 'firms', 'individuals', 'regions', 'engine')
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _splitmix64(x):
+    """splitmix64 finaliser over uint64 arrays (arithmetic wraps modulo 2**64)."""
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(_GOLDEN)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _splitmix64_int(x):
+    """splitmix64 finaliser over a Python int, bit-identical to `_splitmix64`."""
+    x = (x + _GOLDEN) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def counter_bits(key, agent_ids, step, draw=0):
+    """
+    64 random bits per agent, computed as a hash of (key, agent id, step, draw).
+
+    The result depends only on its inputs, never on how many other draws were made
+    or in which order, so the same agent gets the same bits whether it is stepped
+    alone, in a batch, in another process or by a vectorized engine.
+
+    Args:
+        key: 64-bit stream key (see RandomStreams.counter_key).
+        agent_ids: Integer agent id or array of ids.
+        step: The model step.
+        draw: Index of the draw within the (agent, step).
+
+    Returns:
+        A uint64 array shaped like `agent_ids`.
+    """
+    ids = np.asarray(agent_ids).astype(np.uint64)
+    counter = _splitmix64(np.uint64(step & _MASK64) ^ _splitmix64(np.uint64(draw & _MASK64)))
+    return _splitmix64(np.uint64(key) ^ _splitmix64(ids ^ counter))
+
+
+def counter_uniforms(key, agent_ids, step, draw=0):
+    """Uniform floats in [0, 1) per agent, from `counter_bits`."""
+    return (counter_bits(key, agent_ids, step, draw) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+class GeneratorRandom(random.Random):
+    """
+    A random.Random backed by a numpy Generator.
+
+    Lets code written against the standard-library API (`random`, `randint`,
+    `choice`, `sample`, `shuffle`) draw from a numpy Generator, so one seeded
+    SeedSequence hierarchy drives both scalar and vectorized code. The adapter
+    shares the Generator it wraps.
+
+    Args:
+        generator: The numpy Generator to draw from; defaults to a fresh one.
+    """
+    def __init__(self, generator=None):
+        self.generator = np.random.default_rng() if generator is None else generator
+        super().__init__()
+
+    def seed(self, a=None, version=2):
+        # random.Random.__init__ calls seed(); keep the wrapped generator then
+        if a is not None or not hasattr(self, 'generator'):
+            self.generator = np.random.default_rng(a)
+
+    def random(self):
+        return float(self.generator.random())
+
+    def getrandbits(self, k):
+        if k <= 64:
+            return int(self.generator.integers(0, 1 << k, dtype=np.uint64, endpoint=False)) if k else 0
+        return int.from_bytes(self.generator.bytes((k + 7) // 8), 'little') >> (-k % 8)
+
+    def getstate(self):
+        return self.generator.bit_generator.state
+
+    def setstate(self, state):
+        self.generator.bit_generator.state = state
+
+    def __reduce__(self):
+        # Pickle the Generator itself so sharing with other holders survives a round trip
+        return (self.__class__, (self.generator,))
+
+
+class CounterRandom(random.Random):
+    """
+    A random.Random whose draws are `counter_bits` of one (key, agent, step).
+
+    Successive calls use draw indices 0, 1, 2, ... `random()` and `randint()`
+    consume one draw each and match `counter_uniforms` with the same draw index,
+    so vectorized code can reproduce them exactly.
+
+    Args:
+        key: 64-bit stream key.
+        agent_id: Integer id of the agent drawing.
+        step: The model step.
+    """
+    def __new__(cls, *args, **kwargs):
+        # random.Random.__new__ accepts at most one positional argument
+        return super().__new__(cls)
+
+    def __init__(self, key=0, agent_id=0, step=0):
+        self.key = key
+        self.agent_id = agent_id
+        self.step = step
+        self.draws = 0
+        super().__init__()
+
+    def seed(self, a=None, version=2):
+        pass
+
+    def _bits(self):
+        counter = _splitmix64_int(self.step & _MASK64 ^ _splitmix64_int(self.draws))
+        self.draws += 1
+        return _splitmix64_int(self.key ^ _splitmix64_int((self.agent_id & _MASK64) ^ counter))
+
+    def random(self):
+        return (self._bits() >> 11) * (1.0 / (1 << 53))
+
+    def randint(self, a, b):
+        """Integer in [a, b] as a + floor(u * (b - a + 1)) for one uniform draw u."""
+        return a + int(self.random() * (b - a + 1))
+
+    def getrandbits(self, k):
+        value, bits = 0, 0
+        while bits < k:
+            value |= self._bits() << bits
+            bits += 64
+        return value & ((1 << k) - 1)
+
+    def getstate(self):
+        return (self.key, self.agent_id, self.step, self.draws)
+
+    def setstate(self, state):
+        self.key, self.agent_id, self.step, self.draws = state
+
+    def __reduce__(self):
+        return (self.__class__, (), self.getstate())
+
+    def __setstate__(self, state):
+        self.setstate(state)
+
+
+class RandomStreams:
+    """
+    The seeded random number generators of one model.
+
+    A root SeedSequence spawns one independent numpy Generator per name in
+    STREAMS, each also exposed through a random.Random adapter. Per-agent
+    draws go through `agent_random`. By default that returns the shared stream
+    of the agent's type. With `counter=True` it returns a CounterRandom keyed
+    by (stream, purpose, agent, step), so an agent's decisions do not depend on
+    activation order or execution mode.
+
+    Args:
+        seed: Root seed (int, sequence of ints or SeedSequence); None draws fresh entropy.
+        counter: Use counter-based per-agent draws.
+
+    Attributes:
+        seed_sequence: The root SeedSequence.
+        counter: Whether per-agent draws are counter-based.
+    """
+    def __init__(self, seed=None, counter=False):
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.counter = counter
+        children = self.seed_sequence.spawn(len(STREAMS) + 1)
+        self._generators = {name: np.random.default_rng(child) for name, child in zip(STREAMS, children)}
+        self._randoms = {name: GeneratorRandom(generator) for name, generator in self._generators.items()}
+        self._counter_root = int(children[-1].generate_state(1, dtype=np.uint64)[0])
+        self._keys = {}
+
+    def generator(self, name):
+        """The numpy Generator of stream `name`."""
+        return self._generators[name]
+
+    def random(self, name):
+        """The random.Random adapter over stream `name`."""
+        return self._randoms[name]
+
+    def counter_key(self, name, purpose):
+        """64-bit key of the counter-based stream for one stream and purpose."""
+        key = self._keys.get((name, purpose))
+        if key is None:
+            label = zlib.crc32(f"{name}/{purpose}".encode())
+            key = self._keys[(name, purpose)] = _splitmix64_int(self._counter_root ^ label)
+        return key
+
+    def agent_random(self, name, purpose, agent_id, step):
+        """
+        Source of randomness for one decision of one agent.
+
+        Args:
+            name: The agent type's stream, e.g. 'firms'.
+            purpose: Label of the decision, e.g. 'layoff'; decisions with different
+                purposes never share counter-based draws.
+            agent_id: Integer id of the agent.
+            step: The model step.
+        """
+        if not self.counter:
+            return self._randoms[name]
+        return CounterRandom(self.counter_key(name, purpose), agent_id, step)
+
+    def uniforms(self, name, purpose, agent_ids, step, draw=0):
+        """
+        Vectorized counterpart of `agent_random(...).random()` for many agents,
+        for the `draw`-th draw of each agent's CounterRandom.
+        """
+        return counter_uniforms(self.counter_key(name, purpose), agent_ids, step, draw)
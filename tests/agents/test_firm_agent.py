@@ -3,7 +3,8 @@ from unittest.mock import MagicMock, patch
 
 from src.agents.firm import FirmAgent
 from src.agents.individual import IndividualAgent
-from src.simulation.job_market import JobVacancy
+from src.simulation.job_market import JobMarket, JobVacancy
+from src.utils.indexed_set import IndexedSet
 
 class TestFirmAgent(unittest.TestCase):
 
@@ -11,7 +12,11 @@ class TestFirmAgent(unittest.TestCase):
         """Set up a mock model and agents for testing."""
         self.mock_model = MagicMock()
         self.mock_model.random = MagicMock()
-        self.mock_model.job_board = []
+        # Every decision draws from the mocked random source
+        self.mock_model.streams.agent_random.return_value = self.mock_model.random
+        self.mock_model.job_market = JobMarket()
+        self.mock_model.layoff_probabilities = dict(FirmAgent.LAYOFF_PROBABILITIES)
+        self.mock_model.vacancy_rate = FirmAgent.VACANCY_RATE
 
         # Create mock employees first, providing all required arguments
         self.employee1 = IndividualAgent(
@@ -31,6 +36,8 @@ class TestFirmAgent(unittest.TestCase):
             family_proximity_weight=0.8, employer_id=101
         )
         self.mock_model.schedule.agents = [self.employee1, self.employee2]
+        self.mock_model.agent_id_map = {self.employee1.unique_id: self.employee1,
+                                        self.employee2.unique_id: self.employee2}
 
         # Correctly instantiate FirmAgent with all required arguments
         self.firm = FirmAgent(
@@ -51,7 +58,7 @@ class TestFirmAgent(unittest.TestCase):
             hiring_projections={},
             wage_structure={}
         )
-        self.firm.employees = [self.employee1.unique_id, self.employee2.unique_id]
+        self.firm.employees = IndexedSet([self.employee1.unique_id, self.employee2.unique_id])
 
     def test_layoff_logic(self):
         """Test that an employee is laid off based on AI adoption."""
@@ -65,16 +72,44 @@ class TestFirmAgent(unittest.TestCase):
         self.assertIsNone(self.employee1.employer_id, "Employee1's employer_id should be None")
         self.assertNotIn(self.employee1.unique_id, self.firm.employees, "Employee1 should be removed from firm's employee list")
         self.assertTrue(self.employee2.is_employed, "Employee2 should not have been laid off")
+        self.assertEqual(self.firm.total_workers, 1)
+
+    def test_layoff_skips_unknown_employee(self):
+        """Test that a roster id missing from agent_id_map leaves the firm unchanged."""
+        self.firm.ai_adoption_stage = 'mature'
+        self.mock_model.random.random.return_value = 0.01
+        self.mock_model.random.choice.return_value = 999
+        self.mock_model.record_remote_layoff.return_value = False
+        self.firm.employees.add(999)
+
+        self.firm.layoff_logic()
+
+        self.assertEqual(len(self.firm.employees), 3)
+        self.assertEqual(self.firm.total_workers, 2)
+
+    def test_layoff_of_remote_employee(self):
+        """Test that a remote employee is dropped when the model accepts the layoff."""
+        self.firm.ai_adoption_stage = 'mature'
+        self.mock_model.random.random.return_value = 0.01
+        self.mock_model.random.choice.return_value = 999
+        self.mock_model.record_remote_layoff.return_value = True
+        self.firm.employees.add(999)
+
+        self.firm.layoff_logic()
+
+        self.mock_model.record_remote_layoff.assert_called_once_with(999, self.firm)
+        self.assertNotIn(999, self.firm.employees)
+        self.assertEqual(self.firm.total_workers, 1)
 
     def test_post_job_vacancy(self):
         """Test that a job vacancy is posted to the job board."""
         self.mock_model.random.random.return_value = 0.01 # Ensure vacancy post check passes
-        self.assertEqual(len(self.mock_model.job_board), 0)
+        self.assertEqual(len(self.mock_model.job_market), 0)
 
         self.firm.post_job_vacancy()
 
-        self.assertEqual(len(self.mock_model.job_board), 1, "A vacancy should have been posted")
-        vacancy = self.mock_model.job_board[0]
+        self.assertEqual(len(self.mock_model.job_market), 1, "A vacancy should have been posted")
+        vacancy = next(iter(self.mock_model.job_market))
         self.assertIsInstance(vacancy, JobVacancy)
         self.assertEqual(vacancy.firm_id, self.firm.unique_id)
         self.assertEqual(vacancy.msa, self.firm.msa)
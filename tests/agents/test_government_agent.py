@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.agents.government import GovernmentAgent
+from src.simulation.policy import ExtendedBenefits, RelocationGrant, Retraining
+
+class TestGovernmentAgent(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a mock model and a government with one policy of each program."""
+        self.mock_model = MagicMock()
+        self.grant = RelocationGrant('grant', 5000)
+        self.retraining = Retraining('retraining', 2000, target_soc='15-1252')
+        self.benefits = ExtendedBenefits('benefits', 400)
+        self.government = GovernmentAgent(
+            unique_id=1, model=self.mock_model, level='state',
+            relocation_incentives={'grant': self.grant},
+            retraining_programs={'retraining': self.retraining},
+            benefit_programs={'benefits': self.benefits},
+            jurisdiction=['MSA1', 'MSA2'],
+        )
+
+    def test_initialization(self):
+        """Test that the government keeps its level, jurisdiction and programs."""
+        self.assertEqual(self.government.level, 'state')
+        self.assertEqual(self.government.jurisdiction, frozenset({'MSA1', 'MSA2'}))
+        self.assertEqual(GovernmentAgent(2, self.mock_model, level='federal').jurisdiction, None)
+        self.assertEqual(self.government.regional_development_strategies, {})
+
+    def test_step_runs_each_policy(self):
+        """Test that a step runs every policy through the model's policy engine, in program order."""
+        self.government.step()
+        runs = [call.args for call in self.mock_model.policy_engine.run.call_args_list]
+        self.assertEqual(runs, [(self.government, self.grant), (self.government, self.retraining),
+                                (self.government, self.benefits)])
+
+if __name__ == '__main__':
+    unittest.main()
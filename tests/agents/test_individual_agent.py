@@ -1,9 +1,12 @@
 import unittest
 from unittest.mock import MagicMock
 
+from src.agents.firm import FirmAgent
 from src.agents.individual import IndividualAgent
 from src.agents.regional import RegionalAgent
-from src.simulation.job_market import JobVacancy
+from src.simulation.job_market import JobMarket, JobVacancy
+from src.simulation.region_scores import RegionScoreTable
+from src.utils.indexed_set import IndexedSet
 
 class TestIndividualAgent(unittest.TestCase):
 
@@ -11,7 +14,11 @@ class TestIndividualAgent(unittest.TestCase):
         """Set up a mock model and agents for testing."""
         self.mock_model = MagicMock()
         self.mock_model.random = MagicMock()
-        self.mock_model.job_board = []
+        self.mock_model.random.choice.side_effect = lambda seq: seq[0]
+        # Every decision draws from the mocked random source
+        self.mock_model.streams.agent_random.return_value = self.mock_model.random
+        self.mock_model.job_market = JobMarket()
+        self.mock_model.migration_rate = IndividualAgent.MIGRATION_RATE
 
         # Create a dummy agent for testing
         self.agent = IndividualAgent(
@@ -19,22 +26,47 @@ class TestIndividualAgent(unittest.TestCase):
             model=self.mock_model,
             age=30,
             education=0.5,
+            race_ethnicity='A',
+            marital_status='M',
+            household_size=2,
+            homeownership=False,
             soc_code="15-1252",
+            industry_naics='54',
+            ai_exposure_index=0.8,
             wage_percentile=0.6,
+            tenure=5,
             current_msa="MSA1",
+            commute_distance=10,
             housing_costs=1500,
-            household_size=2,
+            local_network_strength=0.9,
+            liquid_savings=50000,
+            debt_levels=20000,
+            equity_holdings=10000,
+            unemployment_benefits_eligible=True,
             climate_preference=0.7,
-
+            urban_rural_preference=0.8,
+            family_proximity_weight=0.5,
             employer_id=None
         )
 
+        # Create a hiring firm
+        self.firm = FirmAgent(
+            unique_id=101, model=self.mock_model, msa="MSA1", industry="Tech", size_category="medium", age=5,
+            remote_work_policy=0.5, ai_adoption_stage='none', revenue_growth=0.03, labor_intensity=0.6,
+            geographic_footprint="national", automation_investment=50000, total_workers=0, layoff_history=[],
+            hiring_projections={}, wage_structure={}
+        )
+
         # Create mock regional agents
         self.region1 = RegionalAgent(unique_id="MSA1", model=self.mock_model, unemployment_rate=0.1, median_price=300000, wage_growth=0.01, job_openings_rate=0.05, skills_mismatch=0.2, rent_burden=0.4, construction_permits=100, vacancy_rates=0.05, population_growth=0.02, in_migration=0.01, out_migration=0.01, age_distribution={}, gdp_growth=0.02, productivity=1.1, industry_diversification=0.6, startup_density=0.3, minimum_wage=10, right_to_work=True, remote_work_incentives=False, retraining_funding=10000)
         self.region2 = RegionalAgent(unique_id="MSA2", model=self.mock_model, unemployment_rate=0.02, median_price=200000, wage_growth=0.02, job_openings_rate=0.08, skills_mismatch=0.1, rent_burden=0.3, construction_permits=150, vacancy_rates=0.03, population_growth=0.03, in_migration=0.02, out_migration=0.005, age_distribution={}, gdp_growth=0.03, productivity=1.2, industry_diversification=0.7, startup_density=0.4, minimum_wage=12, right_to_work=False, remote_work_incentives=True, retraining_funding=20000)
         
-        self.mock_model.agent_id_map = {"MSA1": self.region1, "MSA2": self.region2}
+        self.mock_model.agent_id_map = {"MSA1": self.region1, "MSA2": self.region2, 101: self.firm}
         self.mock_model.schedule.agents = [self.agent, self.region1, self.region2]
+        self.mock_model.regions = IndexedSet([self.region1, self.region2])
+        self.table = RegionScoreTable()
+        self.table.refresh([self.region1, self.region2])
+        self.mock_model.region_scores.return_value = self.table
 
     def test_search_for_job_success(self):
         """Test that an unemployed agent finds and accepts a matching job."""
@@ -43,35 +75,60 @@ class TestIndividualAgent(unittest.TestCase):
 
         # Add a matching job to the job board
         matching_vacancy = JobVacancy(firm_id=101, soc_code="15-1252", msa="MSA1")
-        self.mock_model.job_board.append(matching_vacancy)
+        vacancy_id = self.mock_model.job_market.post(matching_vacancy)
 
         self.agent.search_for_job()
 
         self.assertTrue(self.agent.is_employed)
         self.assertEqual(self.agent.employer_id, 101)
-        self.assertNotIn(matching_vacancy, self.mock_model.job_board)
+        self.assertIn(self.agent.unique_id, self.firm.employees)
+        self.assertNotIn(vacancy_id, self.mock_model.job_market)
 
     def test_search_for_job_no_match(self):
         """Test that an agent remains unemployed if no matching job is found."""
         # Add a non-matching job
         non_matching_vacancy = JobVacancy(firm_id=102, soc_code="29-1141", msa="MSA1")
-        self.mock_model.job_board.append(non_matching_vacancy)
+        vacancy_id = self.mock_model.job_market.post(non_matching_vacancy)
 
         self.agent.search_for_job()
 
         self.assertFalse(self.agent.is_employed)
-        self.assertIn(non_matching_vacancy, self.mock_model.job_board)
+        self.assertIn(vacancy_id, self.mock_model.job_market)
+
+    def test_search_for_job_broadens_to_other_msa(self):
+        """Test that an agent takes a matching job in another MSA if none is local."""
+        remote_vacancy = JobVacancy(firm_id=101, soc_code="15-1252", msa="MSA2")
+        vacancy_id = self.mock_model.job_market.post(remote_vacancy)
+
+        self.agent.search_for_job()
+
+        self.assertTrue(self.agent.is_employed)
+        self.assertNotIn(vacancy_id, self.mock_model.job_market)
 
     def test_decide_migration_success(self):
         """Test that an agent migrates to a more favorable region."""
         # Rig the random sample to return our desired candidate region
-        self.mock_model.random.sample.return_value = [self.region2]
+        self.mock_model.random.sample.return_value = [self.table.index["MSA2"]]
         
         self.assertEqual(self.agent.current_msa, "MSA1")
 
         self.agent.decide_migration()
 
         self.assertEqual(self.agent.current_msa, "MSA2")
+        self.assertEqual(self.agent.housing_costs, 200000 / 12)
+
+    def test_decide_migration_utility_can_keep_agent(self):
+        """Test that an individual-specific utility term can outweigh a better region score."""
+        def moving_cost(table, origins, candidates, movers):
+            return movers['liquid_savings'][:, None] / 1e5 * (candidates != origins[:, None])
+
+        table = RegionScoreTable(utility=moving_cost, mover_fields=('liquid_savings',))
+        table.refresh([self.region1, self.region2])
+        self.mock_model.region_scores.return_value = table
+        self.mock_model.random.sample.return_value = [table.index["MSA2"]]
+        self.agent.decide_migration()
+        self.assertEqual(self.agent.current_msa, "MSA1")
+        self.mock_model.record_move.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
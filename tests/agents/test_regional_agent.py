@@ -3,6 +3,8 @@ from unittest.mock import MagicMock
 
 from src.agents.regional import RegionalAgent
 from src.agents.individual import IndividualAgent
+from src.simulation.flows import MigrationFlows
+from src.simulation.residents import ResidentIndex
 
 class TestRegionalAgent(unittest.TestCase):
 
@@ -26,6 +28,10 @@ class TestRegionalAgent(unittest.TestCase):
         self.other_region_agent = self._create_mock_individual(3, 'MSA2', employer_id=102)
         
         self.mock_model.schedule.agents = [self.region, self.employed_agent, self.unemployed_agent, self.other_region_agent]
+        self.mock_model.residents = ResidentIndex()
+        for agent in (self.employed_agent, self.unemployed_agent, self.other_region_agent):
+            self.mock_model.residents.add(agent)
+        self.mock_model.flows = MigrationFlows(['MSA1', 'MSA2'])
 
     def _create_mock_individual(self, unique_id, msa, employer_id):
         """Helper to create a mock IndividualAgent with necessary attributes."""
@@ -48,5 +54,12 @@ class TestRegionalAgent(unittest.TestCase):
         self.region.step()
         self.assertAlmostEqual(self.region.unemployment_rate, 0.5)
 
+    def test_step_updates_migration_rates(self):
+        """Test that in- and out-migration are this step's flows per resident."""
+        self.mock_model.flows.record('MSA2', 'MSA1')
+        self.region.step()
+        self.assertAlmostEqual(self.region.in_migration, 0.5)
+        self.assertAlmostEqual(self.region.out_migration, 0.0)
+
 if __name__ == '__main__':
     unittest.main()
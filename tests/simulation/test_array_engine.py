@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from src.agents.individual import IndividualAgent
+from src.simulation.array_engine import pair_within_groups
+from src.simulation.model import MigrationModel
+
+N_REPLICATES = 12
+N_STEPS = 12
+SIZES = dict(n_individuals=300, n_firms=60, n_regions=6, n_governments=2)
+
+
+def run_trajectories(engine):
+    """Run seeded replicates and return model-level series as (replicate, step) arrays."""
+    series = {}
+    for seed in range(N_REPLICATES):
+        model = MigrationModel(**SIZES, engine=engine, seed=seed)
+        for _ in range(N_STEPS):
+            model.step()
+        df = model.datacollector.get_model_vars_dataframe()
+        for name in ('Employed', 'Layoffs', 'Movers', 'VacanciesPosted', 'Hires'):
+            series.setdefault(name, []).append(df[name].to_numpy())
+    return {name: np.array(values) for name, values in series.items()}
+
+
+class TestArrayEngineEquivalence(unittest.TestCase):
+    """Aggregate trajectories of the array engine should match the Mesa engine in distribution."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mesa = run_trajectories('mesa')
+        cls.array = run_trajectories('array')
+
+    def assert_same_mean(self, name, per_replicate, tolerance=4.0):
+        """Two-sample z-test on replicate totals, with a small absolute floor."""
+        a = per_replicate(self.mesa[name])
+        b = per_replicate(self.array[name])
+        se = np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b)) + 0.5
+        self.assertLess(abs(a.mean() - b.mean()), tolerance * se,
+                        f"{name}: mesa mean {a.mean():.2f} vs array mean {b.mean():.2f}")
+
+    def test_employment_trajectory(self):
+        """Test that final employment and cumulative layoffs agree."""
+        self.assert_same_mean('Employed', lambda x: x[:, -1])
+        self.assert_same_mean('Layoffs', lambda x: x.sum(axis=1))
+
+    def test_migration_and_vacancies(self):
+        """Test that cumulative moves, vacancies and hires agree."""
+        self.assert_same_mean('Movers', lambda x: x.sum(axis=1))
+        self.assert_same_mean('VacanciesPosted', lambda x: x.sum(axis=1))
+        self.assert_same_mean('Hires', lambda x: x.sum(axis=1))
+
+
+class TestArrayEngine(unittest.TestCase):
+
+    def test_state_stays_consistent(self):
+        """Test that rosters, residents and metrics agree with the columns after steps."""
+        model = MigrationModel(**SIZES, engine='array', debug=True, seed=3)
+        for _ in range(8):
+            model.step()  # debug mode cross-checks the resident index
+        individuals = [a for a in model.schedule.agents if isinstance(a, IndividualAgent)]
+        for agent in individuals:
+            if agent.is_employed:
+                self.assertIn(agent.unique_id, model.agent_id_map[agent.employer_id].employees)
+        self.assertEqual(model.metrics['Employed'], sum(a.is_employed for a in individuals))
+        self.assertEqual(len(model.job_market),
+                         model.metrics['VacanciesPosted'] - model.metrics['VacanciesFilled'])
+
+    def test_pair_within_groups(self):
+        """Test that pairing respects groups and priority order."""
+        left, right = pair_within_groups([1, 2, 1, 3], [1, 1, 1, 2])
+        pairs = sorted(zip(left.tolist(), right.tolist()))
+        self.assertEqual(pairs, [(0, 0), (1, 3), (2, 1)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import FIRST_COMPLETED, wait
+from unittest.mock import patch
+
+import numpy as np
+
+from src.simulation.batch import BatchRunner, SeriesAggregator, run_replicate
+
+PARAMS = dict(n_individuals=40, n_firms=5, n_regions=3, n_governments=1)
+
+
+def _fail_once(model_params, seed, steps):
+    """Raise on the first attempt of every replicate, then succeed."""
+    marker = os.path.join(model_params['marker_dir'], str(seed))
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        raise RuntimeError('transient failure')
+    return {'Value': np.full(steps, seed % 7, dtype=np.float64)}
+
+
+def _crash_once(model_params, seed, steps):
+    """Kill the worker process the first time any replicate runs."""
+    marker = os.path.join(model_params['marker_dir'], 'crashed')
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return {'Value': np.full(steps, seed % 7, dtype=np.float64)}
+
+
+def _crash_last(model_params, seed, steps):
+    """Kill the worker running the first replicate once every other replicate has finished."""
+    directory = model_params['marker_dir']
+    if seed == model_params['crash_seed'] and not os.path.exists(os.path.join(directory, 'crashed')):
+        open(os.path.join(directory, 'crashed'), 'w').close()
+        deadline = time.monotonic() + 10
+        while len(os.listdir(directory)) < model_params['n_replicates'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        os._exit(1)
+    open(os.path.join(directory, f"ran-{seed}"), 'w').close()
+    return {'Value': np.full(steps, seed % 7, dtype=np.float64)}
+
+
+def _always_fail(model_params, seed, steps):
+    raise RuntimeError('permanent failure')
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_replicates_aggregate_to_summary(self):
+        """Test that parallel replicates are reproducible and summarised correctly."""
+        runner = BatchRunner(PARAMS, steps=4, n_replicates=4, seed=1, max_workers=2)
+        streamed = []
+        result = runner.run(callback=lambda index, series: streamed.append(index))
+        self.assertEqual(sorted(result.completed), [0, 1, 2, 3])
+        self.assertEqual(sorted(streamed), [0, 1, 2, 3])
+        self.assertEqual(result.failures, {})
+
+        employed = result.aggregator.replicates('Employed')
+        self.assertEqual(employed.shape, (4, 4))
+        summary = result.summary()
+        self.assertEqual(list(summary.index), [1, 2, 3, 4])
+        np.testing.assert_allclose(summary[('Employed', 'mean')], employed.mean(axis=0))
+        np.testing.assert_allclose(summary[('Employed', 'std')], employed.std(axis=0, ddof=1))
+        self.assertTrue((summary[('Employed', 'ci_low')] <= summary[('Employed', 'ci_high')]).all())
+        np.testing.assert_allclose(summary[('Employed', 'q50')], np.median(employed, axis=0))
+
+        # A replicate rerun in this process with its seed gives the same series
+        index = result.completed[0]
+        np.testing.assert_array_equal(run_replicate(PARAMS, result.seeds[index], 4)['Employed'],
+                                      employed[result.completed.index(index)])
+
+    def test_failed_replicates_are_retried(self):
+        """Test that a replicate raising an exception is resubmitted."""
+        params = dict(marker_dir=self.tmp.name)
+        result = BatchRunner(params, steps=3, n_replicates=3, max_workers=2, run_fn=_fail_once).run()
+        self.assertEqual(sorted(result.completed), [0, 1, 2])
+        self.assertEqual(result.failures, {})
+
+    def test_recovers_from_broken_pool(self):
+        """Test that a dead worker does not lose completed or pending replicates."""
+        params = dict(marker_dir=self.tmp.name)
+        result = BatchRunner(params, steps=3, n_replicates=4, max_workers=2, run_fn=_crash_once).run()
+        self.assertEqual(sorted(result.completed), [0, 1, 2, 3])
+
+    def test_broken_pool_only_charges_lost_replicates(self):
+        """Test that replicates finished before the pool broke are kept and not charged a retry."""
+        def first_completed(futures, return_when):
+            # Report a single settled future at a time, the broken one first, as a busy parent might see them
+            done, not_done = wait(futures, return_when=return_when)
+            if return_when != FIRST_COMPLETED:
+                return done, not_done
+            first = min(done, key=lambda future: future.exception() is None)
+            return {first}, set(futures) - {first}
+
+        seeds = BatchRunner({}, steps=3, n_replicates=4).seeds
+        params = dict(marker_dir=self.tmp.name, crash_seed=seeds[0], n_replicates=4)
+        runner = BatchRunner(params, steps=3, n_replicates=4, max_workers=2, max_retries=0, run_fn=_crash_last)
+        with patch('src.simulation.batch.wait', first_completed):
+            result = runner.run(callback=lambda index, series: time.sleep(0.5))
+        self.assertEqual(sorted(result.completed), [1, 2, 3])
+        self.assertEqual(list(result.failures), [0])
+        self.assertIn('BrokenProcessPool', result.failures[0])
+
+    def test_exhausted_retries_are_reported(self):
+        """Test that replicates failing on every attempt are recorded, not raised."""
+        result = BatchRunner({}, steps=2, n_replicates=2, max_workers=1, max_retries=1,
+                             run_fn=_always_fail).run()
+        self.assertEqual(result.completed, [])
+        self.assertEqual(sorted(result.failures), [0, 1])
+        self.assertIn('permanent failure', result.failures[0])
+
+
+class TestSeriesAggregator(unittest.TestCase):
+
+    def test_online_moments_match_batch(self):
+        """Test that online means and variances equal the batch statistics."""
+        rng = np.random.default_rng(0)
+        data = rng.normal(size=(25, 6))
+        aggregator = SeriesAggregator(quantiles=(0.1, 0.9))
+        for row in data:
+            aggregator.add({'X': row})
+        summary = aggregator.summary()
+        np.testing.assert_allclose(summary[('X', 'mean')], data.mean(axis=0))
+        np.testing.assert_allclose(summary[('X', 'std')], data.std(axis=0, ddof=1))
+        np.testing.assert_allclose(summary[('X', 'q10')], np.quantile(data, 0.1, axis=0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.simulation.checkpoint import Checkpoint, load_checkpoint, save_checkpoint
+from src.simulation.model import MigrationModel
+from src.simulation.output import ShardedOutput
+
+SIZES = dict(n_individuals=200, n_firms=20, n_regions=5, n_governments=2)
+
+
+def _state(model):
+    """Everything a continued run must reproduce exactly."""
+    individuals = [(a.unique_id, a.current_msa, a.is_employed, a.employer_id, a.housing_costs)
+                   for a in model.individuals]
+    rosters = [(f.unique_id, list(f.employees)) for f in model.firms]
+    return (individuals, rosters, sorted(model.job_market.items()), model.random.getstate())
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _model(self, **kwargs):
+        model = MigrationModel(**SIZES, seed=11, **kwargs)
+        for _ in range(3):
+            model.step()
+        return model
+
+    def test_restored_run_continues_identically(self):
+        """Test that a restored model and the original stay identical step for step."""
+        for engine in MigrationModel.ENGINES:
+            model = self._model(engine=engine)
+            path = os.path.join(self.tmp.name, f"{engine}.ckpt")
+            save_checkpoint(model, path)
+            restored = load_checkpoint(path)
+            for _ in range(4):
+                model.step()
+                restored.step()
+            self.assertEqual(_state(restored), _state(model))
+            pd.testing.assert_frame_equal(restored.datacollector.get_model_vars_dataframe(),
+                                          model.datacollector.get_model_vars_dataframe())
+            pd.testing.assert_frame_equal(restored.datacollector.get_agent_vars_dataframe(),
+                                          model.datacollector.get_agent_vars_dataframe())
+
+    def test_forks_are_independent(self):
+        """Test that forks restored from one checkpoint share no state."""
+        checkpoint = self._model(state_store=True).checkpoint()
+        self.assertEqual(checkpoint.step, 3)
+        first, second = checkpoint.restore(), checkpoint.restore()
+        first.step()
+        self.assertEqual(first.schedule.steps, 4)
+        self.assertEqual(second.schedule.steps, 3)
+        self.assertIsNot(first.state.individuals.column('is_employed'),
+                         second.state.individuals.column('is_employed'))
+        second.step()
+        self.assertEqual(_state(first), _state(second))
+
+    def test_agents_restored_attribute_for_attribute(self):
+        """Test that columnar storage gives back every agent attribute with its type."""
+        for state_store in (False, True):
+            model = self._model(state_store=state_store)
+            if not state_store:
+                model.individuals.items[0].liquid_savings = 12  # an int among floats
+            restored = Checkpoint.capture(model).restore()
+            for original in list(model.individuals)[:20] + list(model.firms)[:5]:
+                agent = restored.agent_id_map[original.unique_id]
+                self.assertIs(type(agent), type(original))
+                self.assertIs(agent.model, restored)
+                for name, value in vars(original).items():
+                    if name not in ('model', '_table', 'employees'):
+                        self.assertEqual(vars(agent)[name], value, name)
+                        self.assertIs(type(vars(agent)[name]), type(value), name)
+            self.assertEqual(len(restored.schedule.agents), len(model.schedule.agents))
+
+    def test_capture_has_no_side_effects(self):
+        """Test that capturing a streaming model neither flushes its buffer nor writes shards."""
+        original_dir = os.path.join(self.tmp.name, 'original')
+        model = self._model(output_dir=original_dir, flush_every=2)
+        sink = model.datacollector.sink
+        shards, pending = list(sink.shards), sink._pending_steps
+        files = sorted(os.listdir(original_dir))
+        checkpoint = model.checkpoint()
+        self.assertEqual((sink.shards, sink._pending_steps), (shards, pending))
+        self.assertEqual(sorted(os.listdir(original_dir)), files)
+        fork = checkpoint.restore(output_dir=os.path.join(self.tmp.name, 'fork'))
+        self.assertEqual(fork.datacollector.sink._pending_steps, pending)
+
+    def test_uncompressed_round_trip_and_bad_file(self):
+        """Test saving without compression and rejecting files that are not checkpoints."""
+        model = self._model()
+        path = os.path.join(self.tmp.name, 'plain.ckpt')
+        Checkpoint.capture(model).save(path, compress=False)
+        self.assertEqual(_state(Checkpoint.load(path).restore()), _state(model))
+        bogus = os.path.join(self.tmp.name, 'bogus.ckpt')
+        with open(bogus, 'wb') as f:
+            f.write(b'not a checkpoint')
+        with self.assertRaises(ValueError):
+            Checkpoint.load(bogus)
+
+    def test_fork_streams_to_new_directory(self):
+        """Test that a fork of a streaming model keeps its history in its own directory."""
+        original_dir = os.path.join(self.tmp.name, 'original')
+        fork_dir = os.path.join(self.tmp.name, 'fork')
+        model = self._model(output_dir=original_dir, flush_every=2)
+        fork = model.checkpoint().restore(output_dir=fork_dir)
+        for _ in range(2):
+            model.step()
+            fork.step()
+        model.datacollector.close()
+        fork.datacollector.close()
+        self.assertEqual(ShardedOutput(fork_dir).steps(), [1, 2, 3, 4, 5])
+        pd.testing.assert_frame_equal(ShardedOutput(fork_dir).get_model_vars_dataframe(),
+                                      ShardedOutput(original_dir).get_model_vars_dataframe())
+
+    def test_streaming_restore_requires_new_directory(self):
+        """Test that restoring a streaming model into its original directory is rejected."""
+        original_dir = os.path.join(self.tmp.name, 'original')
+        model = self._model(output_dir=original_dir, flush_every=2)
+        checkpoint = model.checkpoint()
+        for output_dir in (None, original_dir, os.path.join(original_dir, '.')):
+            with self.assertRaises(ValueError):
+                checkpoint.restore(output_dir=output_dir)
+        model.step()
+        model.datacollector.close()
+        self.assertEqual(ShardedOutput(original_dir).steps(), [1, 2, 3, 4])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+import mesa
+import numpy as np
+import pandas as pd
+
+from src.agents.individual import IndividualAgent
+from src.simulation.datacollection import ColumnarDataCollector
+from src.simulation.model import MigrationModel
+
+AGENT_REPORTERS = {"Age": "age", "MSA": "current_msa", "IsEmployed": ("is_employed", np.int8)}
+
+
+class TestColumnarDataCollector(unittest.TestCase):
+
+    def _run(self, collector, state_store=False, steps=4):
+        model = MigrationModel(n_individuals=30, n_firms=4, n_regions=3, n_governments=1,
+                               seed=5, state_store=state_store)
+        reference = mesa.DataCollector(
+            model_reporters={"Employed": lambda m: m.metrics['Employed']},
+            agent_reporters={"Age": "age", "MSA": "current_msa", "IsEmployed": "is_employed"},
+        )
+        for _ in range(steps):
+            model.step()
+            collector.collect(model)
+            reference.collect(model)
+        return model, reference
+
+    def test_matches_mesa_datacollector(self):
+        """Test that frames match mesa.DataCollector restricted to individuals."""
+        for state_store in (False, True):
+            collector = ColumnarDataCollector(
+                model_reporters={"Employed": lambda m: m.metrics['Employed']},
+                agent_reporters={IndividualAgent: AGENT_REPORTERS},
+            )
+            model, reference = self._run(collector, state_store=state_store)
+            pd.testing.assert_frame_equal(collector.get_model_vars_dataframe(),
+                                          reference.get_model_vars_dataframe(), check_dtype=False)
+            expected = reference.get_agent_vars_dataframe().dropna()
+            ids = {agent.unique_id for agent in model.individuals}
+            expected = expected[expected.index.get_level_values('AgentID').isin(ids)]
+            actual = collector.get_agent_vars_dataframe()
+            self.assertEqual(len(actual), len(expected))
+            joined = actual.join(expected, rsuffix='_ref')
+            self.assertTrue((joined['Age'] == joined['Age_ref']).all())
+            self.assertTrue((joined['MSA'] == joined['MSA_ref']).all())
+            self.assertTrue((joined['IsEmployed'] == joined['IsEmployed_ref'].astype(int)).all())
+            self.assertEqual(actual['IsEmployed'].dtype, np.int8)
+
+    def test_every_k_steps_and_panel(self):
+        """Test that agent data is thinned in time and restricted to a fixed panel."""
+        collector = ColumnarDataCollector(
+            agent_reporters={IndividualAgent: AGENT_REPORTERS}, agent_every=2, panel_size=7,
+        )
+        self._run(collector, state_store=True, steps=5)
+        df = collector.get_agent_vars_dataframe(IndividualAgent)
+        steps = sorted(set(df.index.get_level_values('Step')))
+        self.assertEqual(steps, [1, 3, 5])
+        self.assertEqual(len(df), 3 * 7)
+        self.assertEqual(df.groupby(level='Step').size().tolist(), [7, 7, 7])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from src.simulation.flows import MigrationFlows
+from src.simulation.model import MigrationModel
+
+SIZES = dict(n_individuals=300, n_firms=10, n_regions=6, n_governments=1)
+
+
+class TestMigrationFlows(unittest.TestCase):
+
+    def setUp(self):
+        self.flows = MigrationFlows(['A', 'B', 'C', 'D'])
+        for origin, destination in [('A', 'B'), ('A', 'B'), ('A', 'C'), ('C', 'A'), ('D', 'A')]:
+            self.flows.record(origin, destination)
+
+    def test_step_and_cumulative_matrices(self):
+        """Test that each step's moves form its own matrix and add up in the cumulative one."""
+        np.testing.assert_array_equal(self.flows.arrivals, [2, 2, 1, 0])
+        self.flows.end_step()
+        self.assertEqual(self.flows.step_matrix[0, 1], 2)
+        self.assertFalse(self.flows.arrivals.any())
+        self.flows.record_many([1], [0])
+        self.flows.end_step()
+        self.assertEqual(self.flows.step_matrix.nnz, 1)
+        self.assertEqual(self.flows.cumulative.sum(), 6)
+        self.assertEqual(self.flows.cumulative[1, 0], 1)
+
+    def test_corridor_net_and_hub_queries(self):
+        """Test the top corridors, net migration and hub rankings."""
+        self.flows.end_step()
+        self.assertEqual(self.flows.top_corridors(2), [('A', 'B', 2), ('A', 'C', 1)])
+        self.assertEqual(self.flows.net_migration(), {'A': -1, 'B': 2, 'C': 0, 'D': -1})
+        self.assertEqual(self.flows.hubs(2), [('A', 3, 5), ('B', 1, 2)])
+
+    def test_migration_rates(self):
+        """Test per-resident rates of the current step."""
+        self.assertEqual(self.flows.migration_rates('A', 4), (0.5, 0.75))
+        self.assertEqual(self.flows.migration_rates('A', 0), (0.0, 0.0))
+
+
+class TestModelFlows(unittest.TestCase):
+
+    def test_flows_match_movers_in_both_engines(self):
+        """Test that recorded flows account for every move and match resident counts."""
+        for engine in MigrationModel.ENGINES:
+            model = MigrationModel(**SIZES, seed=3, engine=engine)
+            initial = {a.unique_id: a.current_msa for a in model.individuals}
+            movers = 0
+            for _ in range(8):
+                model.step()
+                self.assertEqual(model.flows.step_matrix.sum(), model.metrics['Movers'])
+                movers += model.metrics['Movers']
+            self.assertGreater(movers, 0)
+            self.assertEqual(model.flows.cumulative.sum(), movers)
+            counts = {msa: 0 for msa in model.flows.ids}
+            for agent in model.individuals:
+                counts[agent.current_msa] += 1
+            for msa in model.flows.ids:
+                counts[msa] -= sum(1 for origin in initial.values() if origin == msa)
+            self.assertEqual(model.flows.net_migration(cumulative=True), counts)
+
+    def test_regions_report_step_migration_rates(self):
+        """Test that regions' in/out-migration come from the step's flows."""
+        model = MigrationModel(**SIZES, seed=5)
+        for _ in range(4):
+            model.step()
+        inflows = model.flows.inflows()
+        for i, msa in enumerate(model.flows.ids):
+            region = model.agent_id_map[msa]
+            self.assertAlmostEqual(region.in_migration, inflows[i] / model.residents.resident_count[msa])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import random
+import unittest
+
+from src.simulation.job_market import JobMarket, JobVacancy
+
+class TestJobMarket(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a job market with a few postings."""
+        self.rng = random.Random(0)
+        self.market = JobMarket()
+        self.local_id = self.market.post(JobVacancy(firm_id=1, soc_code='15-1252', msa='MSA1'))
+        self.remote_id = self.market.post(JobVacancy(firm_id=2, soc_code='15-1252', msa='MSA2'))
+        self.other_id = self.market.post(JobVacancy(firm_id=1, soc_code='29-1141', msa='MSA1'))
+
+    def test_duplicate_postings_are_distinct(self):
+        """Test that identical vacancies get separate ids and can be removed separately."""
+        duplicate_id = self.market.post(JobVacancy(firm_id=1, soc_code='15-1252', msa='MSA1'))
+        self.assertNotEqual(duplicate_id, self.local_id)
+        self.market.remove(self.local_id)
+        self.assertEqual(self.market.count('15-1252', 'MSA1'), 1)
+        self.assertIn(duplicate_id, self.market)
+
+    def test_find_prefers_local_then_broadens(self):
+        """Test that find returns a local match first and falls back to any MSA."""
+        self.assertEqual(self.market.find(self.rng, '15-1252', 'MSA1'), self.local_id)
+        self.market.take(self.local_id)
+        self.assertEqual(self.market.find(self.rng, '15-1252', 'MSA1'), self.remote_id)
+        self.market.take(self.remote_id)
+        self.assertIsNone(self.market.find(self.rng, '15-1252', 'MSA1'))
+        self.assertEqual(self.market.filled, 2)
+        self.assertEqual(self.market.count('15-1252'), 0)
+
+    def test_rollover_expires_old_vacancies(self):
+        """Test that rollover expires postings older than the vacancy lifetime."""
+        market = JobMarket(vacancy_lifetime=2)
+        market.rollover()
+        first = market.post(JobVacancy(firm_id=1, soc_code='15-1252', msa='MSA1'))
+        market.rollover()
+        second = market.post(JobVacancy(firm_id=1, soc_code='15-1252', msa='MSA1'))
+        self.assertEqual(len(market), 2)
+        market.rollover()
+        self.assertNotIn(first, market)
+        self.assertIn(second, market)
+        market.rollover()
+        self.assertEqual(len(market), 0)
+
+    def test_default_rollover_clears_board(self):
+        """Test that the default lifetime clears all vacancies at the next step."""
+        self.market.rollover()
+        self.assertEqual(len(self.market), 0)
+        self.assertIsNone(self.market.draw(self.rng, '15-1252'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import queue
+import time
+import unittest
+import urllib.request
+
+from src.simulation.live import MetricsPublisher, offer, step_snapshot
+from src.simulation.model import MigrationModel
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestOffer(unittest.TestCase):
+
+    def test_full_queue_drops_oldest(self):
+        """Test that offering to a full queue replaces the oldest update without blocking."""
+        updates = queue.Queue(maxsize=2)
+        self.assertTrue(offer(updates, 1))
+        self.assertTrue(offer(updates, 2))
+        self.assertFalse(offer(updates, 3))
+        self.assertEqual([updates.get_nowait(), updates.get_nowait()], [2, 3])
+
+
+class TestStepSnapshot(unittest.TestCase):
+
+    def test_contents(self):
+        """Test that a snapshot holds the step, model metrics and unemployment by MSA."""
+        model = MigrationModel(n_individuals=60, n_firms=6, n_regions=3, n_governments=1, seed=2)
+        model.step()
+        snapshot = step_snapshot(model)
+        self.assertEqual(snapshot['Step'], 1)
+        self.assertEqual(snapshot['Employed'], model.metrics['Employed'])
+        self.assertIn('VacanciesPosted', snapshot)
+        self.assertEqual(set(snapshot['UnemploymentByMSA']), {r.unique_id for r in model.regions})
+        json.dumps(snapshot)
+
+
+class TestMetricsPublisher(unittest.TestCase):
+
+    def setUp(self):
+        """Start a publisher on a free local port."""
+        self.publisher = MetricsPublisher(port=0, maxsize=2, client_buffer=2)
+        self.addCleanup(self.publisher.close)
+
+    def test_latest_endpoint(self):
+        """Test that /latest serves the most recent snapshot."""
+        with urllib.request.urlopen(self.publisher.url + '/latest', timeout=5) as response:
+            self.assertEqual(response.status, 204)
+        self.publisher.publish({'Step': 1, 'Employed': 10.0})
+        self.publisher.publish({'Step': 2, 'Employed': 11.0})
+        _wait_for(lambda: self.publisher.latest == {'Step': 2, 'Employed': 11.0})
+        with urllib.request.urlopen(self.publisher.url + '/latest', timeout=5) as response:
+            self.assertEqual(json.load(response), {'Step': 2, 'Employed': 11.0})
+
+    def test_event_stream(self):
+        """Test that /events streams each forwarded snapshot as a server-sent event."""
+        stream = urllib.request.urlopen(self.publisher.url + '/events', timeout=5)
+        self.addCleanup(stream.close)
+        self.assertEqual(stream.headers['Content-Type'], 'text/event-stream')
+        _wait_for(lambda: len(self.publisher._clients) == 1)
+        self.publisher.publish({'Step': 7, 'Movers': 3.0})
+        self.assertEqual(stream.readline(), b'id: 7\n')
+        self.assertEqual(json.loads(stream.readline()[len(b'data: '):]), {'Step': 7, 'Movers': 3.0})
+        self.assertEqual(stream.readline(), b'\n')
+
+    def test_publish_never_blocks(self):
+        """Test that a burst of snapshots is coalesced instead of blocking the caller."""
+        start = time.perf_counter()
+        for step in range(10_000):
+            self.publisher.publish({'Step': step})
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertEqual(self.publisher.published, 10_000)
+        _wait_for(lambda: self.publisher.latest == {'Step': 9_999})
+
+    def test_close_disconnects_clients(self):
+        """Test that closing the publisher ends open event streams."""
+        stream = urllib.request.urlopen(self.publisher.url + '/events', timeout=5)
+        self.addCleanup(stream.close)
+        _wait_for(lambda: len(self.publisher._clients) == 1)
+        self.publisher.close()
+        self.assertEqual(stream.read(), b'')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from src.agents.individual import IndividualAgent
+from src.simulation.metrics import MetricsRegistry
+from src.simulation.model import MigrationModel
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_per_step_counters_reset(self):
+        """Test that per-step counters reset while stock counters persist."""
+        metrics = MetricsRegistry()
+        metrics.counter('Stock')
+        metrics.counter('Flow', per_step=True)
+        metrics.derived('Total', lambda m: m['Stock'] + m['Flow'])
+        metrics.increment('Stock', 3)
+        metrics.increment('Flow', 2)
+        self.assertEqual(metrics['Total'], 5)
+        metrics.begin_step()
+        self.assertEqual(metrics['Stock'], 3)
+        self.assertEqual(metrics['Flow'], 0)
+        with self.assertRaises(ValueError):
+            metrics.counter('Stock')
+
+    def test_model_counters_match_recount(self):
+        """Test that model-level counters agree with a full scan of the agents."""
+        model = MigrationModel(n_individuals=80, n_firms=8, n_regions=4, n_governments=2)
+        for _ in range(6):
+            model.step()
+        individuals = [a for a in model.schedule.agents if isinstance(a, IndividualAgent)]
+        employed = sum(1 for a in individuals if a.is_employed)
+        model_df = model.datacollector.get_model_vars_dataframe()
+        self.assertEqual(model_df['Employed'].iloc[-1], employed)
+        self.assertAlmostEqual(model_df['UnemploymentRate'].iloc[-1], 1 - employed / len(individuals))
+        self.assertEqual(model_df['VacanciesFilled'].sum(), model.job_market.filled)
+        self.assertEqual(model_df['VacanciesPosted'].sum(), model.job_market.posted)
+
+if __name__ == '__main__':
+    unittest.main()
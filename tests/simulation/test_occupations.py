@@ -0,0 +1,83 @@
+import random
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+from src.simulation.job_market import JobMarket, JobVacancy
+from src.simulation.model import MigrationModel
+from src.simulation.occupations import OccupationIndex
+
+SIZES = dict(n_individuals=300, n_firms=30, n_regions=4, n_governments=1)
+CODES = [f"15-{n}" for n in range(1000, 2001)]
+
+
+class TestOccupationIndex(unittest.TestCase):
+
+    def test_neighbors_sorted_by_similarity(self):
+        """Test that neighbours are the nearest codes, most similar first."""
+        index = OccupationIndex(['15-1252', '15-1253', '15-1299', '29-1252'], n_neighbors=2)
+        neighbors = index.neighbors('15-1252')
+        self.assertEqual([code for code, _ in neighbors], ['15-1253', '15-1299'])
+        self.assertGreater(neighbors[0][1], neighbors[1][1])
+        self.assertEqual(index.similarity('15-1252', '15-1252'), 1.0)
+        self.assertEqual(index.similarity('15-1252', '29-1252'), 0.0)
+        self.assertEqual(index.neighbors('11-0000'), [])
+
+    def test_min_similarity_drops_distant_codes(self):
+        """Test that neighbours below the similarity threshold are dropped."""
+        index = OccupationIndex(['15-1252', '15-1253', '15-1900'], n_neighbors=2, min_similarity=0.5)
+        self.assertEqual([code for code, _ in index.neighbors('15-1252')], ['15-1253'])
+
+    def test_from_transferability_matrix(self):
+        """Test that a sparse transferability matrix ranks neighbours by its entries."""
+        codes = ['A', 'B', 'C']
+        matrix = sparse.csr_matrix(np.array([[1.0, 0.2, 0.7], [0.0, 1.0, 0.0], [0.3, 0.9, 1.0]]))
+        index = OccupationIndex.from_transferability(codes, matrix, n_neighbors=2)
+        self.assertEqual(index.neighbors('A'), [('C', 0.7), ('B', 0.2)])
+        self.assertEqual(index.neighbors('B'), [])
+        dense = OccupationIndex.from_transferability(codes, matrix.toarray(), n_neighbors=1)
+        self.assertEqual(dense.neighbors('C'), [('B', 0.9)])
+
+
+class TestSimilarOccupationSearch(unittest.TestCase):
+
+    def test_find_falls_back_to_similar_occupation(self):
+        """Test that search prefers the exact occupation, then the most similar one, locally first."""
+        rng = random.Random(0)
+        plain = JobMarket()
+        plain.post(JobVacancy(firm_id=1, soc_code='15-1253', msa='M1'))
+        self.assertIsNone(plain.find(rng, '15-1252', 'M1'))
+
+        market = JobMarket(occupations=OccupationIndex(CODES, n_neighbors=8))
+        far = market.post(JobVacancy(firm_id=1, soc_code='15-1256', msa='M1'))
+        elsewhere = market.post(JobVacancy(firm_id=2, soc_code='15-1253', msa='M2'))
+        self.assertEqual(market.find(rng, '15-1252', 'M1'), elsewhere)
+        local = market.post(JobVacancy(firm_id=3, soc_code='15-1253', msa='M1'))
+        self.assertEqual(market.find(rng, '15-1252', 'M1'), local)
+        exact = market.post(JobVacancy(firm_id=4, soc_code='15-1252', msa='M2'))
+        self.assertEqual(market.find(rng, '15-1252', 'M1'), exact)
+        market.take(exact)
+        market.take(local)
+        market.take(elsewhere)
+        self.assertEqual(market.find(rng, '15-1252', 'M1'), far)
+
+    def test_similar_occupations_raise_hires_in_both_engines(self):
+        """Test that both engines fill more vacancies when similar occupations are accepted."""
+        index = OccupationIndex(CODES, n_neighbors=10)
+        for engine in MigrationModel.ENGINES:
+            hires = {}
+            for occupation_index in (None, index):
+                model = MigrationModel(**SIZES, seed=2, engine=engine, occupation_index=occupation_index)
+                for _ in range(10):
+                    model.step()
+                hires[occupation_index is not None] = model.datacollector.get_model_vars_dataframe()['Hires'].sum()
+                individuals = list(model.individuals)
+                employed = [a for a in individuals if a.is_employed]
+                self.assertEqual(model.metrics['Employed'], len(employed))
+                for agent in employed:
+                    self.assertIn(agent.unique_id, model.agent_id_map[agent.employer_id].employees)
+            self.assertGreater(hires[True], hires[False])
+
+if __name__ == '__main__':
+    unittest.main()
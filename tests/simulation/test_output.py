@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.agents.individual import IndividualAgent
+from src.simulation.output import ShardedOutput, StreamingSink
+from src.simulation.model import MigrationModel
+
+SIZES = dict(n_individuals=30, n_firms=4, n_regions=3, n_governments=1)
+
+
+class TestStreamingSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _run(self, steps=5, **kwargs):
+        model = MigrationModel(**SIZES, seed=3, **kwargs)
+        for _ in range(steps):
+            model.step()
+        return model
+
+    def test_matches_in_memory_collector(self):
+        """Test that streamed frames equal the in-memory collector's frames."""
+        for state_store in (False, True):
+            directory = os.path.join(self.tmp.name, str(state_store))
+            streamed = self._run(state_store=state_store, output_dir=directory, flush_every=2)
+            in_memory = self._run(state_store=state_store)
+            pd.testing.assert_frame_equal(streamed.datacollector.get_model_vars_dataframe(),
+                                          in_memory.datacollector.get_model_vars_dataframe(), check_dtype=False)
+            actual = streamed.datacollector.get_agent_vars_dataframe()
+            expected = in_memory.datacollector.get_agent_vars_dataframe()
+            self.assertEqual(actual.index.tolist(), expected.index.tolist())
+            for column in expected:
+                self.assertEqual(actual[column].tolist(), expected[column].tolist())
+
+    def test_flush_interval_bounds_buffered_steps(self):
+        """Test that records are written every `flush_every` steps and nothing is kept in memory."""
+        model = self._run(steps=5, output_dir=self.tmp.name, flush_every=2)
+        sink = model.datacollector.sink
+        self.assertEqual([s['first_step'] for s in sink.shards if s['kind'] == 'model'], [1, 3])
+        self.assertEqual(len(sink._model_rows), 1)
+        self.assertFalse(model.datacollector._panels[IndividualAgent].buffers)
+        # The manifest written so far is readable before the run is closed
+        self.assertEqual(ShardedOutput(self.tmp.name).steps(), [1, 2, 3, 4])
+        model.datacollector.close()
+        self.assertEqual(ShardedOutput(self.tmp.name).steps(), [1, 2, 3, 4, 5])
+
+    def test_loader_reads_selected_steps_and_columns(self):
+        """Test that the loader returns only the requested steps and columns."""
+        model = self._run(steps=6, state_store=True, output_dir=self.tmp.name, flush_every=2)
+        model.datacollector.close()
+        output = ShardedOutput(self.tmp.name)
+        df = output.get_agent_vars_dataframe(IndividualAgent, steps=[2, 5], columns=['MSA'])
+        self.assertEqual(list(df.columns), ['MSA'])
+        self.assertEqual(sorted(set(df.index.get_level_values('Step'))), [2, 5])
+        self.assertTrue(df['MSA'].str.startswith('MSA').all())
+        model_df = output.get_model_vars_dataframe(steps=[6], columns=['Employed'])
+        self.assertEqual(list(model_df.columns), ['Employed'])
+        self.assertEqual(len(model_df), 1)
+
+    def test_invalid_format(self):
+        """Test that an unknown shard format is rejected."""
+        with self.assertRaises(ValueError):
+            StreamingSink(self.tmp.name, format='csv')
+
+    def test_category_labels_decode_earlier_shards(self):
+        """Test that codes written before new categories appear still decode correctly."""
+        sink = StreamingSink(self.tmp.name)
+        sink.write_agents('A', 1, [10, 11], {'msa': np.array([0, 0])}, labels={'msa': ['MSA1']})
+        sink.end_step()
+        sink.write_agents('A', 2, [10, 11], {'msa': np.array([0, 1])}, labels={'msa': ['MSA1', 'MSA2']})
+        sink.close()
+        df = ShardedOutput(self.tmp.name).get_agent_vars_dataframe('A')
+        self.assertEqual(df['msa'].tolist(), ['MSA1', 'MSA1', 'MSA1', 'MSA2'])
+
+if __name__ == '__main__':
+    unittest.main()
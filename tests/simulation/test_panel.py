@@ -0,0 +1,103 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.simulation import panel as panel_module
+from src.simulation.model import MigrationModel
+from src.simulation.panel import MSAPanel
+
+SIZES = dict(n_individuals=60, n_firms=6, n_regions=3, n_governments=1)
+
+
+class TestMSAPanel(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small BLS-style CSV panel and a second file with another indicator."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.prices = os.path.join(self.directory, 'prices.csv')
+        pd.DataFrame({
+            'msa': ['MSA1', 'MSA1', 'MSA2', 'MSA2', 'MSA1'],
+            'month': ['2024-01', '2024-02', '2024-01', '2024-03', '2024-03'],
+            'median_price': [300000.0, 310000.0, 200000.0, 210000.0, 320000.0],
+            'unused': ['a', 'b', 'c', 'd', 'e'],
+        }).to_csv(self.prices, index=False)
+        self.wages = os.path.join(self.directory, 'wages.csv')
+        pd.DataFrame({
+            'msa': ['MSA2', 'MSA3'],
+            'month': ['2024-02-01', '2024-02-01'],
+            'minimum_wage': [15.0, 9.5],
+        }).to_csv(self.wages, index=False)
+
+    def test_builds_msa_month_indicator_array(self):
+        """Test that files are merged into a dense array with NaN for missing observations."""
+        panel = MSAPanel.read([self.prices, self.wages], indicators=('median_price', 'minimum_wage'), chunksize=2)
+        self.assertEqual(panel.msas, ['MSA1', 'MSA2', 'MSA3'])
+        np.testing.assert_array_equal(panel.months, np.array(['2024-01', '2024-02', '2024-03'], dtype='datetime64[M]'))
+        self.assertEqual(panel.values.shape, (3, 3, 2))
+        np.testing.assert_array_equal(panel.values[0, :, 0], [300000.0, 310000.0, 320000.0])
+        self.assertTrue(np.isnan(panel.values[1, 1, 0]))
+        self.assertEqual(panel.values[2, 1, 1], 9.5)
+        self.assertTrue(np.isnan(panel.values[0, :, 1]).all())
+
+    def test_month_values_lookup(self):
+        """Test that one lookup returns every region's month, clamped, with NaN for uncovered MSAs."""
+        panel = MSAPanel.read(self.prices, indicators=('median_price',))
+        rows = panel.rows(['MSA2', 'MSA9', 'MSA1'])
+        np.testing.assert_array_equal(rows, [1, -1, 0])
+        values = panel.month_values(rows, 0)
+        self.assertEqual(values[0, 0], 200000.0)
+        self.assertTrue(np.isnan(values[1, 0]))
+        self.assertEqual(panel.month_values(rows, 50)[2, 0], 320000.0)
+
+    def test_parsed_panel_is_cached(self):
+        """Test that a parsed panel is reused until its files change."""
+        cache_dir = os.path.join(self.directory, 'cache')
+        first = MSAPanel.read(self.prices, indicators=('median_price',), cache_dir=cache_dir)
+        with patch.object(panel_module, '_read_frames', side_effect=AssertionError('reparsed')):
+            cached = MSAPanel.read(self.prices, indicators=('median_price',), cache_dir=cache_dir)
+        np.testing.assert_array_equal(cached.values, first.values)
+        self.assertEqual(cached.msas, first.msas)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        with open(self.prices, 'a') as f:
+            f.write('MSA3,2024-01,100000.0,f\n')
+        changed = MSAPanel.read(self.prices, indicators=('median_price',), cache_dir=cache_dir)
+        self.assertEqual(len(changed), 3)
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, "pyarrow is not installed")
+    def test_reads_parquet(self):
+        """Test that Parquet files give the same panel as CSV files."""
+        path = os.path.join(self.directory, 'prices.parquet')
+        pd.read_csv(self.prices).to_parquet(path, index=False)
+        expected = MSAPanel.read(self.prices, indicators=('median_price',))
+        np.testing.assert_array_equal(MSAPanel.read(path, indicators=('median_price',)).values, expected.values)
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is not None, "pyarrow is installed")
+    def test_parquet_needs_pyarrow(self):
+        """Test that reading Parquet without pyarrow fails with a clear ImportError."""
+        with self.assertRaises(ImportError):
+            MSAPanel.read(os.path.join(self.directory, 'missing.parquet'))
+
+    def test_model_refreshes_regions_each_step(self):
+        """Test that regions take the panel's values for each step's month."""
+        panel = MSAPanel.read([self.prices, self.wages], indicators=('median_price', 'minimum_wage'))
+        model = MigrationModel(**SIZES, seed=3, panel=panel, panel_start=1)
+        regions = {region.unique_id: region for region in model.regions}
+        original = regions['MSA3'].median_price
+        model.step()
+        self.assertEqual(regions['MSA1'].median_price, 310000.0)
+        self.assertEqual(regions['MSA2'].minimum_wage, 15.0)
+        self.assertEqual(regions['MSA3'].median_price, original)
+        model.step()
+        self.assertEqual(regions['MSA2'].median_price, 210000.0)
+        self.assertEqual(model.region_scores().columns['median_price'][model.region_scores().index['MSA1']],
+                         320000.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.simulation.model import MigrationModel
+from src.simulation.policy import ExtendedBenefits, PopulationView, RelocationGrant, Retraining
+
+SIZES = dict(n_individuals=400, n_firms=20, n_regions=6, n_governments=3)
+UNEMPLOYED = ('is_employed', '==', False)
+
+
+class TestPopulationView(unittest.TestCase):
+
+    def test_columns_match_agents(self):
+        """Test that individual and region columns hold each agent's own and region's values."""
+        model = MigrationModel(**SIZES, seed=1)
+        view = PopulationView(model)
+        for row in (0, 17, len(view) - 1):
+            agent = view.agent(row)
+            self.assertEqual(view.column('liquid_savings')[row], agent.liquid_savings)
+            self.assertEqual(view.column('soc_code')[row], agent.soc_code)
+            self.assertEqual(view.column('region.median_price')[row],
+                             model.agent_id_map[agent.current_msa].median_price)
+
+    def test_state_store_gives_same_eligibility(self):
+        """Test that a policy selects the same individuals from plain agents and from the state store."""
+        policy = ExtendedBenefits('benefits', 100, conditions=(
+            ('ai_exposure_index', '>', 0.3), ('soc_code', '!=', '15-1252'), ('region.median_price', '<', 400000)))
+        plain = PopulationView(MigrationModel(**SIZES, seed=2))
+        stored = PopulationView(MigrationModel(**SIZES, seed=2, state_store=True))
+        selected = plain.ids[policy.eligible(plain)]
+        self.assertGreater(len(selected), 0)
+        np.testing.assert_array_equal(selected, stored.ids[policy.eligible(stored)])
+
+
+class TestPolicyEngine(unittest.TestCase):
+
+    def _model(self, policies, **kwargs):
+        return MigrationModel(**SIZES, seed=3, debug=True, policies=policies, **kwargs)
+
+    def _federal(self, model):
+        return next(government for government in model.governments if government.level == 'federal')
+
+    def test_extended_benefits(self):
+        """Test that benefits go to every eligible individual and are counted."""
+        policy = ExtendedBenefits('benefits', 250, conditions=(UNEMPLOYED, ('liquid_savings', '<', 50000)))
+        model = self._model([policy])
+        eligible = {agent.unique_id: agent.liquid_savings for agent in model.individuals
+                    if not agent.is_employed and agent.liquid_savings < 50000}
+        record = model.policy_engine.run(self._federal(model), policy)
+        self.assertEqual((record.eligible, record.recipients, record.cost), (len(eligible), len(eligible),
+                                                                             250 * len(eligible)))
+        for unique_id, savings in eligible.items():
+            agent = model.agent_id_map[unique_id]
+            self.assertEqual(agent.liquid_savings, savings + 250)
+            self.assertTrue(agent.unemployment_benefits_eligible)
+        self.assertEqual(model.policy_engine.uptake, {'benefits': len(eligible)})
+        self.assertEqual(model.metrics['PolicySpend'], 250 * len(eligible))
+
+    def test_budget_caps_recipients(self):
+        """Test that a level's budget limits the recipients and is never overspent."""
+        policy = ExtendedBenefits('benefits', 1000, conditions=())
+        model = self._model([policy], budgets={'federal': 12_500})
+        federal = self._federal(model)
+        self.assertEqual(model.policy_engine.run(federal, policy).recipients, 12)
+        self.assertEqual(model.policy_engine.run(federal, policy).recipients, 0)
+        self.assertEqual(model.policy_engine.spent, {'federal': 12_000})
+        self.assertEqual(model.policy_engine.remaining('federal'), 500)
+
+    def test_retraining_changes_occupation(self):
+        """Test that retraining moves exposed workers into the target occupation."""
+        policy = Retraining('retraining', 2000, target_soc='29-1141', conditions=(('ai_exposure_index', '>', 0.6),))
+        model = self._model([policy], state_store=True)
+        exposed = [agent for agent in model.individuals if agent.ai_exposure_index > 0.6]
+        record = model.policy_engine.run(self._federal(model), policy)
+        self.assertEqual(record.recipients, len(exposed))
+        self.assertTrue(all(agent.soc_code == '29-1141' for agent in exposed))
+        self.assertEqual(model.policy_engine.run(self._federal(model), policy).eligible, 0)
+
+    def test_retraining_defaults_to_most_demanded_occupation(self):
+        """Test that without a target, retraining follows the job market's vacancies."""
+        policy = Retraining('retraining', 0, conditions=(('ai_exposure_index', '>', 0.5),))
+        model = self._model([], vacancy_rate=1.0)
+        model.step()
+        target = model.job_market.most_demanded()
+        self.assertEqual(model.job_market.count(target),
+                         max(model.job_market.count(v.soc_code) for _, v in model.job_market.items()))
+        record = model.policy_engine.run(self._federal(model), policy)
+        self.assertGreater(record.recipients, 0)
+        self.assertTrue(all(agent.soc_code == target for agent in model.individuals if agent.ai_exposure_index > 0.5))
+
+    def test_relocation_grant_moves_recipients(self):
+        """Test that grantees move to a better-scoring region and receive the grant."""
+        policy = RelocationGrant('grant', 5000, conditions=(('ai_exposure_index', '>', 0.5),))
+        model = self._model([policy])
+        before = {agent.unique_id: (agent.current_msa, agent.liquid_savings) for agent in model.individuals}
+        record = model.policy_engine.run(self._federal(model), policy)
+        table = model.region_scores()
+        moved = [agent for agent in model.individuals if agent.current_msa != before[agent.unique_id][0]]
+        self.assertGreater(record.recipients, 0)
+        self.assertEqual(len(moved), record.recipients)
+        self.assertEqual(model.metrics['Movers'], record.recipients)
+        for agent in moved:
+            origin, savings = before[agent.unique_id]
+            self.assertGreater(agent.ai_exposure_index, 0.5)
+            self.assertLess(table.scores[table.index[agent.current_msa]], table.scores[table.index[origin]])
+            self.assertEqual(agent.liquid_savings, savings + 5000)
+        model.residents.check(model.individuals)
+
+    def test_state_policies_cover_their_jurisdiction(self):
+        """Test that state governments split the regions and only pay their own residents."""
+        policy = ExtendedBenefits('benefits', 100, conditions=(), level='state')
+        model = self._model([policy])
+        states = [government for government in model.governments if government.level == 'state']
+        self.assertEqual(set().union(*(state.jurisdiction for state in states)),
+                         {region.unique_id for region in model.regions})
+        record = model.policy_engine.run(states[0], policy)
+        self.assertEqual(record.recipients,
+                         sum(model.residents.resident_count.get(msa, 0) for msa in states[0].jurisdiction))
+
+    def test_take_up(self):
+        """Test that a take-up rate of zero pays nobody."""
+        policy = ExtendedBenefits('benefits', 100, take_up=0.0)
+        model = self._model([policy])
+        self.assertEqual(model.policy_engine.run(self._federal(model), policy).recipients, 0)
+
+    def test_policies_share_one_view_per_step(self):
+        """Test that every policy run of a step shares one view, which sees earlier runs' changes."""
+        grant = RelocationGrant('grant', 5000, conditions=(('ai_exposure_index', '>', 0.5),))
+        benefits = ExtendedBenefits('benefits', 100, conditions=())
+        model = self._model([grant, benefits])
+        federal = self._federal(model)
+        with patch('src.simulation.policy.PopulationView', wraps=PopulationView) as view:
+            model.policy_engine.run(federal, grant)
+            model.policy_engine.run(federal, benefits)
+            shared = model.policy_engine.view()
+            self.assertEqual(view.call_count, 1)
+            self.assertEqual(list(shared.column('current_msa')), [a.current_msa for a in model.individuals])
+            self.assertEqual(list(shared.column('liquid_savings')), [a.liquid_savings for a in model.individuals])
+            for _ in range(2):
+                model.step()
+            self.assertEqual(view.call_count, 3)
+
+    def test_invalid_policies(self):
+        """Test that bad operators, duplicate names and levels without a government are rejected."""
+        with self.assertRaises(ValueError):
+            ExtendedBenefits('benefits', 100, conditions=(('age', '~', 3),))
+        with self.assertRaises(ValueError):
+            self._model([ExtendedBenefits('benefits', 100), Retraining('benefits', 10)])
+        with self.assertRaises(ValueError):
+            self._model([ExtendedBenefits('benefits', 100, level='local')])
+
+    def test_runs_each_step_under_both_engines(self):
+        """Test that governments apply their policies every step and the spend is collected."""
+        policies = [ExtendedBenefits('benefits', 100), Retraining('retraining', 50, level='state', take_up=0.5,
+                                                                   conditions=(UNEMPLOYED,))]
+        for engine in MigrationModel.ENGINES:
+            model = MigrationModel(**SIZES, seed=4, engine=engine, policies=policies, budgets={'state': 1000})
+            for _ in range(3):
+                model.step()
+            model_df = model.datacollector.get_model_vars_dataframe()
+            records = model.policy_engine.records()
+            self.assertEqual(len(records), 3 * 3)
+            self.assertEqual(model_df['PolicySpend'].sum(), sum(model.policy_engine.spent.values()))
+            self.assertEqual(model_df['PolicyRecipients'].sum(), sum(model.policy_engine.uptake.values()))
+            self.assertLessEqual(model.policy_engine.spent.get('state', 0), 1000)
+
+if __name__ == '__main__':
+    unittest.main()
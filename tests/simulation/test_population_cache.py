@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.simulation import model as model_module
+from src.simulation import population_cache as cache_module
+from src.simulation.model import MigrationModel
+from src.simulation.population_cache import PopulationCache
+from src.simulation.sharding import ShardedSimulation
+from src.utils.rng import RandomStreams
+
+SIZES = dict(n_individuals=120, n_firms=12, n_regions=4, n_governments=1)
+
+
+class TestPopulationCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create an empty cache directory."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.cache = PopulationCache(self.directory)
+
+    def test_round_trip_memory_maps_columns(self):
+        """Test that a cached population is identical to a fresh one and memory-mapped."""
+        generated = self.cache.get(RandomStreams(3), 50, 5, 3)
+        loaded = self.cache.get(RandomStreams(3), 50, 5, 3)
+        for table in ('regions', 'firms', 'individuals'):
+            for name, values in getattr(generated, table).items():
+                np.testing.assert_array_equal(getattr(loaded, table)[name], values)
+        np.testing.assert_array_equal(loaded.employer_ids, generated.employer_ids)
+        np.testing.assert_array_equal(loaded.roster[0], generated.roster[0])
+        self.assertIsInstance(loaded.individuals['age'], np.memmap)
+        self.assertIsInstance(loaded.individuals['soc_code'], np.memmap)
+        self.assertEqual(loaded.regions['age_distribution'][0], generated.regions['age_distribution'][0])
+
+    def test_keyed_by_parameters_and_version(self):
+        """Test that different seeds, sizes or generator versions use different entries."""
+        key = self.cache.key(np.random.SeedSequence(1), 50, 5, 3)
+        self.assertEqual(key, self.cache.key(RandomStreams(1).seed_sequence, 50, 5, 3))
+        self.assertNotEqual(key, self.cache.key(np.random.SeedSequence(2), 50, 5, 3))
+        self.assertNotEqual(key, self.cache.key(np.random.SeedSequence(1), 50, 6, 3))
+        with patch.object(cache_module, 'GENERATOR_VERSION', 99):
+            self.assertNotEqual(key, self.cache.key(np.random.SeedSequence(1), 50, 5, 3))
+
+    def test_writes_are_atomic(self):
+        """Test that an interrupted write leaves no entry and no temporary files."""
+        key = self.cache.key(np.random.SeedSequence(4), 20, 2, 2)
+        population = self.cache.get(RandomStreams(4), 20, 2, 2)
+        shutil.rmtree(os.path.join(self.directory, key))
+        with patch.object(cache_module.json, 'dump', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.cache.save(key, population)
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertIsNone(self.cache.load(key))
+
+    def test_concurrent_writer_loses_quietly(self):
+        """Test that saving an entry another process already stored keeps the first copy."""
+        key = self.cache.key(np.random.SeedSequence(5), 20, 2, 2)
+        population = self.cache.get(RandomStreams(5), 20, 2, 2)
+        with patch.object(cache_module.os.path, 'exists', return_value=False):
+            self.cache.save(key, population)
+        self.assertEqual(os.listdir(self.directory), [key])
+
+    def test_model_reuses_cached_population(self):
+        """Test that a cached model generates once and then runs identically."""
+        with patch.object(cache_module, 'generate_population', wraps=cache_module.generate_population) as generate:
+            first = MigrationModel(**SIZES, seed=8, population_cache=self.cache)
+            second = MigrationModel(**SIZES, seed=8, population_cache=self.cache)
+        self.assertEqual(generate.call_count, 1)
+        uncached = MigrationModel(**SIZES, seed=8)
+        for model in (first, second, uncached):
+            for _ in range(3):
+                model.step()
+        expected = uncached.datacollector.get_model_vars_dataframe()
+        pd.testing.assert_frame_equal(first.datacollector.get_model_vars_dataframe(), expected)
+        pd.testing.assert_frame_equal(second.datacollector.get_model_vars_dataframe(), expected)
+
+    def test_state_store_loads_cached_columns_in_bulk(self):
+        """Test that a state-store model fills its tables from the cached columns without iterating rows."""
+        MigrationModel(**SIZES, seed=9, population_cache=self.cache)
+        with patch('src.simulation.model.iter_rows', wraps=model_module.iter_rows) as iter_rows:
+            cached = MigrationModel(**SIZES, seed=9, state_store=True, population_cache=self.cache)
+        self.assertEqual([call.args[1] for call in iter_rows.call_args_list], [model_module.REGION_FIELDS])
+        uncached = MigrationModel(**SIZES, seed=9, state_store=True)
+        for name in cached.state.individuals.schema:
+            np.testing.assert_array_equal(cached.state.individuals.values(name),
+                                          uncached.state.individuals.values(name))
+
+    def test_sharded_simulation_uses_cache(self):
+        """Test that the sharded coordinator loads its population from the cache."""
+        with ShardedSimulation(**SIZES, n_shards=2, seed=6, processes=False, population_cache=self.cache) as sim:
+            sim.step()
+            self.assertEqual(sim.metrics['Individuals'], 120)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.simulation.model import MigrationModel
+from src.simulation.profiling import StepProfiler
+
+SIZES = dict(n_individuals=100, n_firms=10, n_regions=4, n_governments=2)
+
+
+class TestStepProfiler(unittest.TestCase):
+
+    def _run(self, steps=3, **kwargs):
+        model = MigrationModel(**SIZES, seed=4, profile=True, **kwargs)
+        for _ in range(steps):
+            model.step()
+        return model
+
+    def test_mesa_stages_and_methods_timed(self):
+        """Test that every stage, instrumented agent method and collection is timed per step."""
+        model = self._run()
+        df = model.profiler.dataframe()
+        self.assertEqual(sorted(set(df.index.get_level_values('Step'))), [1, 2, 3])
+        step = df.loc[2]
+        self.assertEqual(step.loc['IndividualAgent.step', 'Calls'], 100)
+        self.assertEqual(step.loc['FirmAgent.layoff_logic', 'Calls'], 10)
+        self.assertEqual(step.loc['FirmAgent.post_job_vacancy', 'Calls'], 10)
+        self.assertEqual(step.loc['RegionalAgent.step', 'Calls'], 4)
+        self.assertEqual(step.loc['collect', 'Calls'], 1)
+        self.assertTrue((df['Seconds'] >= 0).all())
+        # Stages include the agent methods they call
+        self.assertGreaterEqual(step.loc['FirmAgent.step', 'Seconds'], step.loc['FirmAgent.layoff_logic', 'Seconds'])
+        self.assertGreaterEqual(step.loc['MigrationModel.step', 'Seconds'], step.loc['IndividualAgent.step', 'Seconds'])
+
+    def test_array_engine_phases_timed(self):
+        """Test that the array engine reports its phases."""
+        df = self._run(engine='array').profiler.dataframe()
+        phases = set(df.index.get_level_values('Phase'))
+        for phase in ('ArrayEngine.layoffs', 'ArrayEngine.match', 'ArrayEngine.migrate',
+                      'RegionalAgent.step', 'collect', 'MigrationModel.step'):
+            self.assertIn(phase, phases)
+
+    def test_event_counters_match_metrics(self):
+        """Test that per-step event counts equal the collected metrics."""
+        model = self._run(steps=4)
+        events = model.profiler.events_dataframe()
+        metrics = model.datacollector.get_model_vars_dataframe()
+        for name in ('Hires', 'Layoffs', 'Movers', 'VacanciesPosted'):
+            self.assertEqual(events[name].tolist(), metrics[name].tolist())
+
+    def test_disabled_by_default(self):
+        """Test that models do not profile unless asked to."""
+        model = MigrationModel(**SIZES, seed=4)
+        model.step()
+        self.assertIsNone(model.profiler)
+
+    def test_export_and_compare(self):
+        """Test that timing tables round-trip through CSV and compare per phase."""
+        profiler = self._run().profiler
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'timings.csv')
+            profiler.to_csv(path)
+            baseline = StepProfiler.read_csv(path)
+        pd.testing.assert_frame_equal(baseline, profiler.dataframe())
+        slower = baseline.copy()
+        slower['Seconds'] *= 2
+        comparison = StepProfiler.compare(baseline, slower)
+        self.assertTrue((comparison['Ratio'].dropna().round(9) == 2).all())
+        summary = profiler.summary()
+        self.assertAlmostEqual(summary.loc['MigrationModel.step', 'Share'], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
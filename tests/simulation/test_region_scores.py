@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.simulation.model import MigrationModel
+from src.simulation.region_scores import RegionScoreTable, region_score
+
+SIZES = dict(n_individuals=200, n_firms=10, n_regions=6, n_governments=1)
+
+
+class TestRegionScoreTable(unittest.TestCase):
+
+    def test_choose_matches_per_decision_comparison(self):
+        """Test that batched choices equal comparing each decision's candidates in turn."""
+        table = RegionScoreTable()
+        rng = np.random.default_rng(0)
+        table.ids = list(range(8))
+        table.scores = rng.random(8)
+        origins = rng.integers(0, 8, size=50)
+        candidates = rng.integers(0, 8, size=(50, 3))
+        destinations = table.choose(origins, candidates)
+        for origin, row, destination in zip(origins, candidates, destinations):
+            best = min(row, key=lambda i: table.scores[i])
+            expected = best if table.scores[best] < table.scores[origin] else origin
+            self.assertEqual(destination, expected)
+
+    def test_refreshed_once_per_step(self):
+        """Test that the table is rebuilt once per step however many individuals decide."""
+        model = MigrationModel(**SIZES, seed=2, migration_rate=1.0)
+        with patch.object(RegionScoreTable, 'refresh', autospec=True,
+                          side_effect=RegionScoreTable.refresh) as refresh:
+            model.step()
+            model.step()
+        self.assertEqual(refresh.call_count, 2)
+        region = model.regions.items[0]
+        np.testing.assert_allclose(model.region_scores().scores[0],
+                                   region.unemployment_rate + region.median_price / 1e6)
+
+    def test_custom_score_drives_both_engines(self):
+        """Test that a pluggable score function is used by the Mesa and array engines."""
+        def prefer_first(columns):
+            scores = np.ones(len(columns['median_price']))
+            scores[0] = 0.0
+            return scores
+
+        for engine in MigrationModel.ENGINES:
+            model = MigrationModel(**SIZES, seed=6, engine=engine,
+                                   region_table=RegionScoreTable(score=prefer_first))
+            first = model.regions.items[0].unique_id
+            initial = {a.unique_id: a.current_msa for a in model.individuals}
+            for _ in range(5):
+                model.step()
+            self.assertGreater(model.datacollector.get_model_vars_dataframe()['Movers'].sum(), 0)
+            for agent in model.individuals:
+                self.assertIn(agent.current_msa, (initial[agent.unique_id], first))
+
+    def test_default_score(self):
+        """Test the default score of unemployment rate plus house price in millions."""
+        self.assertAlmostEqual(region_score({'unemployment_rate': 0.1, 'median_price': 2e5}), 0.3)
+
+if __name__ == '__main__':
+    unittest.main()
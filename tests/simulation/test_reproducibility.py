@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.simulation.batch import BatchRunner
+from src.simulation.model import MigrationModel
+
+SIZES = dict(n_individuals=200, n_firms=40, n_regions=5, n_governments=2)
+
+
+def record_posts(job_market):
+    """Record the (firm_id, soc_code) of every vacancy posted to `job_market`."""
+    posts = []
+    post = job_market.post
+
+    def recording_post(vacancy):
+        posts.append((vacancy.firm_id, vacancy.soc_code))
+        return post(vacancy)
+
+    job_market.post = recording_post
+    return posts
+
+
+class TestReproducibility(unittest.TestCase):
+
+    def test_seed_determines_run(self):
+        """Test that the model seed alone determines population and trajectory."""
+        frames = []
+        for global_seed in (0, 1):
+            np.random.seed(global_seed)  # the global NumPy state must not matter
+            model = MigrationModel(**SIZES, seed=8)
+            for _ in range(5):
+                model.step()
+            frames.append((model.datacollector.get_model_vars_dataframe(),
+                           model.datacollector.get_agent_vars_dataframe()))
+        pd.testing.assert_frame_equal(frames[0][0], frames[1][0])
+        pd.testing.assert_frame_equal(frames[0][1], frames[1][1])
+        other = MigrationModel(**SIZES, seed=9)
+        self.assertNotEqual([a.age for a in other.individuals], frames[0][1].loc[1]['Age'].tolist())
+
+    def test_counter_draws_identical_across_engines(self):
+        """Test that Mesa and array engines make the same per-agent coin flips."""
+        posts = {}
+        models = {}
+        for engine in MigrationModel.ENGINES:
+            model = MigrationModel(**SIZES, seed=4, counter_rng=True, engine=engine)
+            posts[engine] = record_posts(model.job_market)
+            model.step()
+            models[engine] = model
+        self.assertTrue(posts['mesa'])
+        self.assertEqual(sorted(posts['mesa']), sorted(posts['array']))
+        self.assertEqual(models['mesa'].metrics['Layoffs'], models['array'].metrics['Layoffs'])
+
+    def test_batch_independent_of_process_count(self):
+        """Test that replicate results do not depend on the number of workers."""
+        results = [BatchRunner(SIZES, steps=3, n_replicates=2, seed=5, max_workers=workers).run()
+                   for workers in (1, 2)]
+        for index in range(2):
+            for result in results[1:]:
+                np.testing.assert_array_equal(
+                    results[0].aggregator.replicates('Employed')[results[0].completed.index(index)],
+                    result.aggregator.replicates('Employed')[result.completed.index(index)])
+
+if __name__ == '__main__':
+    unittest.main()
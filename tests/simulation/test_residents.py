@@ -0,0 +1,67 @@
+import unittest
+
+from src.simulation.model import MigrationModel
+from src.simulation.residents import ResidentIndex
+
+class TestResidentIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small model with index cross-checking enabled."""
+        self.model = MigrationModel(n_individuals=60, n_firms=6, n_regions=4, n_governments=2, debug=True)
+        self.individuals = [a for a in self.model.agent_id_map.values() if hasattr(a, 'current_msa')]
+
+    def test_index_matches_recount_after_steps(self):
+        """Test that the incremental counters survive hires, layoffs and migration."""
+        for _ in range(5):
+            self.model.step()  # debug mode raises if the index drifts
+        total = sum(self.model.residents.resident_count.values())
+        self.assertEqual(total, len(self.individuals))
+
+    def test_move_and_employment_updates(self):
+        """Test that moves and employment changes update the per-MSA counters."""
+        residents = self.model.residents
+        agent = self.individuals[0]
+        origin = agent.current_msa
+        destination = next(msa for msa in residents.residents if msa != origin)
+        origin_count = residents.resident_count[origin]
+
+        agent.current_msa = destination
+        residents.move(agent, origin, destination)
+        self.assertEqual(residents.resident_count[origin], origin_count - 1)
+        self.assertIn(agent.unique_id, residents.residents[destination])
+
+        employed = residents.employed_count[destination]
+        agent.is_employed = False
+        residents.separate(agent)
+        self.assertEqual(residents.employed_count[destination], employed - 1)
+        residents.check(self.individuals)
+
+    def test_check_detects_drift(self):
+        """Test that the debug cross-check catches a state change the index missed."""
+        agent = self.individuals[0]
+        agent.is_employed = not agent.is_employed
+        with self.assertRaises(RuntimeError):
+            self.model.residents.check(self.individuals)
+
+    def test_add_many_matches_add(self):
+        """Test that registering residents in bulk gives the same sets, order and counters."""
+        one_by_one, bulk = ResidentIndex(), ResidentIndex()
+        for agent in self.individuals:
+            one_by_one.add(agent)
+        bulk.add_many([a.unique_id for a in self.individuals], [a.current_msa for a in self.individuals],
+                      [a.is_employed for a in self.individuals], [a.wage_percentile for a in self.individuals])
+        self.assertEqual(list(bulk.residents), list(one_by_one.residents))
+        for msa, residents in one_by_one.residents.items():
+            self.assertEqual(bulk.residents[msa].items, residents.items)
+        self.assertEqual(bulk.resident_count, one_by_one.resident_count)
+        self.assertEqual(bulk.employed_count, one_by_one.employed_count)
+        bulk.check(self.individuals)
+
+    def test_empty_region_has_no_rate(self):
+        """Test that an MSA without residents reports no unemployment rate."""
+        index = ResidentIndex(['MSA9'])
+        self.assertIsNone(index.unemployment_rate('MSA9'))
+        self.assertIsNone(index.mean_wage_percentile('MSA9'))
+
+if __name__ == '__main__':
+    unittest.main()
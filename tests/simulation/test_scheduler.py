@@ -0,0 +1,156 @@
+import unittest
+
+import numpy as np
+
+from src.agents.firm import FirmAgent
+from src.agents.government import GovernmentAgent
+from src.agents.individual import IndividualAgent
+from src.agents.regional import RegionalAgent
+from src.simulation.model import MigrationModel
+from src.simulation.scheduler import EventScheduler
+from src.simulation.sharding import ShardedSimulation
+
+class TestStagedTypeScheduler(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small model with the default staged scheduler."""
+        self.model = MigrationModel(n_individuals=40, n_firms=5, n_regions=3, n_governments=2, seed=11)
+
+    def test_registries_partition_agents(self):
+        """Test that every agent is registered under exactly its own type."""
+        self.assertEqual(len(self.model.individuals), 40)
+        self.assertEqual(len(self.model.firms), 5)
+        self.assertEqual(len(self.model.regions), 3)
+        self.assertEqual(len(self.model.governments), 2)
+        self.assertTrue(all(isinstance(a, RegionalAgent) for a in self.model.regions))
+        self.assertEqual(self.model.schedule.get_agent_count(), 50)
+
+    def test_stages_run_in_order(self):
+        """Test that all firms act before any individual, region or government."""
+        calls = []
+        stages = [(FirmAgent, 'step'), (IndividualAgent, 'step'),
+                  (RegionalAgent, 'step'), (GovernmentAgent, 'step')]
+        for agent_type, _ in stages:
+            original = agent_type.step
+
+            def recorder(agent, original=original, agent_type=agent_type):
+                calls.append(agent_type)
+                original(agent)
+
+            setattr(agent_type, 'step', recorder)
+            self.addCleanup(setattr, agent_type, 'step', original)
+        self.model.step()
+        self.assertEqual(len(calls), 50)
+        order = [stage for stage, _ in stages]
+        self.assertEqual(sorted(calls, key=order.index), calls)
+
+    def test_custom_stages(self):
+        """Test that a configured stage list replaces the default order."""
+        model = MigrationModel(n_individuals=10, n_firms=2, n_regions=2, n_governments=1,
+                               stages=[(FirmAgent, 'post_job_vacancy')])
+        model.step()
+        self.assertEqual(model.metrics['Layoffs'], 0)
+        self.assertEqual(model.schedule.steps, 1)
+
+class TestEventScheduler(unittest.TestCase):
+
+    def _mean_events(self, scheduler, seeds=range(8), steps=10):
+        """Mean per-step event counts over seeded runs of a mid-sized model."""
+        totals = []
+        for seed in seeds:
+            model = MigrationModel(n_individuals=2000, n_firms=400, n_regions=5, n_governments=1,
+                                   seed=seed, scheduler=scheduler)
+            for _ in range(steps):
+                model.step()
+            df = model.datacollector.get_model_vars_dataframe()
+            totals.append(df[['Layoffs', 'VacanciesPosted', 'Movers', 'Hires']].mean())
+        return sum(totals) / len(totals)
+
+    def test_unknown_scheduler(self):
+        """Test that an unknown scheduler name is rejected."""
+        with self.assertRaises(ValueError):
+            MigrationModel(n_individuals=10, n_firms=2, n_regions=2, n_governments=1, scheduler='async')
+
+    def test_statistically_equivalent_to_staged(self):
+        """Test that event rates match the staged scheduler's per-step coin flips."""
+        staged = self._mean_events('staged')
+        event = self._mean_events('event')
+        # Expected posts per step: 400 firms * 5%; Poisson noise over 80 steps
+        self.assertAlmostEqual(staged['VacanciesPosted'], 20, delta=2.5)
+        self.assertAlmostEqual(event['VacanciesPosted'], 20, delta=2.5)
+        self.assertAlmostEqual(event['Movers'], staged['Movers'], delta=max(3, 0.25 * staged['Movers']))
+        self.assertAlmostEqual(event['Layoffs'], staged['Layoffs'], delta=max(2, 0.3 * staged['Layoffs']))
+        self.assertAlmostEqual(event['Hires'], staged['Hires'], delta=max(2, 0.3 * staged['Hires']))
+
+    def test_activations_scale_with_events(self):
+        """Test that only agents with a due action are activated."""
+        model = MigrationModel(n_individuals=2000, n_firms=100, n_regions=5, n_governments=1,
+                               seed=3, scheduler='event', profile=True)
+        self.assertIsInstance(model.schedule, EventScheduler)
+        unemployed = sum(1 for a in model.individuals if not a.is_employed)
+        model.step()
+        calls = model.profiler.dataframe().loc[1, 'Calls']
+        self.assertNotIn('IndividualAgent.step', calls)
+        self.assertNotIn('FirmAgent.step', calls)
+        self.assertEqual(calls['IndividualAgent.search_for_job'], unemployed + model.metrics['Layoffs'])
+        self.assertLess(calls['IndividualAgent.decide_migration'], 100)
+        self.assertLess(calls['FirmAgent.open_vacancy'], 20)
+        self.assertEqual(calls['RegionalAgent.step'], 5)
+
+    def test_reschedules_on_layoff_and_hire(self):
+        """Test that a laid-off worker searches every step until hired."""
+        model = MigrationModel(n_individuals=50, n_firms=5, n_regions=2, n_governments=1,
+                               seed=2, scheduler='event')
+        model.step()
+        search = model.schedule._active[2]
+        firm = next(f for f in model.firms if f.employees)
+        worker = model.agent_id_map[firm.employees.items[0]]
+        self.assertNotIn(worker, search)
+        firm.employees.remove(worker.unique_id)
+        worker.is_employed, worker.employer_id = False, None
+        model.record_layoff(worker, firm)
+        self.assertIn(worker, search)
+        worker.is_employed, worker.employer_id = True, firm.unique_id
+        model.record_hire(worker, firm)
+        self.assertNotIn(worker, search)
+
+    def test_changed_rate_redraws_wake_time(self):
+        """Test that a firm whose layoff rate drops to zero never lays off again."""
+        model = MigrationModel(n_individuals=200, n_firms=20, n_regions=2, n_governments=1,
+                               seed=4, scheduler='event')
+        model.step()
+        model.layoff_probabilities = {}
+        for firm in model.firms:
+            model.schedule.reschedule(firm)
+        for _ in range(20):
+            model.step()
+        layoffs = model.datacollector.get_model_vars_dataframe()['Layoffs']
+        self.assertEqual(layoffs.iloc[1:].sum(), 0)
+
+    def test_removed_agents_are_not_activated(self):
+        """Test that removing an agent drops its pending actions."""
+        model = MigrationModel(n_individuals=100, n_firms=10, n_regions=2, n_governments=1,
+                               seed=6, scheduler='event', vacancy_rate=1.0)
+        model.step()
+        removed = model.firms.items[0]
+        model.schedule.remove(removed)
+        posted = model.metrics['VacanciesPosted']
+        model.step()
+        self.assertEqual(model.metrics['VacanciesPosted'], 9)
+        self.assertEqual(posted, 10)
+
+    def test_sharded_event_scheduler_conserves_individuals(self):
+        """Test that immigrants and emigrants are scheduled across shards."""
+        with ShardedSimulation(n_individuals=300, n_firms=20, n_regions=6, n_governments=1, n_shards=3,
+                               seed=5, processes=False, scheduler='event', debug=True) as sim:
+            for _ in range(5):
+                sim.step()
+            self.assertEqual(sim.metrics['Individuals'], 300)
+            for shard in sim.shards:
+                schedule = shard.model.schedule
+                searching = set(schedule._active[2].items)
+                self.assertEqual(searching, {a for a in shard.model.individuals if not a.is_employed})
+                self.assertTrue(np.all([a.unique_id in schedule._rates[3] for a in shard.model.individuals]))
+
+if __name__ == '__main__':
+    unittest.main()
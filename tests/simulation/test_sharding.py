@@ -0,0 +1,199 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.agents.firm import FirmAgent
+from src.agents.individual import IndividualAgent
+from src.simulation.metrics import MetricsRegistry, unemployment_rate
+from src.simulation.policy import ExtendedBenefits
+from src.simulation.sharding import ShardedSimulation, partition_regions
+
+SIZES = dict(n_individuals=300, n_firms=20, n_regions=6, n_governments=1)
+
+
+def _agents(shard, agent_type):
+    return [a for a in shard.model.schedule.agents if isinstance(a, agent_type)]
+
+
+class TestPartitionRegions(unittest.TestCase):
+
+    def test_balances_residents(self):
+        """Test that every region is assigned once and shard loads stay balanced."""
+        counts = [50, 40, 30, 20, 10, 10]
+        shards = partition_regions(list('ABCDEF'), counts, 3)
+        self.assertEqual(sorted(r for shard in shards for r in shard), list('ABCDEF'))
+        index = {r: i for i, r in enumerate('ABCDEF')}
+        loads = [sum(counts[index[r]] for r in shard) for shard in shards]
+        self.assertLessEqual(max(loads) - min(loads), max(counts))
+        self.assertEqual(sorted(loads), [50, 50, 60])
+
+    def test_more_shards_than_regions(self):
+        """Test that surplus shards get no regions and the simulation still runs."""
+        shards = partition_regions(['A', 'B'], [5, 3], 4)
+        self.assertEqual(sum(len(s) for s in shards), 2)
+        self.assertEqual(sum(1 for s in shards if not s), 2)
+        with ShardedSimulation(**dict(SIZES, n_regions=2), n_shards=3, seed=4, processes=False) as sim:
+            self.assertIn([], sim.partition)
+            for _ in range(3):
+                sim.step()
+            self.assertEqual(sim.metrics['Individuals'], 300)
+
+
+class TestShardedSimulation(unittest.TestCase):
+
+    def _run(self, steps=4, **kwargs):
+        with ShardedSimulation(**SIZES, n_shards=3, seed=11, **kwargs) as sim:
+            for _ in range(steps):
+                sim.step()
+            return sim.datacollector.get_model_vars_dataframe()
+
+    def test_processes_match_in_process_run(self):
+        """Test that worker processes reproduce the in-process run for a fixed seed."""
+        pd.testing.assert_frame_equal(self._run(processes=True), self._run(processes=False))
+
+    def test_migration_conserves_individuals(self):
+        """Test that individuals moving between shards are neither lost nor duplicated."""
+        with ShardedSimulation(**SIZES, n_shards=3, seed=5, processes=False) as sim:
+            ids = set(sim.owner)
+            moved = 0
+            for _ in range(6):
+                before = dict(sim.owner)
+                sim.step()
+                moved += sum(1 for i, shard in sim.owner.items() if before[i] != shard)
+                located = [a.unique_id for shard in sim.shards for a in _agents(shard, IndividualAgent)]
+                self.assertEqual(len(located), len(ids))
+                self.assertEqual(set(located), ids)
+                self.assertEqual(sim.metrics['Individuals'], len(ids))
+                for shard_index, shard in enumerate(sim.shards):
+                    for agent in _agents(shard, IndividualAgent):
+                        self.assertEqual(sim.owner[agent.unique_id], shard_index)
+                        self.assertIn(agent.current_msa, shard.model.owned)
+            self.assertGreater(moved, 0)
+
+    def test_rosters_consistent_after_cross_shard_exchange(self):
+        """Test that employers and rosters agree after remote layoffs and cross-shard hires."""
+        with ShardedSimulation(**SIZES, n_shards=3, seed=7, processes=False, debug=True) as sim:
+            exchanged = {'layoffs': 0, 'hires': 0}
+            exchange = sim._exchange
+
+            def spy(outbound):
+                inbound = exchange(outbound)
+                for received in inbound:
+                    exchanged['layoffs'] += len(received['layoffs'])
+                    exchanged['hires'] += len(received['hires'])
+                return inbound
+
+            sim._exchange = spy
+            # One occupation; the first shard's firms lay off often and never post, the others
+            # post often, so its unemployed residents can only be hired in other shards
+            for index, shard in enumerate(sim.shards):
+                for individual in _agents(shard, IndividualAgent):
+                    individual.soc_code = '15-1000'
+                for firm in _agents(shard, FirmAgent):
+                    firm.VACANCY_SOC_RANGE = (1000, 1000)
+                shard.model.vacancy_rate = 0.0 if index == 0 else 0.5
+                if index == 0:
+                    shard.model.layoff_probabilities = dict.fromkeys(FirmAgent.LAYOFF_PROBABILITIES, 0.5)
+            for _ in range(8):
+                sim.step()  # debug=True checks each shard's resident index
+                firms = {f.unique_id: f for shard in sim.shards for f in _agents(shard, FirmAgent)}
+                individuals = [a for shard in sim.shards for a in _agents(shard, IndividualAgent)]
+                employer_of = {a.unique_id: a.employer_id for a in individuals if a.is_employed}
+                for firm in firms.values():
+                    for employee_id in firm.employees:
+                        self.assertEqual(employer_of.get(employee_id), firm.unique_id)
+                for individual_id, firm_id in employer_of.items():
+                    self.assertIn(individual_id, firms[firm_id].employees)
+                self.assertEqual(sim.metrics['Employed'], len(employer_of))
+            self.assertGreater(exchanged['layoffs'], 0)
+            self.assertGreater(exchanged['hires'], 0)
+
+    def test_only_counts_cross_until_matched(self):
+        """Test that shards report job seekers and vacancies as counts and only matched ones are fetched."""
+        with ShardedSimulation(**SIZES, n_shards=3, seed=7, processes=False) as sim:
+            # As above, the first shard's unemployed can only be hired in other shards
+            for index, shard in enumerate(sim.shards):
+                for individual in _agents(shard, IndividualAgent):
+                    individual.soc_code = '15-1000'
+                for firm in _agents(shard, FirmAgent):
+                    firm.VACANCY_SOC_RANGE = (1000, 1000)
+                shard.model.vacancy_rate = 0.0 if index == 0 else 0.5
+                if index == 0:
+                    shard.model.layoff_probabilities = dict.fromkeys(FirmAgent.LAYOFF_PROBABILITIES, 0.5)
+            offered = []
+            call = sim._call
+
+            def spy(command, payloads):
+                results = call(command, payloads)
+                if command == 'step_local':
+                    for sent in results:
+                        self.assertTrue(all(isinstance(count, int) for count in sent['seekers'].values()))
+                        self.assertTrue(all(isinstance(count, int) for count in sent['openings'].values()))
+                        # Leftover seekers never share an occupation with their own shard's vacancies
+                        self.assertFalse(set(sent['seekers']) & set(sent['openings']))
+                elif command == 'offer':
+                    offered.append(sum(len(ids) for request in payloads for ids in request['seekers'].values()))
+                return results
+
+            sim._call = spy
+            for _ in range(4):
+                sim.step()
+            self.assertGreater(sum(offered), 0)
+
+    def test_governments_do_not_share_ids_with_individuals(self):
+        """Test that each shard numbers its governments after the whole population."""
+        with ShardedSimulation(**dict(SIZES, n_governments=2), n_shards=3, seed=7, processes=False) as sim:
+            individual_ids = set(sim.owner)
+            for shard in sim.shards:
+                for government in shard.model.governments:
+                    self.assertNotIn(government.unique_id, individual_ids)
+
+    def test_budgets_are_split_between_shards(self):
+        """Test that shards share each policy budget by residents, so total spending stays within it."""
+        policy = ExtendedBenefits('benefits', 100, conditions=())
+        with ShardedSimulation(**SIZES, n_shards=3, seed=3, processes=False, policies=[policy],
+                               budgets={'federal': 10_000}) as sim:
+            budgets = [shard.model.policy_engine.budgets['federal'] for shard in sim.shards]
+            self.assertAlmostEqual(sum(budgets), 10_000)
+            for shard, budget in zip(sim.shards, budgets):
+                self.assertAlmostEqual(budget, 10_000 * len(_agents(shard, IndividualAgent)) / 300)
+            for _ in range(3):
+                sim.step()
+            spent = sum(shard.model.policy_engine.spent['federal'] for shard in sim.shards)
+            self.assertLessEqual(spent, 10_000)
+            self.assertEqual(sim.datacollector.get_model_vars_dataframe()['PolicySpend'].sum(), spent)
+
+    def test_unsupported_model_arguments(self):
+        """Test that model arguments shards cannot honour are rejected."""
+        for kwargs in (dict(engine='array'), dict(state_store=True), dict(output_dir='runs/sharded'),
+                       dict(population=object())):
+            with self.assertRaises(ValueError):
+                ShardedSimulation(**SIZES, n_shards=2, seed=1, processes=False, **kwargs)
+
+
+class TestCombineMetrics(unittest.TestCase):
+
+    def test_sums_counters_and_recomputes_derived(self):
+        """Test that combined counters are sums and the unemployment rate is recomputed from them."""
+        registries = []
+        for individuals, employed, hires in ((100, 90, 3), (50, 25, 4)):
+            metrics = MetricsRegistry()
+            metrics.counter('Individuals', individuals)
+            metrics.counter('Employed', employed)
+            metrics.counter('Hires', hires, per_step=True)
+            metrics.derived('UnemploymentRate', unemployment_rate)
+            registries.append(metrics)
+        combined = MetricsRegistry.combine(registries)
+        self.assertEqual(combined['Individuals'], 150)
+        self.assertEqual(combined['Employed'], 115)
+        self.assertEqual(combined['Hires'], 7)
+        self.assertAlmostEqual(combined['UnemploymentRate'], 1 - 115 / 150)
+        self.assertNotAlmostEqual(combined['UnemploymentRate'],
+                                  np.mean([r['UnemploymentRate'] for r in registries]))
+        combined.begin_step()
+        self.assertEqual(combined['Hires'], 0)
+        self.assertEqual(registries[0]['Hires'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.simulation import model as model_module
+from src.simulation.model import MigrationModel
+from src.simulation.sweep import (SweepRunner, apply_parameters, grid_design,
+                                  latin_hypercube_design)
+
+PARAMS = dict(n_individuals=200, n_firms=20, n_regions=4, n_governments=1)
+
+
+class TestDesigns(unittest.TestCase):
+
+    def test_grid_design(self):
+        """Test that a grid holds every combination, the last parameter fastest."""
+        design = grid_design({'vacancy_rate': [0.0, 0.1], 'migration_rate': [0.01, 0.02, 0.03]})
+        self.assertEqual(len(design), 6)
+        self.assertEqual(design[1], {'vacancy_rate': 0.0, 'migration_rate': 0.02})
+        self.assertEqual(len({tuple(point.values()) for point in design}), 6)
+
+    def test_latin_hypercube_covers_every_stratum(self):
+        """Test that each parameter's range has exactly one point per stratum."""
+        space = {'vacancy_rate': (0.0, 0.1), 'layoff_probabilities.early': (0.01, 0.05)}
+        design = latin_hypercube_design(space, 10, seed=3)
+        self.assertEqual(len(design), 10)
+        for name, (low, high) in space.items():
+            values = np.array([point[name] for point in design])
+            strata = np.floor((values - low) / (high - low) * 10).astype(int)
+            self.assertEqual(sorted(strata.tolist()), list(range(10)))
+        self.assertEqual(design, latin_hypercube_design(space, 10, seed=3))
+
+
+class TestApplyParameters(unittest.TestCase):
+
+    def test_sets_model_parameters(self):
+        """Test that points set model parameters, and one stage of the layoff probabilities."""
+        model = MigrationModel(**PARAMS, seed=1)
+        apply_parameters(model, {'vacancy_rate': 0.2, 'layoff_probabilities.mature': 0.5})
+        self.assertEqual(model.vacancy_rate, 0.2)
+        self.assertEqual(model.layoff_probabilities['mature'], 0.5)
+        self.assertEqual(model.layoff_probabilities['none'], 0.001)
+
+    def test_rejects_unknown_parameters(self):
+        """Test that only the model's behavioural parameters can be swept."""
+        for name in ('num_firms', 'vacancy_rate.early'):
+            with self.assertRaises(ValueError):
+                SweepRunner(PARAMS, [{name: 1}], steps=1)
+
+
+class TestSweepRunner(unittest.TestCase):
+
+    def test_population_built_once_per_replicate(self):
+        """Test that every point of a replicate reuses one generated population."""
+        design = grid_design({'vacancy_rate': [0.0, 0.05, 0.1]})
+        with patch.object(model_module, 'generate_population', wraps=model_module.generate_population) as generate:
+            result = SweepRunner(PARAMS, design, steps=3, n_replicates=2, fork=False).run()
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(len(result.series), 6)
+        self.assertFalse(result.failures)
+
+    def test_common_random_numbers(self):
+        """Test that identical points of a replicate give identical runs, and parameters take effect."""
+        design = [{'vacancy_rate': 0.05}, {'vacancy_rate': 0.05}, {'vacancy_rate': 0.0}]
+        result = SweepRunner(PARAMS, design, steps=4, fork=False).run()
+        for name, values in result.series[(0, 0)].items():
+            np.testing.assert_array_equal(values, result.series[(1, 0)][name])
+        self.assertEqual(result.series[(2, 0)]['VacanciesPosted'].sum(), 0)
+        summary = result.summary('VacanciesPosted', statistic='mean')
+        self.assertEqual(list(summary.columns), ['vacancy_rate', 'VacanciesPosted', 'VacanciesPosted_std'])
+        self.assertEqual(summary.loc[2, 'VacanciesPosted'], 0)
+
+    @unittest.skipUnless(SweepRunner(PARAMS, [], 1).fork, "needs the fork start method")
+    def test_forked_runs_match_clones(self):
+        """Test that forked workers reproduce the in-process cloned runs exactly."""
+        design = latin_hypercube_design({'migration_rate': (0.0, 0.2), 'layoff_probabilities.none': (0.0, 0.1)},
+                                        4, seed=5)
+        forked = SweepRunner(PARAMS, design, steps=3, seed=9, max_workers=2, fork=True).run()
+        cloned = SweepRunner(PARAMS, design, steps=3, seed=9, fork=False).run()
+        self.assertEqual(sorted(forked.series), sorted(cloned.series))
+        for key, series in cloned.series.items():
+            for name, values in series.items():
+                np.testing.assert_array_equal(forked.series[key][name], values)
+
+    def test_failed_points_are_recorded(self):
+        """Test that a failing run is reported without stopping the sweep."""
+        design = [{'vacancy_rate': 0.05}, {'migration_rate': 'often'}]
+        result = SweepRunner(PARAMS, design, steps=2, fork=False).run()
+        self.assertIn((0, 0), result.series)
+        self.assertIn((1, 0), result.failures)
+
+if __name__ == '__main__':
+    unittest.main()
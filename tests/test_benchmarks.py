@@ -0,0 +1,63 @@
+import copy
+import os
+import tempfile
+import unittest
+
+from benchmarks.suite import (
+    COMPARISONS, PHASES, REFERENCE_BASELINE, SIZES, compare, comparison_table, load_baseline, run_suite,
+    save_baseline, scaling,
+)
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_suite_measures_every_phase(self):
+        """Test that the demo size is timed and memory-profiled for every phase."""
+        suite = run_suite(sizes=('demo',), steps=2)
+        phases = suite['results']['demo']
+        self.assertEqual(set(phases), set(PHASES))
+        for values in phases.values():
+            self.assertGreaterEqual(values['seconds'], 0)
+            self.assertGreater(values['peak_mb'], 0)
+        self.assertEqual(len(scaling(suite)), len(PHASES))
+
+    def test_baseline_round_trip_and_regressions(self):
+        """Test that saved baselines reload and that slower phases are reported."""
+        suite = run_suite(sizes=('demo',), steps=2, memory=False)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baselines', 'demo.json')
+            save_baseline(suite, path)
+            baseline = load_baseline(path)
+        self.assertEqual(compare(baseline, suite), [])
+        slower = copy.deepcopy(suite)
+        slower['results']['demo']['construct']['seconds'] = baseline['results']['demo']['construct']['seconds'] * 2
+        regressions = compare(baseline, slower, tolerance=0.25, min_seconds=0)
+        self.assertEqual([(size, phase, metric) for size, phase, metric, _, _ in regressions],
+                         [('demo', 'construct', 'seconds')])
+
+    def test_comparisons(self):
+        """Test that every comparison measures each variant and is checked against baselines."""
+        suite = run_suite(sizes=('demo',), steps=1, memory=False, comparisons=tuple(COMPARISONS))
+        table = comparison_table(suite)
+        self.assertEqual(set(table.index.get_level_values('comparison')), set(COMPARISONS))
+        self.assertTrue((table['seconds'] >= 0).all())
+        self.assertEqual(compare(suite, suite), [])
+        slower = copy.deepcopy(suite)
+        slower['comparisons']['state_store']['demo']['state_store']['retained_mb'] *= 2
+        self.assertEqual([(phase, metric) for _, phase, metric, _, _ in compare(suite, slower)],
+                         [('state_store/state_store', 'retained_mb')])
+
+    def test_reference_baseline_matches_suite(self):
+        """Test that the committed reference baseline covers every phase and comparison the suite measures."""
+        reference = load_baseline(REFERENCE_BASELINE)
+        self.assertTrue(set(reference['results']) <= set(SIZES))
+        for phases in reference['results'].values():
+            self.assertEqual(set(phases), set(PHASES))
+        self.assertEqual(set(reference['comparisons']), set(COMPARISONS))
+        self.assertEqual(compare(reference, reference), [])
+        self.assertEqual(len(comparison_table(reference)),
+                         sum(len(variants) for by_size in reference['comparisons'].values()
+                             for variants in by_size.values()))
+
+if __name__ == '__main__':
+    unittest.main()
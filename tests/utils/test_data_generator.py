@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from src.utils.data_generator import (
+    FIRM_FIELDS, INDIVIDUAL_FIELDS, REGION_FIELDS, generate_firm_columns, generate_firm_data,
+    generate_individual_columns, generate_individual_data, generate_regional_columns,
+    generate_regional_data,
+)
+
+class TestDataGenerator(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a seeded source of randomness."""
+        self.rng = np.random.default_rng(7)
+        self.region_ids = ['MSA1', 'MSA2', 'MSA3']
+
+    def test_columns_have_one_array_per_field(self):
+        """Test that each generator returns full-length arrays in constructor order."""
+        for columns, fields, n in [
+            (generate_individual_columns(100, self.region_ids, self.rng), INDIVIDUAL_FIELDS, 100),
+            (generate_firm_columns(20, self.region_ids, self.rng), FIRM_FIELDS, 20),
+            (generate_regional_columns(3, self.rng), REGION_FIELDS, 3),
+        ]:
+            self.assertEqual(tuple(columns), fields)
+            for name, values in columns.items():
+                self.assertEqual(len(values), n, name)
+
+    def test_column_values_in_range(self):
+        """Test that vectorized draws respect the original per-agent distributions."""
+        columns = generate_individual_columns(1000, self.region_ids, self.rng)
+        self.assertTrue(((columns['age'] >= 18) & (columns['age'] < 65)).all())
+        self.assertTrue(set(columns['current_msa']) <= set(self.region_ids))
+        self.assertTrue(all(code.startswith('15-') and len(code) == 7 for code in columns['soc_code']))
+        self.assertEqual(columns['homeownership'].dtype, np.bool_)
+
+    def test_record_wrappers_return_python_dicts(self):
+        """Test that the list-of-dicts API is preserved."""
+        regions = generate_regional_data(2)
+        self.assertEqual([r['unique_id'] for r in regions], ['MSA1', 'MSA2'])
+        firms = generate_firm_data(3, ['MSA1', 'MSA2'])
+        self.assertEqual(set(firms[0]), set(FIRM_FIELDS))
+        individuals = generate_individual_data(4, ['MSA1', 'MSA2'])
+        self.assertEqual(len(individuals), 4)
+        self.assertIsInstance(individuals[0]['age'], int)
+        self.assertIsInstance(individuals[0]['current_msa'], str)
+
+    def test_record_wrappers_are_reproducible(self):
+        """Test that the wrappers follow np.random.seed by default and accept an explicit seed."""
+        np.random.seed(11)
+        first = generate_individual_data(5, self.region_ids)
+        np.random.seed(11)
+        self.assertEqual(generate_individual_data(5, self.region_ids), first)
+        self.assertEqual(generate_firm_data(4, self.region_ids, rng=3), generate_firm_data(4, self.region_ids, rng=3))
+        self.assertEqual(generate_regional_data(2, rng=np.random.default_rng(5)),
+                         generate_regional_data(2, rng=np.random.default_rng(5)))
+
+if __name__ == '__main__':
+    unittest.main()
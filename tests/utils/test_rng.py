@@ -0,0 +1,71 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from src.utils.rng import CounterRandom, GeneratorRandom, RandomStreams, STREAMS, counter_uniforms
+
+
+class TestRandomStreams(unittest.TestCase):
+
+    def test_streams_are_seeded_and_independent(self):
+        """Test that equal seeds give equal streams and named streams differ."""
+        a, b = RandomStreams(42), RandomStreams(42)
+        for name in STREAMS:
+            self.assertEqual(a.generator(name).random(), b.generator(name).random())
+        first_draws = {RandomStreams(42).generator(name).random() for name in STREAMS}
+        self.assertEqual(len(first_draws), len(STREAMS))
+        self.assertNotEqual(RandomStreams(1).generator('firms').random(), RandomStreams(2).generator('firms').random())
+
+    def test_generator_random_adapter(self):
+        """Test that the random.Random adapter draws from and shares its Generator."""
+        streams = RandomStreams(3)
+        adapter = streams.random('individuals')
+        self.assertIs(adapter.generator, streams.generator('individuals'))
+        self.assertTrue(0 <= adapter.random() < 1)
+        self.assertIn(adapter.randint(1, 3), (1, 2, 3))
+        self.assertEqual(len(set(adapter.sample(range(10), 5))), 5)
+        self.assertLess(adapter.getrandbits(100), 1 << 100)
+
+        restored = pickle.loads(pickle.dumps(streams))
+        self.assertIs(restored.random('individuals').generator, restored.generator('individuals'))
+        self.assertEqual(restored.random('individuals').random(), adapter.random())
+
+        state = adapter.getstate()
+        value = adapter.random()
+        adapter.setstate(state)
+        self.assertEqual(adapter.random(), value)
+        self.assertIsInstance(GeneratorRandom(np.random.default_rng(0)).random(), float)
+
+    def test_counter_draws_match_vectorized(self):
+        """Test that per-agent counter draws equal their vectorized counterparts."""
+        streams = RandomStreams(9, counter=True)
+        ids = np.array([1, 7, 12345, 2 ** 40])
+        expected = [[streams.uniforms('firms', 'vacancy', ids, 5, draw)[i] for draw in range(3)]
+                    for i in range(len(ids))]
+        for i, agent_id in enumerate(ids.tolist()):
+            rng = streams.agent_random('firms', 'vacancy', agent_id, 5)
+            self.assertIsInstance(rng, CounterRandom)
+            self.assertEqual([rng.random() for _ in range(3)], expected[i])
+        rng = streams.agent_random('firms', 'vacancy', 7, 5)
+        rng.random()
+        u = streams.uniforms('firms', 'vacancy', [7], 5, draw=1)[0]
+        self.assertEqual(rng.randint(1000, 2000), 1000 + int(u * 1001))
+
+    def test_counter_draws_depend_on_every_input(self):
+        """Test that counter draws change with key, agent, step and draw index."""
+        base = counter_uniforms(1, [10], 3, 0)[0]
+        for args in ((2, [10], 3, 0), (1, [11], 3, 0), (1, [10], 4, 0), (1, [10], 3, 1)):
+            self.assertNotEqual(counter_uniforms(*args)[0], base)
+        u = counter_uniforms(5, np.arange(100_000), 1)
+        self.assertAlmostEqual(u.mean(), 0.5, delta=0.01)
+        streams = RandomStreams(0, counter=True)
+        self.assertNotEqual(streams.counter_key('firms', 'layoff'), streams.counter_key('firms', 'vacancy'))
+
+    def test_shared_stream_without_counter(self):
+        """Test that agent_random returns the type's shared stream by default."""
+        streams = RandomStreams(0)
+        self.assertIs(streams.agent_random('firms', 'layoff', 1, 0), streams.random('firms'))
+
+if __name__ == '__main__':
+    unittest.main()